@@ -0,0 +1,80 @@
+"""
+article_json.py -- The article snapshot, serialized once per refresh.
+
+Building /api/articles used to copy every article dict to add its
+bookmarked/read flags and then encode the whole list, so each request cost
+time proportional to the snapshot size. EncodedArticles encodes each
+article once, without its flags, when the snapshot is published. A request
+then only splices in the flags: every article starts from its precomputed
+"not bookmarked, not read" bytes, only articles whose URL is in the
+read or bookmark set get different ones, and the list is joined into one
+body. The Python work per request grows with the number of flagged
+articles, not with the snapshot.
+
+Encoding uses orjson when it is installed and the stdlib json module
+otherwise; both produce compact UTF-8 JSON.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is slower but equivalent
+    orjson = None
+
+# (bookmarked, read) -> the bytes that close an encoded article
+_FLAG_SUFFIX = {
+    (bookmarked, read): (
+        b',"bookmarked":' + (b"true" if bookmarked else b"false")
+        + b',"read":' + (b"true" if read else b"false") + b"}"
+    )
+    for bookmarked in (False, True)
+    for read in (False, True)
+}
+
+
+def dumps(data) -> bytes:
+    """Compact UTF-8 JSON, as FastAPI's JSONResponse would render data."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedArticles:
+    """A snapshot's articles as JSON, ready to have read/bookmark flags spliced in.
+
+    Immutable once built, so one instance is shared by every request for
+    the snapshot.
+    """
+
+    __slots__ = ("_open", "_plain", "_by_url", "_ids_by_url", "urls")
+
+    def __init__(self, articles: list[dict]):
+        # Each article's JSON without its closing brace, so flags can be appended.
+        self._open = [dumps(a)[:-1] for a in articles]
+        self._plain = [encoded + _FLAG_SUFFIX[False, False] for encoded in self._open]
+        self._by_url: dict[str, list[int]] = {}
+        self._ids_by_url: dict[str, list] = {}
+        for i, article in enumerate(articles):
+            url = article.get("url", "")
+            self._by_url.setdefault(url, []).append(i)
+            self._ids_by_url.setdefault(url, []).append(article.get("id"))
+        self.urls = frozenset(self._by_url)
+
+    def __len__(self) -> int:
+        return len(self._plain)
+
+    def ids_for(self, urls) -> frozenset:
+        """Ids of the articles whose URL is in urls."""
+        return frozenset(i for url in self.urls.intersection(urls) for i in self._ids_by_url[url])
+
+    def body(self, read_urls, bookmarked_urls) -> bytes:
+        """The JSON array of every article with its bookmarked/read flags."""
+        read = self.urls.intersection(read_urls)
+        bookmarked = self.urls.intersection(bookmarked_urls)
+        parts = self._plain.copy()
+        for url in read | bookmarked:
+            suffix = _FLAG_SUFFIX[url in bookmarked, url in read]
+            for i in self._by_url[url]:
+                parts[i] = self._open[i] + suffix
+        return b"[" + b",".join(parts) + b"]"
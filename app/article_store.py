@@ -0,0 +1,413 @@
+"""
+article_store.py -- Persistent SQLite article history with dedup and retention.
+
+Articles from every fetch are upserted into articles.db (WAL mode) in
+DATA_DIR. Each row is keyed by a normalized form of the article URL, so the
+same story syndicated by two feeds, or linked with different tracking
+parameters, collapses into one row owned by the feed that delivered it
+first. Old rows are pruned by a per-feed cap and by age, counted from the
+later of the publish date and the last time the feed still listed it, so
+a feed's current items are never pruned however old they are.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app import config, metrics
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid", "ocid"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    date TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    published REAL NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source_url, published DESC);
+"""
+
+# Full-text index over title and summary, kept in step with the articles
+# table by triggers. The update trigger only fires when indexed text
+# actually changes, since every refresh re-upserts unchanged rows.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, summary, content='articles', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+    VALUES ('delete', old.id, old.title, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, summary ON articles
+WHEN old.title IS NOT new.title OR old.summary IS NOT new.summary BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+    VALUES ('delete', old.id, old.title, old.summary);
+    INSERT INTO articles_fts(rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+"""
+
+# bm25 column weights: a hit in the title counts for more than one in the summary.
+_TITLE_WEIGHT = 10.0
+_SUMMARY_WEIGHT = 1.0
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_local = threading.local()
+
+
+def _get_db_path():
+    return os.path.join(config.DATA_DIR, "articles.db")
+
+
+def _connect() -> sqlite3.Connection:
+    """Return this thread's connection to the current DATA_DIR's database."""
+    path = _get_db_path()
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == path:
+        return conn
+    if conn is not None:
+        conn.close()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+    ).fetchone()
+    conn.executescript(_FTS_SCHEMA)
+    if not has_fts:
+        # Index rows stored before full-text search existed.
+        with conn:
+            conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+    _local.conn = conn
+    _local.path = path
+    return conn
+
+
+def close():
+    """Close this thread's connection, if any."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of an article URL used as its dedup key.
+
+    Lowercases scheme and host, drops the fragment, default ports, a
+    trailing slash and utm_* / common tracking query parameters. A URL
+    that can't be parsed is keyed as written (or by its raw host part if
+    only the port is malformed).
+    """
+    text = url.strip()
+    try:
+        parts = urlsplit(text)
+    except ValueError:  # e.g. an unbalanced IPv6 bracket
+        return text
+    scheme = parts.scheme.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        # A malformed port ("example.com:80a") must not fail the whole batch;
+        # key on the host as written.
+        host = parts.netloc.lower()
+    else:
+        host = (parts.hostname or "").lower()
+        if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+            host = f"{host}:{port}"
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def article_key(article: dict) -> str:
+    """Dedup key: normalized URL, or a hash of source and title when there is no link."""
+    url = article.get("url") or ""
+    if url:
+        return normalize_url(url)
+    digest = hashlib.sha1(f"{article.get('source_url', '')}\n{article.get('title', '')}".encode("utf-8"))
+    return "title:" + digest.hexdigest()
+
+
+def _published_ts(article: dict) -> float:
+    raw = article.get("published")
+    if not raw:
+        return 0.0
+    try:
+        dt = datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _row_to_article(row) -> dict:
+    published = row["published"]
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "source": row["source"],
+        "source_url": row["source_url"],
+        "date": row["date"],
+        "published": datetime.fromtimestamp(published, timezone.utc).isoformat() if published else None,
+        "summary": row["summary"],
+        "url": row["url"],
+    }
+
+
+def upsert_articles(articles: list[dict]) -> int:
+    """Insert new articles and refresh existing ones, in one transaction.
+
+    A row is only updated by the feed that owns it, so a duplicate arriving
+    from a second feed is collapsed rather than stealing the row.
+    Returns the number of rows inserted or refreshed by their own feed
+    (unchanged ones included, since last_seen moves); collapsed duplicates
+    don't count.
+    """
+    now = time.time()
+    rows = [
+        (
+            article_key(a), a.get("url") or "", a.get("title") or "", a.get("source") or "",
+            a.get("source_url") or "", a.get("date") or "", a.get("summary") or "",
+            _published_ts(a), now, now, now,
+        )
+        for a in articles
+    ]
+    conn = _connect()
+    with conn:
+        cursor = conn.executemany(
+            """
+            INSERT INTO articles
+                (key, url, title, source, source_url, date, summary, published,
+                 first_seen, last_seen, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                updated_at = CASE
+                    WHEN (articles.title, articles.summary, articles.published, articles.source)
+                         IS NOT (excluded.title, excluded.summary, excluded.published, excluded.source)
+                    THEN excluded.updated_at ELSE articles.updated_at END,
+                url = excluded.url,
+                title = excluded.title,
+                source = excluded.source,
+                date = excluded.date,
+                summary = excluded.summary,
+                published = excluded.published,
+                last_seen = excluded.last_seen
+            WHERE articles.source_url = excluded.source_url
+            """,
+            rows,
+        )
+        return cursor.rowcount
+
+
+def prune(keep_sources: list[str] | None = None, max_age_days: int | None = None,
+          max_per_feed: int | None = None) -> int:
+    """Apply the retention policy and return the number of rows deleted.
+
+    Removes articles whose publish date and last sighting in their feed are
+    both older than max_age_days, all but the newest max_per_feed per feed, and,
+    if keep_sources is given, articles from feeds no longer subscribed.
+    """
+    if max_age_days is None:
+        max_age_days = config.ARTICLE_RETENTION_DAYS
+    if max_per_feed is None:
+        max_per_feed = config.ARTICLE_MAX_PER_FEED
+    conn = _connect()
+    deleted = 0
+    with conn:
+        if max_age_days > 0:
+            cutoff = time.time() - max_age_days * 86400
+            deleted += conn.execute(
+                "DELETE FROM articles WHERE MAX(published, last_seen) < ?",
+                (cutoff,),
+            ).rowcount
+        if max_per_feed > 0:
+            deleted += conn.execute(
+                """
+                DELETE FROM articles WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY source_url ORDER BY published DESC, id DESC
+                        ) AS rank FROM articles
+                    ) WHERE rank > ?
+                )
+                """,
+                (max_per_feed,),
+            ).rowcount
+        if keep_sources is not None:
+            placeholders = ",".join("?" * len(keep_sources))
+            deleted += conn.execute(
+                f"DELETE FROM articles WHERE source_url NOT IN ({placeholders})", keep_sources,
+            ).rowcount
+    return deleted
+
+
+def recent_articles(limit: int | None = None) -> list[dict]:
+    """Return up to limit articles, newest first."""
+    if limit is None:
+        limit = config.ARTICLE_SNAPSHOT_LIMIT
+    rows = _connect().execute(
+        "SELECT * FROM articles ORDER BY published DESC, id DESC LIMIT ?",
+        (limit if limit > 0 else -1,),
+    ).fetchall()
+    return [_row_to_article(row) for row in rows]
+
+
+def encode_cursor(article: dict) -> str:
+    """Opaque cursor pointing just past article in newest-first order."""
+    raw = f"{_published_ts(article)!r}:{article['id']}"
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    """Return (published, id) from a cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published, article_id = base64.urlsafe_b64decode(padded).decode("ascii").split(":")
+        return float(published), int(article_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+def query_articles(limit: int, cursor: str | None = None, since: float | None = None,
+                   source_url: str | None = None) -> tuple[list[dict], str | None]:
+    """Return one newest-first page of articles and the cursor for the next.
+
+    cursor continues after a previous page; since keeps only articles
+    published strictly after that Unix timestamp; source_url restricts the
+    page to one feed. The next cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    clauses, params = [], []
+    if cursor:
+        published, article_id = decode_cursor(cursor)
+        clauses.append("(published, id) < (?, ?)")
+        params += [published, article_id]
+    if since is not None:
+        clauses.append("published > ?")
+        params.append(since)
+    if source_url:
+        clauses.append("source_url = ?")
+        params.append(source_url)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = _connect().execute(
+        f"SELECT * FROM articles {where} ORDER BY published DESC, id DESC LIMIT ?",
+        params + [limit + 1],
+    ).fetchall()
+    articles = [_row_to_article(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(articles[-1]) if len(rows) > limit else None
+    return articles, next_cursor
+
+
+def find_urls(source_url: str | None = None, before: float | None = None) -> list[str]:
+    """Return the URLs of stored articles matching a filter, newest first.
+
+    source_url restricts to one feed; before keeps only articles with a
+    known publish date earlier than that Unix timestamp.
+    """
+    clauses, params = ["url != ''"], []
+    if source_url:
+        clauses.append("source_url = ?")
+        params.append(source_url)
+    if before is not None:
+        clauses.append("published > 0 AND published < ?")
+        params.append(before)
+    rows = _connect().execute(
+        f"SELECT url FROM articles WHERE {' AND '.join(clauses)} ORDER BY published DESC, id DESC",
+        params,
+    )
+    return [url for (url,) in rows]
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    tokens = _SEARCH_TOKEN_RE.findall(query)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_articles(query: str, limit: int, offset: int = 0,
+                    source_url: str | None = None) -> tuple[list[dict], int]:
+    """Full-text search over title and summary.
+
+    Every word in query must appear, matching word prefixes, so "elect"
+    finds "election". Results are ranked by bm25 relevance with title hits
+    weighted above summary hits, then newest first.
+    Returns (one page of articles, total number of matches).
+    """
+    expression = _match_expression(query)
+    if not expression:
+        return [], 0
+    source_clause = "AND a.source_url = ?" if source_url else ""
+    params = [expression] + ([source_url] if source_url else [])
+    conn = _connect()
+    total = conn.execute(
+        f"""
+        SELECT COUNT(*) FROM articles_fts f JOIN articles a ON a.id = f.rowid
+        WHERE articles_fts MATCH ? {source_clause}
+        """,
+        params,
+    ).fetchone()[0]
+    rows = conn.execute(
+        f"""
+        SELECT a.* FROM articles_fts f JOIN articles a ON a.id = f.rowid
+        WHERE articles_fts MATCH ? {source_clause}
+        ORDER BY bm25(articles_fts, {_TITLE_WEIGHT}, {_SUMMARY_WEIGHT}), a.published DESC, a.id DESC
+        LIMIT ? OFFSET ?
+        """,
+        params + [limit, offset],
+    ).fetchall()
+    return [_row_to_article(row) for row in rows], total
+
+
+def known_urls(urls: list[str]) -> set[str]:
+    """Return the subset of urls that still have an article in the store."""
+    by_key = {}
+    for url in urls:
+        by_key.setdefault(normalize_url(url), []).append(url)
+    keys = list(by_key)
+    found = set()
+    conn = _connect()
+    # Stay well under SQLite's bound-parameter limit.
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for (key,) in conn.execute(f"SELECT key FROM articles WHERE key IN ({placeholders})", chunk):
+            found.update(by_key[key])
+    return found
+
+
+def count() -> int:
+    return _connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+metrics.gauge_callback("teletext_article_store_rows", "Articles held in the SQLite store.", count)
@@ -1,7 +1,7 @@
 import json
 import os
 
-from app import config
+from app import config, storage
 
 
 def _get_bookmarks_path():
@@ -13,15 +13,17 @@ def _load_bookmarks():
     """Load bookmarks from bookmarks.json. If the file doesn't exist, create empty."""
     path = _get_bookmarks_path()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
+        data = storage.read_json(path)
+        if isinstance(data, list):
+            return data
+        return []
     except FileNotFoundError:
         _save_bookmarks([])
         return []
-    except (json.JSONDecodeError, IOError, OSError):
+    except json.JSONDecodeError:
+        storage.quarantine(path)
+        return []
+    except (IOError, OSError):
         return []
 
 
@@ -29,9 +31,7 @@ def _save_bookmarks(bookmarks):
     """Save bookmarks list to bookmarks.json."""
     path = _get_bookmarks_path()
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(bookmarks, f, indent=2)
+        storage.write_json(path, bookmarks)
         return True
     except (IOError, OSError):
         return False
@@ -39,20 +39,55 @@ def _save_bookmarks(bookmarks):
 
 def add_bookmark(url):
     """Add a bookmark URL. Returns True if added, False if duplicate."""
-    bookmarks = _load_bookmarks()
-    if url in bookmarks:
-        return False
-    bookmarks.append(url)
-    return _save_bookmarks(bookmarks)
+    with storage.locked(_get_bookmarks_path()):
+        bookmarks = _load_bookmarks()
+        if url in bookmarks:
+            return False
+        bookmarks.append(url)
+        return _save_bookmarks(bookmarks)
 
 
 def remove_bookmark(url):
     """Remove a bookmark URL. Returns True if removed, False if not found."""
-    bookmarks = _load_bookmarks()
-    if url not in bookmarks:
-        return False
-    bookmarks.remove(url)
-    return _save_bookmarks(bookmarks)
+    with storage.locked(_get_bookmarks_path()):
+        bookmarks = _load_bookmarks()
+        if url not in bookmarks:
+            return False
+        bookmarks.remove(url)
+        return _save_bookmarks(bookmarks)
+
+
+def add_bookmarks(urls):
+    """Bookmark several URLs in one write.
+
+    Returns the URLs actually added (skipping existing bookmarks and
+    repeats), or None if the file couldn't be saved.
+    """
+    with storage.locked(_get_bookmarks_path()):
+        bookmarks = _load_bookmarks()
+        existing = set(bookmarks)
+        added = []
+        for url in urls:
+            if url not in existing:
+                existing.add(url)
+                added.append(url)
+        if added and not _save_bookmarks(bookmarks + added):
+            return None
+        return added
+
+
+def remove_bookmarks(urls):
+    """Remove several bookmarks in one write.
+
+    Returns the URLs actually removed, or None if the file couldn't be saved.
+    """
+    with storage.locked(_get_bookmarks_path()):
+        bookmarks = _load_bookmarks()
+        targets = set(urls)
+        removed = [url for url in bookmarks if url in targets]
+        if removed and not _save_bookmarks([url for url in bookmarks if url not in targets]):
+            return None
+        return removed
 
 
 def list_bookmarks():
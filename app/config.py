@@ -20,3 +20,46 @@ DEFAULT_SETTINGS = {
     "notifications_enabled": False,
     "keyword_alerts": [],
 }
+
+# Concurrent feed fetching
+FETCH_CONCURRENCY = int(os.environ.get("TELETEXT_FETCH_CONCURRENCY", "16"))
+FETCH_PER_HOST_LIMIT = int(os.environ.get("TELETEXT_FETCH_PER_HOST_LIMIT", "4"))
+FETCH_DEADLINE_SECONDS = float(os.environ.get("TELETEXT_FETCH_DEADLINE_SECONDS", "20"))
+
+# Background refresh; 0 disables the poller and articles are fetched per request
+POLL_INTERVAL_SECONDS = int(os.environ.get("TELETEXT_POLL_INTERVAL_SECONDS", "300"))
+
+# Adaptive per-feed polling bounds (seconds)
+POLL_MIN_SECONDS = int(os.environ.get("TELETEXT_POLL_MIN_SECONDS", "60"))
+POLL_MAX_SECONDS = int(os.environ.get("TELETEXT_POLL_MAX_SECONDS", "21600"))
+
+# SQLite article store retention and snapshot size
+ARTICLE_RETENTION_DAYS = int(os.environ.get("TELETEXT_ARTICLE_RETENTION_DAYS", "30"))
+ARTICLE_MAX_PER_FEED = int(os.environ.get("TELETEXT_ARTICLE_MAX_PER_FEED", "1000"))
+ARTICLE_SNAPSHOT_LIMIT = int(os.environ.get("TELETEXT_ARTICLE_SNAPSHOT_LIMIT", "1000"))
+
+# Read-state journal: fold read.log into read.json after this many entries
+READ_LOG_COMPACT_ENTRIES = int(os.environ.get("TELETEXT_READ_LOG_COMPACT_ENTRIES", "1000"))
+
+# Feed discovery results are cached per URL for this long (seconds)
+DISCOVERY_CACHE_TTL_SECONDS = int(os.environ.get("TELETEXT_DISCOVERY_CACHE_TTL_SECONDS", "3600"))
+
+# Largest OPML document accepted for import (bytes)
+OPML_MAX_BYTES = int(os.environ.get("TELETEXT_OPML_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Article summaries are cut to this many characters (0 = no limit)
+SUMMARY_MAX_CHARS = int(os.environ.get("TELETEXT_SUMMARY_MAX_CHARS", "1000"))
+
+# Parse plain RSS 2.0 / Atom with the streaming fast path (falls back to feedparser)
+FAST_PARSER = os.environ.get("TELETEXT_FAST_PARSER", "1").lower() not in ("0", "false", "no")
+
+# Worker processes for feed parsing (0 = parse in the fetch threads)
+PARSE_WORKERS = int(os.environ.get("TELETEXT_PARSE_WORKERS", "0"))
+
+# Without the background poller, /api/articles reuses a snapshot younger than this (seconds)
+REFRESH_FRESHNESS_SECONDS = float(os.environ.get("TELETEXT_REFRESH_FRESHNESS_SECONDS", "5"))
+
+# /health reports 503 "stale" once the poller hasn't checked the schedule for this long (seconds)
+HEALTH_MAX_CHECK_AGE_SECONDS = int(
+    os.environ.get("TELETEXT_HEALTH_MAX_CHECK_AGE_SECONDS", str(3 * POLL_INTERVAL_SECONDS))
+)
@@ -1,7 +1,41 @@
+"""
+discovery.py -- Find the feeds a website offers.
+
+The page is streamed and parsed only up to </head> (where <link
+rel="alternate"> tags live), while the common feed paths on the same origin
+are probed concurrently with small ranged GETs, so a lookup costs roughly
+one round trip. Results are cached per URL for DISCOVERY_CACHE_TTL_SECONDS.
+"""
+
+import asyncio
+import codecs
 import re
-import urllib.request
-import urllib.error
+import threading
+import time
 from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import httpx
+
+from app import config
+
+USER_AGENT = "TeletextNews/1.0"
+MAX_PAGE_BYTES = 500_000
+PROBE_PATHS = ("/feed", "/rss.xml", "/atom.xml")
+PROBE_BYTES = 2048
+MAX_CACHE_ENTRIES = 512
+
+_FEED_TYPES = ("application/rss+xml", "application/atom+xml")
+_FEED_ROOT_RE = re.compile(rb"<(rss|feed|rdf:RDF)[\s>]")
+_TITLE_RE = re.compile(rb"<title[^>]*>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</title>", re.S)
+
+_cache: dict[str, tuple[float, list[dict]]] = {}
+_cache_lock = threading.Lock()
+
+
+class _HeadEnd(Exception):
+    """Raised by the parser once there is nothing more of interest in the page."""
+
 
 class _LinkParser(HTMLParser):
     def __init__(self):
@@ -9,29 +43,125 @@ class _LinkParser(HTMLParser):
         self.feeds = []
 
     def handle_starttag(self, tag, attrs):
-        if tag.lower() != 'link':
+        tag = tag.lower()
+        if tag == 'body':
+            raise _HeadEnd
+        if tag != 'link':
             return
         attr_dict = dict(attrs)
-        rel = attr_dict.get('rel', '').lower()
-        type_ = attr_dict.get('type', '').lower()
-        href = attr_dict.get('href', '')
-        if rel == 'alternate' and type_ in ('application/rss+xml', 'application/atom+xml') and href:
-            title = attr_dict.get('title', href)
+        rel = (attr_dict.get('rel') or '').lower().split()
+        type_ = (attr_dict.get('type') or '').lower()
+        href = attr_dict.get('href') or ''
+        if 'alternate' in rel and type_ in _FEED_TYPES and href:
+            title = attr_dict.get('title') or href
             self.feeds.append({'url': href, 'title': title})
 
-def discover_feeds(url, timeout=10):
-    """Fetch URL and return list of discovered feed dicts [{url, title}, ...]."""
+    def handle_endtag(self, tag):
+        if tag.lower() == 'head':
+            raise _HeadEnd
+
+
+def _make_client(timeout: float) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=timeout, follow_redirects=True, headers={"User-Agent": USER_AGENT},
+    )
+
+
+def _cache_key(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+async def _page_links(client: httpx.AsyncClient, url: str) -> list[dict]:
+    """Stream url and collect its feed <link> tags, stopping at </head>."""
+    parser = _LinkParser()
+    received = 0
+    async with client.stream("GET", url) as resp:
+        resp.raise_for_status()
+        base = str(resp.url)
+        decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+        try:
+            async for chunk in resp.aiter_bytes():
+                received += len(chunk)
+                parser.feed(decoder.decode(chunk))
+                if received >= MAX_PAGE_BYTES:
+                    break
+        except _HeadEnd:
+            pass
+    for feed in parser.feeds:
+        feed['url'] = urljoin(base, feed['url'])
+    return parser.feeds
+
+
+async def _probe(client: httpx.AsyncClient, url: str) -> dict | None:
+    """Fetch the first few KB of url and return {url, title} if it looks like a feed."""
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'TeletextNews/1.0'})
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            html = resp.read(500_000).decode('utf-8', errors='replace')
-        parser = _LinkParser()
-        parser.feed(html)
-        # Resolve relative URLs
-        from urllib.parse import urljoin
-        for feed in parser.feeds:
-            if not feed['url'].startswith(('http://', 'https://')):
-                feed['url'] = urljoin(url, feed['url'])
-        return parser.feeds
+        async with client.stream("GET", url, headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"}) as resp:
+            if resp.status_code not in (200, 206):
+                return None
+            head = b""
+            async for chunk in resp.aiter_bytes():
+                head += chunk
+                if len(head) >= PROBE_BYTES:
+                    break
+            final_url = str(resp.url)
+    except httpx.HTTPError:
+        return None
+    if not _FEED_ROOT_RE.search(head):
+        return None
+    match = _TITLE_RE.search(head)
+    title = match.group(1).decode("utf-8", errors="replace").strip() if match else ""
+    return {"url": final_url, "title": title or final_url}
+
+
+async def _discover(url: str, timeout: float) -> list[dict]:
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    async with _make_client(timeout) as client:
+        page, *probes = await asyncio.gather(
+            _page_links(client, url),
+            *(_probe(client, origin + path) for path in PROBE_PATHS),
+            return_exceptions=True,
+        )
+    probes = [feed for feed in probes if isinstance(feed, dict)]
+    if isinstance(page, httpx.TransportError) and not probes:
+        raise page
+    found = page if isinstance(page, list) else []
+    seen = {feed['url'] for feed in found}
+    for feed in probes:
+        if feed['url'] not in seen:
+            seen.add(feed['url'])
+            found.append(feed)
+    return found
+
+
+async def discover_feeds(url, timeout=10):
+    """Return list of discovered feed dicts [{url, title}, ...] for a page URL.
+
+    Feeds linked from the page come first, then any found at PROBE_PATHS.
+    Returns an empty list if nothing is found or the site can't be reached.
+    """
+    key = _cache_key(url)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached[0] > now:
+        return [dict(feed) for feed in cached[1]]
+    try:
+        found = await asyncio.wait_for(_discover(url, timeout), timeout)
     except Exception:
+        # Unreachable sites are not cached, so a retry can succeed.
         return []
+    with _cache_lock:
+        if len(_cache) >= MAX_CACHE_ENTRIES:
+            for stale in [k for k, (expires, _) in _cache.items() if expires <= now]:
+                del _cache[stale]
+            if len(_cache) >= MAX_CACHE_ENTRIES:
+                _cache.pop(next(iter(_cache)))
+        _cache[key] = (now + config.DISCOVERY_CACHE_TTL_SECONDS, found)
+    return [dict(feed) for feed in found]
+
+
+def clear():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,74 @@
+"""
+events.py -- In-process publish/subscribe for Server-Sent Events.
+
+The poller publishes from its own thread; each /api/events connection owns
+an asyncio queue on the server's event loop, fed thread-safely. A client
+that falls QUEUE_SIZE events behind loses the oldest ones rather than
+making the publisher wait.
+"""
+
+import asyncio
+import json
+import threading
+
+QUEUE_SIZE = 100
+
+_subscribers: set["Subscription"] = set()
+_lock = threading.Lock()
+
+
+class Subscription:
+    """One listener's queue, bound to the event loop it was created on."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def _put(self, event: tuple[str, dict]):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: tuple[str, dict]):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has closed; the connection is gone.
+            unsubscribe(self)
+
+    async def get(self, timeout: float) -> tuple[str, dict] | None:
+        """Next (event, data), or None if nothing arrives within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def subscribe() -> Subscription:
+    """Register a listener. Must be called from a running event loop."""
+    subscription = Subscription()
+    with _lock:
+        _subscribers.add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription):
+    with _lock:
+        _subscribers.discard(subscription)
+
+
+def has_subscribers() -> bool:
+    return bool(_subscribers)
+
+
+def publish(event: str, data: dict):
+    """Send an event to every current subscriber. Safe to call from any thread."""
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscription in subscribers:
+        subscription.deliver((event, data))
+
+
+def format_event(event: str, data: dict) -> str:
+    """Encode one event in text/event-stream wire format."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
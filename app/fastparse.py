@@ -0,0 +1,182 @@
+"""
+fastparse.py -- Streaming fast path for plain RSS 2.0 and Atom feeds.
+
+feedparser does encoding detection, HTML sanitization and date handling
+for dozens of formats, nearly all of which the fetcher throws away. This
+module runs expat over the document once and keeps only what the fetcher
+uses: the feed title and ttl, and each entry's title, link, id, summary and
+publish date. No element tree is built.
+
+parse() returns None for anything it isn't sure about (RSS 1.0/RDF, a DTD,
+undeclared entities such as &nbsp;, encodings expat doesn't know, or any
+well-formedness error) and the caller falls back to feedparser.
+"""
+
+import xml.parsers.expat
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+
+_ATOM = "{" + ATOM_NS + "}"
+_DC_DATE = "{" + DC_NS + "}date"
+_CONTENT_ENCODED = "{" + CONTENT_NS + "}encoded"
+
+# element name -> entry field, per format
+_RSS_ITEM_FIELDS = {
+    "title": "title", "link": "link", "guid": "id", "description": "summary",
+    "pubDate": "published", _DC_DATE: "updated", _CONTENT_ENCODED: "content",
+}
+_ATOM_ENTRY_FIELDS = {
+    _ATOM + "title": "title", _ATOM + "id": "id", _ATOM + "summary": "summary",
+    _ATOM + "content": "content", _ATOM + "published": "published", _ATOM + "updated": "updated",
+}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _parse_datetime(raw: str | None) -> datetime | None:
+    """RFC 822 (RSS) or ISO 8601 (Atom, dc:date) to an aware UTC datetime."""
+    if not raw:
+        return None
+    raw = raw.strip()
+    parsers = (datetime.fromisoformat, parsedate_to_datetime)
+    if not raw[:4].isdigit():
+        parsers = parsers[::-1]
+    for parser in parsers:
+        try:
+            dt = parser(raw)
+            break
+        except (TypeError, ValueError, IndexError):
+            continue
+    else:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class _Handler:
+    """expat callbacks collecting feed and entry fields."""
+
+    def __init__(self):
+        self.kind = None
+        self.title = None
+        self.ttl = None
+        self.entries = []
+        self._depth = 0
+        self._entry = None
+        self._entry_depth = 0
+        self._field = None
+        self._field_depth = 0
+        self._text = []
+
+    def start(self, name, attrs):
+        if "}" in name:
+            name = "{" + name
+        self._depth += 1
+        if self._field is not None:
+            # Markup inside a text field (Atom type="xhtml"): keep its text only.
+            return
+        if self._depth == 1:
+            if name == "rss" and attrs.get("version", "2.0").startswith(("2", "0.9")):
+                self.kind = "rss"
+            elif name == _ATOM + "feed":
+                self.kind = "atom"
+            else:
+                raise _Unsupported(name)
+            return
+
+        if self._entry is None:
+            if (self.kind == "rss" and name == "item") or (self.kind == "atom" and name == _ATOM + "entry"):
+                self._entry = {}
+                self._entry_depth = self._depth
+            elif self.kind == "rss" and self._depth == 3 and name in ("title", "ttl"):
+                self._begin(name)
+            elif self.kind == "atom" and self._depth == 2 and name == _ATOM + "title":
+                self._begin("title")
+            return
+
+        if self._depth != self._entry_depth + 1:
+            return
+        if self.kind == "atom" and name == _ATOM + "link":
+            rel = attrs.get("rel", "alternate")
+            if rel == "alternate" and attrs.get("href") and "link" not in self._entry:
+                self._entry["link"] = attrs["href"]
+            return
+        fields = _RSS_ITEM_FIELDS if self.kind == "rss" else _ATOM_ENTRY_FIELDS
+        if name in fields:
+            self._begin(fields[name])
+
+    def _begin(self, field):
+        self._field = field
+        self._field_depth = self._depth
+        self._text = []
+
+    def data(self, text):
+        if self._field is not None:
+            self._text.append(text)
+
+    def end(self, name):
+        if self._field is not None and self._depth == self._field_depth:
+            value = "".join(self._text)
+            if self._entry is not None:
+                self._entry.setdefault(self._field, value)
+            elif self._field == "title":
+                self.title = value
+            else:
+                self.ttl = value
+            self._field = None
+        elif self._entry is not None and self._depth == self._entry_depth:
+            self.entries.append(self._entry)
+            self._entry = None
+        self._depth -= 1
+
+
+def _refuse_dtd(*args):
+    raise _Unsupported("DTD")
+
+
+def parse(url: str, body: bytes) -> dict | None:
+    """Parse an RSS 2.0 or Atom document, or return None to fall back to feedparser.
+
+    Returns {"title", "ttl", "entries"} where each entry is a dict with
+    title, link, id, summary and published (aware UTC datetime or None).
+    Relative links are resolved against url.
+    """
+    handler = _Handler()
+    parser = xml.parsers.expat.ParserCreate(namespace_separator="}")
+    parser.SetParamEntityParsing(xml.parsers.expat.XML_PARAM_ENTITY_PARSING_NEVER)
+    parser.StartDoctypeDeclHandler = _refuse_dtd
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.data
+    parser.buffer_text = True
+    try:
+        parser.Parse(body, True)
+    except (xml.parsers.expat.ExpatError, _Unsupported, ValueError, LookupError):
+        return None
+    if handler.kind is None:
+        return None
+
+    entries = []
+    for raw in handler.entries:
+        link = (raw.get("link") or "").strip()
+        if link and not link.startswith(("http://", "https://")):
+            link = urljoin(url, link)
+        if handler.kind == "rss" and not link and raw.get("id", "").startswith(("http://", "https://")):
+            # A permalink guid stands in for a missing <link>, as in feedparser.
+            link = raw["id"].strip()
+        entries.append({
+            "title": raw.get("title"),
+            "link": link,
+            "id": (raw.get("id") or "").strip(),
+            "summary": raw.get("summary") or raw.get("content") or "",
+            "published": _parse_datetime(raw.get("published")) or _parse_datetime(raw.get("updated")),
+        })
+    return {"title": handler.title, "ttl": handler.ttl, "entries": entries}
@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from app import config, feeds, storage
+
+_VALIDATORS = ("etag", "last_modified", "ttl_seconds")
+
+# (path, stat key, entries) as last loaded or saved. Every fetch cycle
+# loads and saves the cache, and most cycles change nothing, so the decoded
+# entries are reused while the file is unchanged and an unchanged save is
+# skipped.
+_memo: tuple | None = None
+_memo_lock = threading.Lock()
+
+
+def _get_cache_path():
+    return os.path.join(config.DATA_DIR, "feed_cache.json")
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _remember(path, key, entries):
+    global _memo
+    with _memo_lock:
+        _memo = (path, key, entries)
+
+
+def _recall(path):
+    """The memoized entries for path if the file hasn't changed since, else None."""
+    with _memo_lock:
+        memo = _memo
+    if memo is None or memo[0] != path or memo[1] != _stat_key(path):
+        return None
+    return memo[2]
+
+
+def _shallow_copy(entries):
+    return {url: dict(entry) for url, entry in entries.items()}
+
+
+def _load_cache():
+    path = _get_cache_path()
+    try:
+        data = storage.read_json(path)
+        if isinstance(data, dict):
+            return data
+        return {}
+    except (FileNotFoundError, json.JSONDecodeError, IOError, OSError):
+        return {}
+
+
+def _save_cache(cache):
+    path = _get_cache_path()
+    try:
+        storage.write_json(path, cache, indent=None)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def _encode_article(article):
+    encoded = dict(article)
+    dt = encoded.get("_sort_dt")
+    encoded["_sort_dt"] = dt.isoformat() if dt is not None else None
+    return encoded
+
+
+def _decode_article(article):
+    decoded = dict(article)
+    raw = decoded.get("_sort_dt")
+    try:
+        dt = datetime.fromisoformat(raw) if raw else None
+    except (TypeError, ValueError):
+        dt = None
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    decoded["_sort_dt"] = dt
+    return decoded
+
+
+def load_entries():
+    """Return {feed_url: {etag, last_modified, ttl_seconds, articles}} with articles decoded.
+
+    The article lists are shared with the memoized copy and must not be
+    mutated; replace an entry's list instead.
+    """
+    path = _get_cache_path()
+    entries = _recall(path)
+    if entries is None:
+        key = _stat_key(path)
+        entries = {}
+        for url, entry in _load_cache().items():
+            if not isinstance(entry, dict):
+                continue
+            entries[url] = {
+                **{field: entry.get(field) for field in _VALIDATORS},
+                "articles": [_decode_article(a) for a in entry.get("articles", [])],
+            }
+        _remember(path, key, entries)
+    return _shallow_copy(entries)
+
+
+def _unchanged(previous, entries) -> bool:
+    """True if entries holds the same feeds, validators and article lists as previous."""
+    if previous.keys() != entries.keys():
+        return False
+    for url, entry in entries.items():
+        old = previous[url]
+        if entry.get("articles") is not old["articles"]:
+            return False
+        if any(entry.get(field) != old[field] for field in _VALIDATORS):
+            return False
+    return True
+
+
+def save_entries(entries):
+    """Persist validators and parsed articles for every feed in entries.
+
+    Feeds not in entries are dropped, so removed feeds don't linger.
+    Nothing is written if every feed kept its validators and the very
+    article list it was loaded with, e.g. a cycle of 304s.
+    """
+    path = _get_cache_path()
+    previous = _recall(path)
+    if previous is not None and _unchanged(previous, entries):
+        return
+    cache = {}
+    kept = {}
+    for url, entry in entries.items():
+        articles = entry.get("articles", [])
+        validators = {field: entry.get(field) for field in _VALIDATORS}
+        cache[url] = {**validators, "articles": [_encode_article(a) for a in articles]}
+        kept[url] = {**validators, "articles": articles}
+    if _save_cache(cache):
+        _remember(path, _stat_key(path), kept)
+
+
+def update_entries(updates):
+    """Merge updates into the stored entries and drop feeds no longer subscribed.
+
+    The read, merge and write run under the cache file's lock, and the
+    subscription list is read inside it, so a fetch cycle and an OPML
+    import committing at the same time each keep the other's entries.
+    """
+    with storage.locked(_get_cache_path()):
+        subscribed = set(feeds.list_feeds())
+        entries = load_entries()
+        entries.update(updates)
+        save_entries({url: entry for url, entry in entries.items() if url in subscribed})
+
+
+def clear():
+    """Forget the memoized entries (the file is left alone)."""
+    global _memo
+    with _memo_lock:
+        _memo = None
@@ -1,7 +1,7 @@
 import json
 import os
 from datetime import datetime, timezone
-from app import config
+from app import config, storage
 
 def _get_health_path():
     return os.path.join(config.DATA_DIR, "feed_health.json")
@@ -9,40 +9,79 @@ def _get_health_path():
 def _load_health():
     path = _get_health_path()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                return data
-            return {}
+        data = storage.read_json(path)
+        if isinstance(data, dict):
+            return data
+        return {}
     except (FileNotFoundError, json.JSONDecodeError, IOError, OSError):
         return {}
 
 def _save_health(health):
     path = _get_health_path()
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(health, f, indent=2)
+        storage.write_json(path, health)
     except (IOError, OSError):
         pass
 
-def record_success(url, article_count):
-    health = _load_health()
+def _apply_success(health, url, article_count, stats, now):
     entry = health.get(url, {"error_count": 0, "last_error": None})
-    entry["last_success"] = datetime.now(timezone.utc).isoformat()
+    entry["last_success"] = now
     entry["article_count"] = article_count
     entry["error_count"] = 0
+    if stats is not None:
+        entry["last_fetch"] = stats
+        # A 304 isn't parsed, so keep reporting the parser from the last full fetch.
+        if stats.get("parser"):
+            entry["parser"] = stats["parser"]
     health[url] = entry
-    _save_health(health)
 
-def record_error(url, error_msg=""):
-    health = _load_health()
+def _apply_error(health, url, error_msg, stats, now):
     entry = health.get(url, {"last_success": None, "article_count": 0})
-    entry["last_error"] = datetime.now(timezone.utc).isoformat()
+    entry["last_error"] = now
     entry["error_count"] = entry.get("error_count", 0) + 1
     entry["error_message"] = str(error_msg)[:200]
+    if stats is not None:
+        entry["last_fetch"] = stats
     health[url] = entry
-    _save_health(health)
+
+class HealthBatch:
+    """Collects feed outcomes during a refresh cycle and writes them once.
+
+    stats, when given, is stored as the entry's last_fetch: per-phase
+    timings in milliseconds and bytes received.
+    """
+
+    def __init__(self):
+        self._outcomes = []
+
+    def record_success(self, url, article_count, stats=None):
+        self._outcomes.append((_apply_success, url, article_count, stats))
+
+    def record_error(self, url, error_msg="", stats=None):
+        self._outcomes.append((_apply_error, url, error_msg, stats))
+
+    def commit(self):
+        """Apply every recorded outcome in one read-modify-write. Returns the new health dict."""
+        with storage.locked(_get_health_path()):
+            health = _load_health()
+            if not self._outcomes:
+                return health
+            now = datetime.now(timezone.utc).isoformat()
+            for apply, url, value, stats in self._outcomes:
+                apply(health, url, value, stats, now)
+            self._outcomes = []
+            _save_health(health)
+            return health
+
+def record_success(url, article_count, stats=None):
+    batch = HealthBatch()
+    batch.record_success(url, article_count, stats)
+    batch.commit()
+
+def record_error(url, error_msg="", stats=None):
+    batch = HealthBatch()
+    batch.record_error(url, error_msg, stats)
+    batch.commit()
 
 def get_health():
     return _load_health()
@@ -0,0 +1,64 @@
+import json
+import os
+
+from app import config, storage
+
+
+def _get_meta_path():
+    """Return the absolute path to feed_meta.json in the data directory."""
+    return os.path.join(config.DATA_DIR, "feed_meta.json")
+
+
+def _load_meta():
+    """Load {feed_url: {title, html_url, category}} from feed_meta.json."""
+    path = _get_meta_path()
+    try:
+        data = storage.read_json(path)
+        if isinstance(data, dict):
+            return data
+        return {}
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        storage.quarantine(path)
+        return {}
+    except (IOError, OSError):
+        return {}
+
+
+def _save_meta(meta):
+    """Save the metadata dict to feed_meta.json."""
+    path = _get_meta_path()
+    try:
+        storage.write_json(path, meta)
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def get_meta():
+    """Return {feed_url: {title, html_url, category}} for feeds that have metadata."""
+    return _load_meta()
+
+
+def update_meta(entries):
+    """Merge {feed_url: {title, html_url, category}} into the stored metadata in one write.
+
+    Empty values don't overwrite what is already known. Returns True on success.
+    """
+    with storage.locked(_get_meta_path()):
+        meta = _load_meta()
+        for url, fields in entries.items():
+            current = meta.setdefault(url, {})
+            current.update({k: v for k, v in fields.items() if v})
+        return _save_meta(meta)
+
+
+def remove_meta(url):
+    """Forget a feed's metadata. Returns True if there was any."""
+    with storage.locked(_get_meta_path()):
+        meta = _load_meta()
+        if url not in meta:
+            return False
+        del meta[url]
+        return _save_meta(meta)
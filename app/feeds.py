@@ -1,7 +1,7 @@
 import json
 import os
 
-from app import config
+from app import config, storage
 
 
 def _get_feeds_path():
@@ -22,15 +22,17 @@ def _load_feeds():
     """Load feeds from feeds.json. If the file doesn't exist, seed with defaults."""
     path = _get_feeds_path()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return _normalize(data)
-            return config.DEFAULT_FEEDS[:]
+        data = storage.read_json(path)
+        if isinstance(data, list):
+            return _normalize(data)
+        return config.DEFAULT_FEEDS[:]
     except FileNotFoundError:
         _save_feeds(config.DEFAULT_FEEDS[:])
         return config.DEFAULT_FEEDS[:]
-    except (json.JSONDecodeError, IOError, OSError):
+    except json.JSONDecodeError:
+        storage.quarantine(path)
+        return config.DEFAULT_FEEDS[:]
+    except (IOError, OSError):
         return config.DEFAULT_FEEDS[:]
 
 
@@ -38,9 +40,7 @@ def _save_feeds(feeds):
     """Save feeds list to feeds.json."""
     path = _get_feeds_path()
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(feeds, f, indent=2)
+        storage.write_json(path, feeds)
         return True
     except (IOError, OSError):
         return False
@@ -48,20 +48,41 @@ def _save_feeds(feeds):
 
 def add_feed(url):
     """Add a feed URL. Returns True if added, False if already present."""
-    feeds = _load_feeds()
-    if url in feeds:
-        return False
-    feeds.append(url)
-    return _save_feeds(feeds)
+    with storage.locked(_get_feeds_path()):
+        feeds = _load_feeds()
+        if url in feeds:
+            return False
+        feeds.append(url)
+        return _save_feeds(feeds)
+
+
+def add_feeds(urls):
+    """Add many feed URLs in one write. Returns the list of URLs actually added.
+
+    Duplicates, both of existing feeds and within urls, are skipped.
+    Returns an empty list if nothing was new or the file couldn't be saved.
+    """
+    with storage.locked(_get_feeds_path()):
+        feeds = _load_feeds()
+        existing = set(feeds)
+        added = []
+        for url in urls:
+            if url not in existing:
+                existing.add(url)
+                added.append(url)
+        if not added or not _save_feeds(feeds + added):
+            return []
+        return added
 
 
 def remove_feed(url):
     """Remove a feed URL. Returns True if removed, False if not found."""
-    feeds = _load_feeds()
-    if url not in feeds:
-        return False
-    feeds.remove(url)
-    return _save_feeds(feeds)
+    with storage.locked(_get_feeds_path()):
+        feeds = _load_feeds()
+        if url not in feeds:
+            return False
+        feeds.remove(url)
+        return _save_feeds(feeds)
 
 
 def list_feeds():
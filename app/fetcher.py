@@ -2,39 +2,40 @@
 fetcher.py -- Fetch and parse RSS feed articles into structured dicts.
 """
 
-import html
 import re
-import socket
-from datetime import datetime
+import threading
+import time
+from calendar import timegm
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
-from time import mktime
+from urllib.parse import urlsplit
 
 import feedparser
+import httpx
 
-from app import feed_health, feeds
+from app import config, fastparse, feed_cache, feed_health, feeds, metrics, parse_pool, scheduler, summary
 
 REQUEST_TIMEOUT = 15
+USER_AGENT = "TeletextNews/1.0"
 
-_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
 
-
-def _strip_html(text: str) -> str:
-    """Remove HTML tags and unescape HTML entities."""
-    if not text:
-        return ""
-    cleaned = _HTML_TAG_RE.sub("", text)
-    cleaned = html.unescape(cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
+_MIN_DT = datetime.min.replace(tzinfo=timezone.utc)
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
 
 
 def _parse_date(entry) -> datetime | None:
-    """Try to extract a datetime from a feedparser entry."""
+    """Try to extract a timezone-aware UTC datetime from a feedparser entry."""
     for attr in ("published_parsed", "updated_parsed"):
         time_struct = getattr(entry, attr, None)
         if time_struct is not None:
             try:
-                return datetime.fromtimestamp(mktime(time_struct))
+                # feedparser normalizes *_parsed to UTC struct_time.
+                return datetime.fromtimestamp(timegm(time_struct), timezone.utc)
             except (ValueError, OverflowError, OSError):
                 continue
 
@@ -42,9 +43,12 @@ def _parse_date(entry) -> datetime | None:
         raw = getattr(entry, attr, None)
         if raw:
             try:
-                return parsedate_to_datetime(raw)
+                dt = parsedate_to_datetime(raw)
             except (ValueError, TypeError):
                 continue
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.astimezone(timezone.utc)
 
     return None
 
@@ -56,77 +60,376 @@ def _format_date(dt: datetime | None) -> str:
     return dt.strftime("%a, %d %b %Y %H:%M")
 
 
-def _fetch_single_feed(url: str) -> list[dict]:
-    """Parse one RSS/Atom feed URL and return a list of article dicts."""
-    articles: list[dict] = []
+def _get_client() -> httpx.Client:
+    """Return the shared HTTP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=config.FETCH_CONCURRENCY),
+            )
+        return _client
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Return the semaphore capping concurrent requests to url's host."""
+    host = urlsplit(url).hostname or ""
+    with _host_lock:
+        sem = _host_semaphores.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(max(1, config.FETCH_PER_HOST_LIMIT))
+            _host_semaphores[host] = sem
+        return sem
+
+
+class _PhaseTimer:
+    """httpcore trace hook that sums the time spent in each phase of a request.
+
+    Phases: connect (DNS lookup + TCP connect, which httpcore does as one
+    step), tls, wait (request sent until response headers) and download
+    (response body). Reused keep-alive connections report no connect/tls.
+    """
+
+    _PHASES = {
+        "connection.connect_tcp": "connect",
+        "connection.start_tls": "tls",
+        "http11.receive_response_headers": "wait",
+        "http11.receive_response_body": "download",
+    }
+
+    def __init__(self, timings: dict):
+        self.timings = timings
+        self._started: dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: dict):
+        prefix, _, stage = event_name.rpartition(".")
+        phase = self._PHASES.get(prefix)
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[phase] = time.perf_counter()
+        elif phase in self._started:
+            elapsed = time.perf_counter() - self._started.pop(phase)
+            self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+
+
+def _download(url: str, timeout: float = REQUEST_TIMEOUT, headers: dict | None = None,
+              timings: dict | None = None) -> httpx.Response:
+    """GET a feed, raising on network errors and HTTP error statuses.
+
+    A 304 Not Modified response is returned rather than raised. If timings
+    is given, per-phase durations in seconds are added to it.
+    """
+    extensions = {"trace": _PhaseTimer(timings)} if timings is not None else None
+    response = _get_client().get(url, timeout=timeout, headers=headers, extensions=extensions)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def _header_ttl(response: httpx.Response) -> float | None:
+    """Seconds the response may be cached for, from Cache-Control or Expires."""
+    cache_control = response.headers.get("cache-control", "")
+    match = _MAX_AGE_RE.search(cache_control)
+    if match:
+        return float(match.group(1))
+    expires = response.headers.get("expires")
+    if expires:
+        try:
+            expires_dt = parsedate_to_datetime(expires)
+            date_header = response.headers.get("date")
+            now_dt = parsedate_to_datetime(date_header) if date_header else datetime.now(timezone.utc)
+            return max(0.0, (expires_dt - now_dt).total_seconds())
+        except (TypeError, ValueError):
+            return None
+    return None
+
 
+def _feed_ttl(feed) -> float | None:
+    """Seconds from an RSS <ttl> element (given in minutes), if present."""
+    raw = getattr(feed.feed, "ttl", None)
     try:
-        old_timeout = socket.getdefaulttimeout()
-        socket.setdefaulttimeout(REQUEST_TIMEOUT)
+        return float(raw) * 60 if raw else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _max_ttl(*values: float | None) -> float | None:
+    present = [v for v in values if v]
+    return max(present) if present else None
+
+
+def _feedparser_parse(url: str, body: bytes) -> dict:
+    """Parse with feedparser into the same shape as fastparse.parse()."""
+    feed = feedparser.parse(body, response_headers={"content-location": url})
+    return {
+        "title": getattr(feed.feed, "title", None),
+        "ttl_seconds": _feed_ttl(feed),
+        "entries": [
+            {
+                "title": getattr(entry, "title", None),
+                "link": getattr(entry, "link", "") or "",
+                "id": getattr(entry, "id", "") or "",
+                "summary": getattr(entry, "summary", "") or getattr(entry, "description", "") or "",
+                "published": _parse_date(entry),
+            }
+            for entry in feed.entries
+        ],
+    }
+
+
+def _parse_feed(url: str, body: bytes) -> tuple[list[dict], dict]:
+    """Parse a downloaded RSS/Atom document.
+
+    Plain RSS 2.0 and Atom go through the fastparse fast path when
+    FAST_PARSER is on; everything else, including anything the fast path
+    rejects, through feedparser.
+
+    Returns (articles, info) where info carries feed-level metadata: the
+    RSS ttl_seconds hint and which parser was used ("fast" or "feedparser").
+    """
+    articles: list[dict] = []
+
+    parsed = fastparse.parse(url, body) if config.FAST_PARSER else None
+    if parsed is not None:
+        parser = "fast"
         try:
-            feed = feedparser.parse(url)
-        finally:
-            socket.setdefaulttimeout(old_timeout)
-    except Exception:
-        return articles
+            parsed["ttl_seconds"] = float(parsed["ttl"]) * 60 if parsed["ttl"] else None
+        except ValueError:
+            parsed["ttl_seconds"] = None
+    else:
+        parser = "feedparser"
+        parsed = _feedparser_parse(url, body)
+    info = {"ttl_seconds": parsed["ttl_seconds"], "parser": parser}
 
-    feed_title = getattr(feed.feed, "title", None) or url
+    feed_title = (parsed["title"] or "").strip() or url
 
-    for entry in feed.entries:
-        title = getattr(entry, "title", None)
-        if not title:
+    for entry in parsed["entries"]:
+        title = entry["title"]
+        if not title or not title.strip():
             continue
 
-        summary_raw = getattr(entry, "summary", "") or getattr(entry, "description", "") or ""
-        summary = _strip_html(summary_raw)
-
-        link = getattr(entry, "link", "") or ""
-        dt = _parse_date(entry)
+        link = entry["link"]
+        summary_text = summary.summary_for(entry["id"] or link or title, entry["summary"])
+        dt = entry["published"]
 
         articles.append(
             {
                 "title": title.strip(),
-                "source": feed_title.strip(),
+                "source": feed_title,
                 "source_url": url,
                 "date": _format_date(dt),
-                "summary": summary,
+                "summary": summary_text,
                 "url": link.strip(),
                 "_sort_dt": dt,
             }
         )
 
-    return articles
+    return articles, info
+
 
+def _fetch_single_feed(
+    url: str, timeout: float = REQUEST_TIMEOUT, cached: dict | None = None, deadline: float | None = None,
+) -> dict:
+    """Fetch one RSS/Atom feed URL, revalidating against a cached copy.
 
-def fetch_articles() -> list[dict]:
+    If cached holds validators from a previous fetch they are sent as
+    If-None-Match / If-Modified-Since; on 304 the cached articles are
+    reused without downloading or parsing the body.
+
+    Returns a dict with keys: articles, etag, last_modified, ttl_seconds,
+    not_modified, status, stats. ttl_seconds is the longest caching hint the
+    publisher gave via HTTP headers or RSS <ttl>, or None. stats holds the
+    per-phase timings in milliseconds and bytes received.
+    Network and HTTP errors propagate so the caller can record them.
+
+    deadline (a time.monotonic() value) bounds the wait for the host's
+    semaphore as well as the request; TimeoutError is raised if it passes
+    first.
+    """
+    cached = cached or {}
+    headers = {}
+    if cached.get("articles"):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    sem = _host_semaphore(url)
+    if not sem.acquire(timeout=None if deadline is None else max(0.0, deadline - time.monotonic())):
+        raise TimeoutError("fetch deadline exceeded")
+    try:
+        if deadline is not None:
+            # Time spent queued behind other requests to the host comes out of this one's budget.
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise TimeoutError("fetch deadline exceeded")
+        response = _download(url, timeout, headers, timings)
+    finally:
+        sem.release()
+
+    if response.status_code == 304:
+        return {
+            "articles": cached["articles"],
+            "etag": response.headers.get("etag") or cached.get("etag"),
+            "last_modified": response.headers.get("last-modified") or cached.get("last_modified"),
+            "ttl_seconds": _header_ttl(response) or cached.get("ttl_seconds"),
+            "not_modified": True,
+            "status": response.status_code,
+            "stats": _fetch_stats(timings, started, 0, True),
+        }
+
+    parse_started = time.perf_counter()
+    articles, info = parse_pool.parse(url, response.content)
+    timings["parse"] = time.perf_counter() - parse_started
+    stats = _fetch_stats(timings, started, len(response.content), False)
+    stats["parser"] = info["parser"]
+    return {
+        "articles": articles,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "ttl_seconds": _max_ttl(_header_ttl(response), info["ttl_seconds"]),
+        "not_modified": False,
+        "status": response.status_code,
+        "stats": stats,
+    }
+
+
+def _record_metrics(url: str, result: dict):
+    """Export one completed fetch's status, size and timings.
+
+    Called by whoever collects the result rather than by the worker, so a
+    fetch abandoned at the cycle deadline is counted once, as a timeout.
+    """
+    stats = result["stats"]
+    metrics.feed_fetch_responses.inc(feed=url, status=result["status"])
+    metrics.feed_fetch_bytes.inc(stats["bytes"], feed=url)
+    metrics.feed_fetch_seconds.observe(stats["total_ms"] / 1000, feed=url)
+    if not result["not_modified"]:
+        metrics.feed_parse_seconds.observe(stats["parse_ms"] / 1000, feed=url, parser=stats["parser"])
+        metrics.feed_parse_entries.set(len(result["articles"]), feed=url)
+
+
+def _fetch_stats(timings: dict, started: float, size: int, not_modified: bool) -> dict:
+    """Summarize one fetch for feed_health: phase timings in ms, bytes, 304 flag."""
+    stats = {f"{phase}_ms": round(seconds * 1000, 1) for phase, seconds in timings.items()}
+    stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    stats["bytes"] = size
+    stats["not_modified"] = not_modified
+    return stats
+
+
+def _fetch_with_deadline(url: str, deadline: float, cached: dict | None = None) -> dict:
+    """Fetch one feed, bounding its wait for the host and its request timeout by the cycle deadline."""
+    if deadline - time.monotonic() <= 0:
+        raise TimeoutError("fetch deadline exceeded")
+    return _fetch_single_feed(url, REQUEST_TIMEOUT, cached, deadline)
+
+
+def _error_status(error) -> str | int:
+    """Metrics label for a failed fetch: the HTTP status if there was one."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    if isinstance(error, (TimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    return "error"
+
+
+def fetch_articles(due: set[str] | None = None) -> list[dict]:
     """Fetch articles from every feed returned by list_feeds().
 
-    Returns a list of dicts with keys: title, source, date, summary, url.
+    If due is given, only those feeds are requested; the rest are served
+    from feed_cache as of their last fetch. Every feed that is requested
+    gets its next poll time recorded in the scheduler.
+
+    Feeds are fetched concurrently on a bounded thread pool with at most
+    FETCH_PER_HOST_LIMIT requests per host. Feeds that fail, or have not
+    finished when FETCH_DEADLINE_SECONDS elapses, are recorded as errors and
+    contribute their last cached articles (if any) instead of holding up
+    the rest.
+
+    Each feed's validators and parsed articles are kept in feed_cache so the
+    next cycle can make a conditional request and skip unchanged feeds.
+
+    Returns a list of dicts with keys: title, source, source_url, date,
+    published (ISO 8601 UTC or None), summary, url.
     Articles are sorted newest-first.
     """
     all_articles: list[dict] = []
+    feed_urls = feeds.list_feeds()
+    if not feed_urls:
+        return all_articles
 
-    for feed_url in feeds.list_feeds():
-        try:
-            articles_from_feed = _fetch_single_feed(feed_url)
-            all_articles.extend(articles_from_feed)
-            try:
-                feed_health.record_success(feed_url, len(articles_from_feed))
-            except Exception:
-                pass
-        except Exception as e:
-            try:
-                feed_health.record_error(feed_url, str(e))
-            except Exception:
-                pass
-            continue
+    cache = feed_cache.load_entries()
+    to_fetch = [url for url in feed_urls if due is None or url in due]
+    deadline = time.monotonic() + config.FETCH_DEADLINE_SECONDS
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(config.FETCH_CONCURRENCY, len(to_fetch))),
+        thread_name_prefix="feed-fetch",
+    )
+    try:
+        futures = {
+            executor.submit(_fetch_with_deadline, url, deadline, cache.get(url)): url
+            for url in to_fetch
+        }
+        done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    finally:
+        # Don't block on stragglers; their own request timeouts reap them.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Health and cache are recorded here, on the calling thread, and each
+    # is written once per cycle. Feeds that failed this cycle keep their
+    # previous cache entry.
+    new_cache = {url: cache[url] for url in feed_urls if url in cache}
+    fetched = {}
+    health_batch = feed_health.HealthBatch()
+    failed = []
+    for future, feed_url in futures.items():
+        if future not in done:
+            # Abandoned; the worker may still finish, but its result is ignored.
+            error = TimeoutError("fetch deadline exceeded")
+        else:
+            error = future.exception()
+        if error is None:
+            result = future.result()
+            _record_metrics(feed_url, result)
+            new_cache[feed_url] = fetched[feed_url] = result
+            scheduler.record_poll(feed_url, result["articles"], result["ttl_seconds"])
+            health_batch.record_success(feed_url, len(result["articles"]), result["stats"])
+        else:
+            failed.append(feed_url)
+            health_batch.record_error(feed_url, str(error))
+            metrics.feed_fetch_responses.inc(feed=feed_url, status=_error_status(error))
+
+    try:
+        health = health_batch.commit()
+    except Exception:
+        health = {}
+    for feed_url in failed:
+        error_count = health.get(feed_url, {}).get("error_count", 1)
+        scheduler.record_poll(feed_url, [], error_count=error_count)
+
+    for entry in new_cache.values():
+        all_articles.extend(dict(a) for a in entry["articles"])
+
+    try:
+        # Merge rather than overwrite: feeds subscribed mid-cycle (an OPML
+        # import) may have stored entries since this cycle loaded the cache.
+        feed_cache.update_entries(fetched)
+    except Exception:
+        pass
 
     all_articles.sort(
-        key=lambda a: a.get("_sort_dt") or datetime.min,
+        key=lambda a: a.get("_sort_dt") or _MIN_DT,
         reverse=True,
     )
 
     for article in all_articles:
-        article.pop("_sort_dt", None)
+        dt = article.pop("_sort_dt", None)
+        article["published"] = dt.isoformat() if dt is not None else None
 
     return all_articles
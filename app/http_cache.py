@@ -0,0 +1,188 @@
+"""
+http_cache.py -- ETags, 304s and precompressed bodies for JSON responses.
+
+Each response gets a weak ETag naming its content version. A request whose
+If-None-Match matches gets an empty 304, and the client keeps its copy.
+Otherwise the body is sent gzip- (or, if the brotli package is installed,
+brotli-) compressed when the client accepts it.
+
+Bodies and their compressed forms are kept in a small LRU keyed by ETag.
+So when a version is requested again, e.g. every client polling the same
+article snapshot, the body is encoded and compressed once and then
+served from memory.
+
+Fields that change on every request without changing the content version
+(the snapshot's age_seconds) are passed as extra. They are left out of the
+ETag and the cache and spliced onto the cached body per request: the
+cache holds each JSON object without its closing brace, and for gzip a
+compressor that has already consumed those bytes, so only the extra
+fields are compressed per request. Brotli has no such resumable stream,
+so a request with extra fields gets gzip instead.
+
+cached_response() is for callers that can name the content version
+without building the body (the /api/articles snapshot); json_response()
+hashes an already-built payload.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from app import article_json
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+MEDIA_TYPE = "application/json"
+CACHE_ENTRIES = 32
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_bodies: OrderedDict[str, dict] = OrderedDict()
+_lock = threading.Lock()
+
+
+def encode(data) -> bytes:
+    """Serialize data the way FastAPI's JSONResponse does (orjson when available)."""
+    return article_json.dumps(data)
+
+
+def make_etag(*parts) -> str:
+    """A weak ETag naming the content version described by parts."""
+    return 'W/"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def _etag_for_body(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _choose_encoding(request: Request, allow_br: bool = True) -> str:
+    """Pick br, gzip or identity from Accept-Encoding (q=0 excludes a coding)."""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    if allow_br and brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return "identity"
+
+
+def _compress(variants: dict, encoding: str):
+    """The cached compressed form of variants' body for encoding."""
+    if encoding == "br":
+        return brotli.compress(variants["identity"] + variants["close"], quality=BROTLI_QUALITY)
+    # A gzip stream (wbits 31) that has consumed the body up to its last
+    # byte. Sync-flushing emits everything so far, so finishing a copy
+    # per request only compresses the tail. mtime is 0 in zlib's header,
+    # so identical bodies give identical bytes.
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(variants["identity"]) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor
+
+
+def _variants(etag: str, body: bytes | None, build, encoding: str) -> dict:
+    """The cached forms of the body for etag, building and compressing it at most once."""
+    with _lock:
+        variants = _bodies.get(etag)
+        if variants is not None:
+            _bodies.move_to_end(etag)
+            if encoding in variants:
+                return variants
+    if variants is None:
+        body = body if body is not None else build()
+        # The body without its last byte, so per-request fields can go before it.
+        variants = {"identity": body[:-1], "close": body[-1:]}
+    else:
+        variants = dict(variants)
+    if encoding != "identity":
+        variants[encoding] = _compress(variants, encoding)
+    with _lock:
+        cached = _bodies.setdefault(etag, variants)
+        if cached is not variants:
+            cached.update(variants)
+        _bodies.move_to_end(etag)
+        while len(_bodies) > CACHE_ENTRIES:
+            _bodies.popitem(last=False)
+    return variants
+
+
+def _tail(variants: dict, extra: dict | None) -> bytes:
+    """The bytes that finish the cached body, with extra's fields spliced in."""
+    if not extra:
+        return variants["close"]
+    if variants["close"] != b"}":
+        raise ValueError("extra fields need a JSON object body")
+    fields = encode(extra)[1:]
+    return fields if variants["identity"] == b"{" else b"," + fields
+
+
+def _render(variants: dict, encoding: str, extra: dict | None) -> bytes:
+    tail = _tail(variants, extra)
+    if encoding == "identity":
+        return variants["identity"] + tail
+    if encoding == "br":
+        return variants["br"]
+    head, compressor = variants["gzip"]
+    finish = compressor.copy()
+    return head + finish.compress(tail) + finish.flush()
+
+
+def _respond(request: Request, etag: str, body: bytes | None, build, extra: dict | None = None) -> Response:
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    encoding = _choose_encoding(request, allow_br=not extra)
+    variants = _variants(etag, body, build, "identity")
+    if encoding != "identity":
+        if len(variants["identity"]) < MIN_COMPRESS_BYTES:
+            encoding = "identity"
+        else:
+            variants = _variants(etag, body, build, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(_render(variants, encoding, extra), media_type=MEDIA_TYPE, headers=headers)
+
+
+def cached_response(request: Request, etag: str, build, extra: dict | None = None) -> Response:
+    """Respond with the body for etag, calling build() for its bytes only on a cache miss.
+
+    build must return the encoded JSON body for exactly that content
+    version. extra holds fields that vary per request but not per version,
+    added to the JSON object build returns.
+    """
+    return _respond(request, etag, None, build, extra)
+
+
+def json_response(request: Request, data, extra: dict | None = None) -> Response:
+    """Encode data and respond with an ETag derived from the bytes (extra is left out of it)."""
+    body = encode(data)
+    return _respond(request, _etag_for_body(body), body, None, extra)
+
+
+def clear():
+    with _lock:
+        _bodies.clear()
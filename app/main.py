@@ -1,21 +1,90 @@
 import os
+import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.routers import articles, bookmarks, feeds, settings, read
+from app import config, metrics, parse_pool, poller
+from app.routers import articles, bookmarks, events, feeds, settings, read
+
+
+@asynccontextmanager
+async def lifespan(app):
+    poller.start()
+    try:
+        yield
+    finally:
+        poller.stop()
+        parse_pool.shutdown()
+
+
+app = FastAPI(title="Teletext News", version="1.0.0", lifespan=lifespan)
+
+
+def _route_label(request: Request) -> str:
+    """The matched route's path template, so the metric label set stays bounded.
+
+    Requests no route matched (static files, 404s) share one label.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    return _route_templates.get(id(route), route.path)
+
+
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    metrics.http_request_seconds.observe(
+        time.perf_counter() - started,
+        method=request.method, route=_route_label(request), status=response.status_code,
+    )
+    return response
 
-app = FastAPI(title="Teletext News", version="1.0.0")
 
 @app.get("/health")
 def healthcheck():
-    return {"status": "ok"}
+    """Readiness: ok once the poller has published a snapshot and is still cycling.
+
+    Staleness is judged by when the poller last checked the schedule, not
+    by the snapshot's age: the scheduler may legitimately leave every feed
+    alone for an hour, and the snapshot then stays unchanged.
+
+    Without a running poller (articles are fetched per request) there is
+    nothing to wait for and the app is always ready.
+    """
+    if not poller.is_running():
+        return {"status": "ok"}
+    snapshot = poller.current_snapshot()
+    if snapshot is None:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    since_check = poller.seconds_since_check()
+    body = {"status": "ok", "snapshot_age_seconds": round(snapshot.age(), 1),
+            "snapshot_articles": len(snapshot.articles),
+            "last_check_seconds": round(since_check, 1) if since_check is not None else None}
+    if since_check is not None and since_check > config.HEALTH_MAX_CHECK_AGE_SECONDS:
+        body["status"] = "stale"
+        return JSONResponse(body, status_code=503)
+    return body
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+API_PREFIX = "/api"
+_API_ROUTERS = (articles.router, feeds.router, bookmarks.router, settings.router, read.router, events.router)
+for _router in _API_ROUTERS:
+    app.include_router(_router, prefix=API_PREFIX)
 
-app.include_router(articles.router, prefix="/api")
-app.include_router(feeds.router, prefix="/api")
-app.include_router(bookmarks.router, prefix="/api")
-app.include_router(settings.router, prefix="/api")
-app.include_router(read.router, prefix="/api")
+# The route in a request's scope may be the router's own, whose path lacks
+# the include prefix; this maps it (by identity, routes aren't hashable) to
+# the full template for metric labels.
+_route_templates = {id(route): API_PREFIX + route.path for router in _API_ROUTERS for route in router.routes}
 
 static_dir = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static"
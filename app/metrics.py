@@ -0,0 +1,214 @@
+"""
+metrics.py -- In-process counters, gauges and histograms in Prometheus text format.
+
+A deliberately small subset of the Prometheus client model: metrics are
+registered once at import time with a fixed set of label names, updated
+from any thread, and rendered by render() for GET /metrics. Gauges whose
+value is cheap to compute on demand (snapshot size and age, store row
+count) are registered as callbacks and evaluated at scrape time.
+
+The metric definitions for the whole app live at the bottom of this module
+so there is one place to see what is exported.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: list["_Metric"] = []
+_callbacks: list[tuple[str, str, object]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def remove(self, **labels):
+        """Drop every series matching the given labels, e.g. all of a removed feed's.
+
+        Labels not given match any value, so remove(feed=url) also drops
+        that feed's series for each status or parser.
+        """
+        wanted = [(self.label_names.index(n), str(v)) for n, v in labels.items()]
+        with self._lock:
+            for key in [k for k in self._values if all(k[i] == v for i, v in wanted)]:
+                del self._values[key]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            plain = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+def gauge_callback(name: str, help_text: str, fn):
+    """Register an unlabelled gauge whose value is fn(), read at scrape time."""
+    _callbacks.append((name, help_text, fn))
+
+
+def render() -> str:
+    """Every registered metric in Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for name, help_text, fn in _callbacks:
+        try:
+            value = fn()
+        except Exception:
+            continue
+        if value is None:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+def remove_feed(url: str):
+    """Drop every per-feed series for url, so removed feeds stop being exported."""
+    for metric in _registry:
+        if "feed" in metric.label_names:
+            metric.remove(feed=url)
+
+
+def clear():
+    """Reset every metric's values (callbacks stay registered)."""
+    for metric in _registry:
+        metric.clear()
+
+
+feed_fetch_seconds = Histogram(
+    "teletext_feed_fetch_seconds", "Time to fetch one feed, request to parsed articles.", ("feed",),
+)
+feed_fetch_bytes = Counter(
+    "teletext_feed_fetch_bytes_total", "Response body bytes received per feed.", ("feed",),
+)
+feed_fetch_responses = Counter(
+    "teletext_feed_fetch_responses_total",
+    "Feed fetches by outcome: HTTP status code, or error / timeout when there was none.",
+    ("feed", "status"),
+)
+feed_parse_seconds = Histogram(
+    "teletext_feed_parse_seconds", "Time to parse one feed body.", ("feed", "parser"),
+)
+feed_parse_entries = Gauge(
+    "teletext_feed_parse_entries", "Articles found in the feed's last parsed body.", ("feed",),
+)
+state_load_seconds = Histogram(
+    "teletext_state_load_seconds", "Time to load a JSON state file (cache hits included).", ("file",),
+)
+state_save_seconds = Histogram(
+    "teletext_state_save_seconds", "Time to atomically write a JSON state file.", ("file",),
+)
+http_request_seconds = Histogram(
+    "teletext_http_request_seconds", "Request latency until the response starts, per route.",
+    ("method", "route", "status"),
+)
+refresh_calls = Counter(
+    "teletext_refresh_calls_total",
+    "Snapshot requests by outcome: ran a cycle, joined one in flight, or reused a fresh snapshot.",
+    ("outcome",),
+)
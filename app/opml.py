@@ -1,26 +1,134 @@
-import xml.etree.ElementTree as ET
+import xml.parsers.expat
 from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
 
-def export_opml(feed_urls):
-    """Export feed URLs to OPML XML string."""
-    opml = ET.Element('opml', version='2.0')
-    head = ET.SubElement(opml, 'head')
-    ET.SubElement(head, 'title').text = 'Teletext News Feeds'
-    ET.SubElement(head, 'dateCreated').text = datetime.now(timezone.utc).strftime('%a, %d %b %Y %H:%M:%S %z')
-    body = ET.SubElement(opml, 'body')
-    for url in feed_urls:
-        ET.SubElement(body, 'outline', type='rss', text=url, xmlUrl=url)
-    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(opml, encoding='unicode')
+MAX_OUTLINES = 50_000
+MAX_DEPTH = 64
+
+class OpmlError(ValueError):
+    """Raised for OPML that is malformed or exceeds the parser's limits."""
+
+class OpmlStreamParser:
+    """Incremental OPML parser: feed() it chunks as they arrive, then close().
+
+    Built directly on expat so nothing but the current outline stack is kept
+    in memory. Documents with a DTD are refused outright, so entity expansion
+    attacks ("billion laughs") can't happen; OPML never needs one.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._outlines = 0
+        self._folders = []
+        self._parser = xml.parsers.expat.ParserCreate()
+        self._parser.SetParamEntityParsing(xml.parsers.expat.XML_PARAM_ENTITY_PARSING_NEVER)
+        self._parser.StartDoctypeDeclHandler = self._refuse_dtd
+        self._parser.EntityDeclHandler = self._refuse_dtd
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+
+    def _refuse_dtd(self, *args):
+        raise OpmlError("OPML documents may not contain a DTD or entity declarations")
+
+    def _start(self, tag, attrs):
+        if tag != 'outline':
+            return
+        self._outlines += 1
+        if self._outlines > MAX_OUTLINES:
+            raise OpmlError(f"OPML has more than {MAX_OUTLINES} outlines")
+        if len(self._folders) >= MAX_DEPTH:
+            raise OpmlError(f"OPML outlines are nested more than {MAX_DEPTH} deep")
+        category = next((f for f in reversed(self._folders) if f), '')
+        xml_url = attrs.get('xmlUrl') or attrs.get('xmlurl') or attrs.get('url')
+        label = (attrs.get('title') or attrs.get('text') or '').strip()
+        if xml_url:
+            own_category = (attrs.get('category') or '').split(',')[0].strip().strip('/')
+            self.entries.append({
+                'url': xml_url.strip(),
+                'title': label,
+                'html_url': (attrs.get('htmlUrl') or attrs.get('htmlurl') or '').strip(),
+                'category': own_category or category,
+            })
+            # Outlines nested under a feed inherit the enclosing folder, not the feed.
+            self._folders.append('')
+        else:
+            # Outlines without a feed URL are folders; their label is the category.
+            self._folders.append(label)
+
+    def _end(self, tag):
+        if tag == 'outline':
+            self._folders.pop()
+
+    def feed(self, data):
+        """Parse the next chunk (bytes or str). Raises OpmlError."""
+        try:
+            self._parser.Parse(data, False)
+        except xml.parsers.expat.ExpatError as e:
+            raise OpmlError(f"Invalid OPML: {e}") from None
+
+    def close(self):
+        """Finish parsing and return [{url, title, html_url, category}, ...] in document order."""
+        try:
+            self._parser.Parse(b'', True)
+        except xml.parsers.expat.ExpatError as e:
+            raise OpmlError(f"Invalid OPML: {e}") from None
+        return self.entries
+
+def parse_outlines(xml_content):
+    """Parse OPML XML string and return [{url, title, html_url, category}, ...] in document order.
+
+    category is the enclosing folder outline's title, or the outline's own
+    category attribute; empty strings where the OPML gives nothing.
+    Returns an empty list if the document can't be parsed.
+    """
+    parser = OpmlStreamParser()
+    try:
+        parser.feed(xml_content)
+        return parser.close()
+    except OpmlError:
+        return []
 
 def import_opml(xml_content):
     """Parse OPML XML string and return list of feed URL strings."""
-    urls = []
-    try:
-        root = ET.fromstring(xml_content)
-        for outline in root.iter('outline'):
-            xml_url = outline.get('xmlUrl') or outline.get('xmlurl') or outline.get('url')
-            if xml_url:
-                urls.append(xml_url.strip())
-    except ET.ParseError:
-        pass
-    return urls
+    return [entry['url'] for entry in parse_outlines(xml_content)]
+
+def _outline(url, meta, indent):
+    title = meta.get('title') or url
+    attrs = f'type="rss" text={quoteattr(title)} title={quoteattr(title)} xmlUrl={quoteattr(url)}'
+    if meta.get('html_url'):
+        attrs += f' htmlUrl={quoteattr(meta["html_url"])}'
+    if meta.get('category'):
+        attrs += f' category={quoteattr("/" + meta["category"])}'
+    return f'{indent}<outline {attrs}/>\n'
+
+def iter_export_opml(feed_urls, meta=None):
+    """Yield an OPML document for feed_urls in chunks, one outline per line.
+
+    meta maps feed URL to {title, html_url, category}; feeds with a category
+    are grouped under a folder outline of that name.
+    """
+    meta = meta or {}
+    created = datetime.now(timezone.utc).strftime('%a, %d %b %Y %H:%M:%S %z')
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<opml version="2.0">\n'
+        f'  <head>\n    <title>Teletext News Feeds</title>\n    <dateCreated>{escape(created)}</dateCreated>\n  </head>\n'
+        '  <body>\n'
+    )
+    folders = {}
+    for url in feed_urls:
+        category = meta.get(url, {}).get('category') or ''
+        if category:
+            folders.setdefault(category, []).append(url)
+        else:
+            yield _outline(url, meta.get(url, {}), '    ')
+    for category, urls in folders.items():
+        yield f'    <outline text={quoteattr(category)} title={quoteattr(category)}>\n'
+        for url in urls:
+            yield _outline(url, meta.get(url, {}), '      ')
+        yield '    </outline>\n'
+    yield '  </body>\n</opml>\n'
+
+def export_opml(feed_urls, meta=None):
+    """Export feed URLs to OPML XML string."""
+    return ''.join(iter_export_opml(feed_urls, meta))
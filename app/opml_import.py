@@ -0,0 +1,139 @@
+"""
+opml_import.py -- Bulk OPML import.
+
+An import dedupes the OPML's feeds against the subscription list in one
+pass and commits every accepted feed with a single feeds.json write, plus
+one write each for feed_meta.json (titles, site URLs, categories) and
+feed_cache.json.
+
+With validation, new feeds are first fetched concurrently (at most
+FETCH_CONCURRENCY at a time) in a background job whose progress can be
+polled. Feeds that fail to download or parse to any entries are rejected;
+the ones that pass are committed together with their pre-fetched content,
+so the next poll only needs a conditional request.
+"""
+
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import config, feed_cache, feed_health, feed_meta, feeds, fetcher, poller
+
+JOB_HISTORY = 16
+
+_jobs: dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def _new_entries(entries: list[dict]) -> tuple[list[dict], int]:
+    """Drop entries already subscribed or repeated in the OPML. Returns (new, skipped)."""
+    existing = set(feeds.list_feeds())
+    new = []
+    for entry in entries:
+        if entry["url"] not in existing:
+            existing.add(entry["url"])
+            new.append(entry)
+    return new, len(entries) - len(new)
+
+
+def _commit(entries: list[dict], fetched: dict[str, dict] | None = None) -> list[str]:
+    """Subscribe to entries in one write and store their metadata and pre-fetched content."""
+    added = feeds.add_feeds([entry["url"] for entry in entries])
+    if not added:
+        return added
+    added_set = set(added)
+    feed_meta.update_meta({
+        entry["url"]: {k: entry[k] for k in ("title", "html_url", "category")}
+        for entry in entries if entry["url"] in added_set
+    })
+    if fetched:
+        # Merged under the cache file's lock, so a fetch cycle finishing
+        # meanwhile can't overwrite the pre-fetched content.
+        feed_cache.update_entries({url: fetched[url] for url in added})
+        health_batch = feed_health.HealthBatch()
+        for url in added:
+            health_batch.record_success(url, len(fetched[url]["articles"]), fetched[url]["stats"])
+        health_batch.commit()
+    poller.request_refresh()
+    return added
+
+
+def import_entries(entries: list[dict]) -> dict:
+    """Import parsed OPML outlines without validation. Returns {imported, skipped}."""
+    new, skipped = _new_entries(entries)
+    added = _commit(new)
+    return {"imported": len(added), "skipped": skipped + len(new) - len(added)}
+
+
+def _public(job: dict) -> dict:
+    return {k: (list(v) if isinstance(v, list) else v) for k, v in job.items() if not k.startswith("_")}
+
+
+def get_job(job_id: str) -> dict | None:
+    """Return a copy of an import job's status, or None if unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return _public(job) if job is not None else None
+
+
+def _run(job: dict, entries: list[dict]):
+    fetched = {}
+    workers = max(1, min(config.FETCH_CONCURRENCY, len(entries)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="opml-validate") as executor:
+        futures = {
+            executor.submit(fetcher._fetch_single_feed, entry["url"]): entry["url"]
+            for entry in entries
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            error = future.exception()
+            if error is None:
+                fetcher._record_metrics(url, future.result())
+                if not future.result()["articles"]:
+                    error = "no entries found"
+            with _lock:
+                job["checked"] += 1
+                if error is None:
+                    fetched[url] = future.result()
+                    job["accepted"] += 1
+                else:
+                    job["rejected"].append({"url": url, "error": str(error)})
+
+    try:
+        added = _commit([entry for entry in entries if entry["url"] in fetched], fetched)
+        status, error = "done", None
+    except Exception as e:
+        added, status, error = [], "failed", str(e)
+    with _lock:
+        job.update(status=status, error=error, imported=len(added), finished_at=time.time())
+
+
+def start_validated_import(entries: list[dict]) -> dict:
+    """Start a background import that validates new feeds first. Returns the job status."""
+    new, skipped = _new_entries(entries)
+    job = {
+        "id": secrets.token_hex(8),
+        "status": "running",
+        "error": None,
+        "total": len(new),
+        "skipped": skipped,
+        "checked": 0,
+        "accepted": 0,
+        "rejected": [],
+        "imported": 0,
+        "started_at": time.time(),
+        "finished_at": None,
+    }
+    with _lock:
+        _jobs[job["id"]] = job
+        while len(_jobs) > JOB_HISTORY:
+            del _jobs[next(iter(_jobs))]
+    job["_thread"] = threading.Thread(target=_run, args=(job, new), name="opml-import", daemon=True)
+    job["_thread"].start()
+    return get_job(job["id"])
+
+
+def clear():
+    with _lock:
+        _jobs.clear()
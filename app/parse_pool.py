@@ -0,0 +1,116 @@
+"""
+parse_pool.py -- Optional worker processes for feed parsing.
+
+Parsing is CPU-bound Python, so fetch threads parsing side by side contend
+for the GIL and a refresh cycle runs on one core. With PARSE_WORKERS > 0,
+downloaded feed bodies are parsed in a pool of that many processes. Workers
+return compact article tuples rather than dicts, and the tuples are expanded
+back in the calling thread.
+
+With PARSE_WORKERS = 0 (the default), or if the pool breaks, parsing runs
+in-process as before.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_lock = threading.Lock()
+
+
+def _parse_in_worker(url: str, body: bytes, fast_parser: bool, summary_max_chars: int) -> tuple[list[tuple], dict]:
+    """Worker entry point: parse body and flatten articles to tuples.
+
+    Settings that affect the output are passed in rather than read from the
+    worker's own config, so workers always agree with the parent.
+    """
+    from app import fetcher
+
+    config.FAST_PARSER = fast_parser
+    config.SUMMARY_MAX_CHARS = summary_max_chars
+    articles, info = fetcher._parse_feed(url, body)
+    rows = [
+        (
+            a["title"], a["source"], a["date"], a["summary"], a["url"],
+            a["_sort_dt"].timestamp() if a["_sort_dt"] is not None else None,
+        )
+        for a in articles
+    ]
+    return rows, info
+
+
+def _expand(url: str, rows: list[tuple]) -> list[dict]:
+    return [
+        {
+            "title": title,
+            "source": source,
+            "source_url": url,
+            "date": date,
+            "summary": summary,
+            "url": link,
+            "_sort_dt": datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None,
+        }
+        for title, source, date, summary, link, ts in rows
+    ]
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    """Return the worker pool sized to PARSE_WORKERS, or None when disabled."""
+    global _pool, _pool_workers
+    workers = config.PARSE_WORKERS
+    with _lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None and workers > 0:
+            # spawn, not fork: the parent has HTTP client and poller threads running.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard(pool: ProcessPoolExecutor):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def parse(url: str, body: bytes) -> tuple[list[dict], dict]:
+    """Parse a feed body, in a worker process if the pool is enabled.
+
+    Same return value as fetcher._parse_feed: (articles, info).
+    """
+    from app import fetcher
+
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            rows, info = pool.submit(
+                _parse_in_worker, url, body, config.FAST_PARSER, config.SUMMARY_MAX_CHARS,
+            ).result()
+            return _expand(url, rows), info
+        except (BrokenProcessPool, CancelledError, RuntimeError):
+            # Cancelled/RuntimeError: the pool was shut down (e.g. resized) under us.
+            logger.exception("Parse worker pool unavailable; parsing %s in-process", url)
+            _discard(pool)
+    return fetcher._parse_feed(url, body)
+
+
+def shutdown():
+    """Stop the worker processes, if any."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,284 @@
+"""
+poller.py -- Background feed refresh and the in-memory article snapshot.
+
+A single daemon thread wakes whenever a feed is due according to the
+adaptive scheduler, re-fetches just the due feeds and swaps in a new
+snapshot, so /api/articles can serve the parsed, sorted list without
+touching the network. Each cycle's articles are upserted into the SQLite
+article_store and the snapshot is the newest ARTICLE_SNAPSHOT_LIMIT rows,
+so history survives restarts and syndicated duplicates collapse.
+
+When the poller is not running (disabled, or in tests where the app
+lifespan never starts) the snapshot is rebuilt on request once it is
+older than REFRESH_FRESHNESS_SECONDS. Concurrent refreshes are coalesced:
+callers arriving mid-cycle wait for that cycle's snapshot instead of
+fetching every feed again.
+"""
+
+import logging
+import threading
+import time
+
+from app import article_json, article_store, config, events, feed_health, feeds, fetcher, metrics, read_tracker, scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """An immutable, newest-first article list, when it was built and its version.
+
+    version increases by one whenever a refresh publishes a different
+    article list; a cycle that changes nothing keeps the version (and so
+    the ETag, sync token and serialized body) and only moves fetched_at.
+    """
+
+    __slots__ = ("articles", "fetched_at", "version", "_encoded")
+
+    def __init__(self, articles: list[dict], fetched_at: float, version: int = 0):
+        self.articles = articles
+        self.fetched_at = fetched_at
+        self.version = version
+        self._encoded = None
+
+    def encoded(self) -> article_json.EncodedArticles:
+        """The articles pre-serialized for responses, built on first use."""
+        if self._encoded is None:
+            self._encoded = article_json.EncodedArticles(self.articles)
+        return self._encoded
+
+    def refreshed(self, fetched_at: float) -> "Snapshot":
+        """The same articles, version and serialization, stamped with a new fetch time."""
+        snapshot = Snapshot(self.articles, fetched_at, self.version)
+        snapshot._encoded = self._encoded
+        return snapshot
+
+    def age(self) -> float:
+        """Seconds since this snapshot was fetched."""
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class _Flight:
+    """One in-progress refresh cycle that other callers can wait on."""
+
+    __slots__ = ("due", "done", "snapshot", "error")
+
+    def __init__(self, due: set[str] | None):
+        self.due = due
+        self.done = threading.Event()
+        self.snapshot: Snapshot | None = None
+        self.error: BaseException | None = None
+
+    def covers(self, due: set[str] | None) -> bool:
+        return self.due is None or (due is not None and due <= self.due)
+
+
+_snapshot: Snapshot | None = None
+_version = 0
+_flight: _Flight | None = None
+_flight_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_last_check: float | None = None
+_stop = threading.Event()
+_wake = threading.Event()
+
+
+def refresh(due: set[str] | None = None) -> Snapshot:
+    """Fetch feeds now and publish the result as the current snapshot.
+
+    If due is given only those feeds hit the network; the others are served
+    from their cached copy.
+
+    Only one cycle runs at a time. A caller arriving while a cycle that
+    covers its feeds is in flight waits for that cycle and gets its
+    snapshot (or its exception) instead of starting another; otherwise it
+    waits for the cycle to finish and then runs its own.
+    """
+    global _flight
+    while True:
+        with _flight_lock:
+            flight = _flight
+            if flight is None:
+                flight = _flight = _Flight(due)
+                break
+            joined = flight.covers(due)
+        flight.done.wait()
+        if joined:
+            metrics.refresh_calls.inc(outcome="joined")
+            if flight.error is not None:
+                raise flight.error
+            return flight.snapshot
+
+    metrics.refresh_calls.inc(outcome="ran")
+    try:
+        flight.snapshot = _refresh(due)
+        return flight.snapshot
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flight_lock:
+            _flight = None
+        flight.done.set()
+
+
+def _refresh(due: set[str] | None) -> Snapshot:
+    global _snapshot, _version
+    feed_urls = feeds.list_feeds()
+    fetched = fetcher.fetch_articles(due)
+    article_store.upsert_articles(fetched)
+    if article_store.prune(keep_sources=feed_urls):
+        # Articles aged out; let the read set drop their marks too.
+        read_tracker.compact()
+    previous = _snapshot
+    articles = article_store.recent_articles()
+    if previous is not None and articles == previous.articles:
+        # Most cycles are all 304s: keep the version so clients' ETags and
+        # sync tokens stay valid and nothing is serialized again.
+        snapshot = previous.refreshed(time.time())
+    else:
+        _version += 1
+        snapshot = Snapshot(articles, time.time(), _version)
+    # Serialize here, once, rather than in the first request to see it.
+    snapshot.encoded()
+    _snapshot = snapshot
+    _publish_changes(previous, _snapshot, feed_urls if due is None else due)
+    return _snapshot
+
+
+def _publish_changes(previous: Snapshot | None, snapshot: Snapshot, polled):
+    """Tell event-stream listeners about new articles and the polled feeds' health."""
+    if not events.has_subscribers():
+        return
+    # With no previous snapshot every article is "new"; clients load the
+    # full list on connect, so only report genuine additions.
+    if previous is not None:
+        known = {a["id"] for a in previous.articles}
+        added = [a for a in snapshot.articles if a["id"] not in known]
+        if added:
+            events.publish("articles", {"version": snapshot.version, "articles": added})
+    health = feed_health.get_health()
+    polled_health = {url: health[url] for url in polled if url in health}
+    if polled_health:
+        events.publish("health", {"health": polled_health})
+
+
+def get_snapshot() -> Snapshot:
+    """Return the current snapshot.
+
+    Fetches synchronously if the background poller is not running or has
+    not completed its first cycle yet. Without the poller, a snapshot less
+    than REFRESH_FRESHNESS_SECONDS old is reused, so back-to-back requests
+    don't each start a cycle; concurrent ones share one (see refresh()).
+    """
+    snapshot = _snapshot
+    if snapshot is not None and (is_running() or snapshot.age() < config.REFRESH_FRESHNESS_SECONDS):
+        metrics.refresh_calls.inc(outcome="fresh")
+        return snapshot
+    # With the poller running this joins its first cycle if that is in flight.
+    return refresh()
+
+
+def current_snapshot() -> Snapshot | None:
+    """The published snapshot, or None if there isn't one yet. Never fetches."""
+    return _snapshot
+
+
+def request_refresh():
+    """Wake the poller early, e.g. after the feed list changed."""
+    _wake.set()
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def seconds_since_check() -> float | None:
+    """Seconds since the poller last consulted the scheduler, or None if it hasn't.
+
+    A live poller checks at least once per poll interval even when no feed
+    is due, so this measures its liveness independently of how far apart
+    the scheduler has spaced the feeds.
+    """
+    checked = _last_check
+    return max(0.0, time.time() - checked) if checked is not None else None
+
+
+def _run(interval: float):
+    # The first cycle fetches everything; after that only feeds the
+    # scheduler says are due. interval caps how long we sleep so newly
+    # added feeds are picked up even if no wake-up is requested.
+    global _last_check
+    due = None
+    while not _stop.is_set():
+        try:
+            refresh(due)
+        except Exception:
+            logger.exception("Background feed refresh failed")
+        _last_check = time.time()
+        while not _stop.is_set():
+            _last_check = time.time()
+            urls = feeds.list_feeds()
+            delay = scheduler.seconds_until_next(urls)
+            delay = interval if delay is None else min(delay, interval)
+            requested = _wake.wait(max(delay, 1.0))
+            _wake.clear()
+            due = scheduler.due_feeds(feeds.list_feeds())
+            # An explicit request rebuilds the snapshot even if nothing is
+            # due, e.g. to drop a removed feed's articles.
+            if due or requested:
+                break
+
+
+def start(interval: float | None = None):
+    """Start the background poller thread if it is not already running.
+
+    interval is the longest the poller sleeps between scheduler checks.
+    """
+    global _thread, _last_check
+    if interval is None:
+        interval = config.POLL_INTERVAL_SECONDS
+    if interval <= 0 or is_running():
+        return
+    _stop.clear()
+    _wake.clear()
+    _last_check = None
+    _thread = threading.Thread(target=_run, args=(interval,), name="feed-poller", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 5.0):
+    """Signal the poller to exit and wait briefly for it."""
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout)
+    _thread = None
+
+
+def clear():
+    """Drop the current snapshot."""
+    global _snapshot, _last_check
+    _snapshot = None
+    _last_check = None
+
+
+def _snapshot_gauge(fn):
+    def read():
+        snapshot = current_snapshot()
+        return fn(snapshot) if snapshot is not None else None
+    return read
+
+
+metrics.gauge_callback(
+    "teletext_snapshot_articles", "Articles in the current snapshot.",
+    _snapshot_gauge(lambda s: len(s.articles)),
+)
+metrics.gauge_callback(
+    "teletext_snapshot_age_seconds", "Seconds since the current snapshot was built.",
+    _snapshot_gauge(Snapshot.age),
+)
+metrics.gauge_callback(
+    "teletext_snapshot_version", "Version number of the current snapshot.",
+    _snapshot_gauge(lambda s: s.version),
+)
@@ -1,50 +1,256 @@
+"""
+read_tracker.py -- Server-side read state, kept as a set.
+
+Read URLs live in memory as a dict of url -> time marked read, so marking
+and checking are O(1). On disk, read.json holds a compacted snapshot of
+that dict and read.log an append-only journal of marks ("+") and unmarks
+("-") since. Marking an article appends one line instead of rewriting the
+whole file; once the journal reaches READ_LOG_COMPACT_ENTRIES lines (or on
+compact()) it is folded back into read.json.
+
+Compaction also drops URLs marked read more than ARTICLE_RETENTION_DAYS ago
+whose articles are no longer in the article store, so the set doesn't grow
+forever.
+
+Other processes sharing DATA_DIR are picked up by checking read.json and
+read.log for changes on each access; all file updates run under
+storage.locked(read.json).
+"""
+
 import json
+import logging
 import os
-from app import config
+import threading
+import time
+
+from app import article_store, config, metrics, storage
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state: "_ReadState | None" = None
+
+
+class _ReadState:
+    """In-memory read set for one DATA_DIR, plus how much of the disk state it reflects."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.urls: dict[str, float] = {}
+        self.base_key = None
+        self.log_offset = 0
+        self.log_entries = 0
+        self.frozen: frozenset | None = None
+
 
 def _get_read_path():
     return os.path.join(config.DATA_DIR, "read.json")
 
-def _load_read():
-    path = _get_read_path()
+
+def _stat_key(path):
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
+        st = os.stat(path)
     except FileNotFoundError:
-        _save_read([])
-        return []
-    except (json.JSONDecodeError, IOError, OSError):
-        return []
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
 
-def _save_read(urls):
+
+def _load_base(path) -> dict[str, float]:
+    try:
+        data = storage.read_json(path)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        storage.quarantine(path)
+        return {}
+    except (IOError, OSError):
+        return {}
+    if isinstance(data, dict):
+        return {url: float(ts) for url, ts in data.items() if isinstance(ts, (int, float))}
+    if isinstance(data, list):
+        # Pre-journal format: a plain list of URLs with no timestamps.
+        now = time.time()
+        return {url: now for url in data if isinstance(url, str)}
+    return {}
+
+
+def _apply_log(state: _ReadState):
+    """Replay journal lines written since state.log_offset."""
+    try:
+        with open(state.log_path, "rb") as f:
+            f.seek(state.log_offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return
+    # Only consume complete lines; a torn final line from a crash is skipped
+    # until (unless) it is finished.
+    end = chunk.rfind(b"\n") + 1
+    for line in chunk[:end].splitlines():
+        try:
+            op, ts, url = json.loads(line)
+        except (ValueError, TypeError):
+            continue
+        if op == "+":
+            state.urls[url] = ts
+        elif op == "-":
+            state.urls.pop(url, None)
+        state.log_entries += 1
+    state.log_offset += end
+    if end:
+        state.frozen = None
+
+
+def _sync() -> _ReadState:
+    """Return the read state for the current DATA_DIR, caught up with the files.
+
+    Must be called with _lock and storage.locked(read.json) held.
+    """
+    global _state
     path = _get_read_path()
+    state = _state
+    base_key = _stat_key(path)
+    if state is None or state.path != path or state.base_key != base_key:
+        state = _ReadState(path)
+        state.urls = _load_base(path)
+        state.base_key = _stat_key(path)
+        _state = state
+    try:
+        log_size = os.path.getsize(state.log_path)
+    except FileNotFoundError:
+        log_size = 0
+    if log_size < state.log_offset:
+        # Another process compacted; start again from the new base.
+        _state = None
+        return _sync()
+    if log_size > state.log_offset:
+        _apply_log(state)
+    return state
+
+
+def _append(state: _ReadState, entries: list[tuple[str, str]], ts: float) -> bool:
+    """Append (op, url) entries to the journal in a single write."""
+    data = "".join(
+        json.dumps([op, ts, url], separators=(",", ":")) + "\n" for op, url in entries
+    ).encode("utf-8")
+    try:
+        with metrics.state_save_seconds.time(file=os.path.basename(state.log_path)):
+            _write_journal(state.log_path, data)
+    except OSError:
+        return False
+    state.log_offset += len(data)
+    state.log_entries += len(entries)
+    state.frozen = None
+    return True
+
+
+def _write_journal(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _compact(state: _ReadState) -> bool:
+    """Fold the journal into read.json and drop expired URLs. Caller holds the locks."""
+    retention = config.ARTICLE_RETENTION_DAYS
+    if retention > 0:
+        cutoff = time.time() - retention * 86400
+        expired = [url for url, ts in state.urls.items() if ts < cutoff]
+        if expired:
+            still_stored = article_store.known_urls(expired)
+            for url in expired:
+                if url not in still_stored:
+                    del state.urls[url]
+            state.frozen = None
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(urls, f, indent=2)
-        return True
+        storage.write_json(state.path, state.urls, indent=None)
+        with open(state.log_path, "w"):
+            pass
     except (IOError, OSError):
+        logger.exception("Could not compact %s", state.path)
         return False
+    state.base_key = _stat_key(state.path)
+    state.log_offset = 0
+    state.log_entries = 0
+    return True
+
+
+def _record(op: str, urls: list[str]) -> list[str] | None:
+    """Apply op to every URL whose state it changes, in one journal write.
+
+    Returns the URLs that changed, or None if the journal couldn't be written.
+    """
+    with _lock, storage.locked(_get_read_path()):
+        state = _sync()
+        changed, seen = [], set()
+        for url in urls:
+            if url not in seen and (url in state.urls) != (op == "+"):
+                changed.append(url)
+            seen.add(url)
+        if not changed:
+            return []
+        ts = round(time.time(), 3)
+        if not _append(state, [(op, url) for url in changed], ts):
+            return None
+        for url in changed:
+            if op == "+":
+                state.urls[url] = ts
+            else:
+                del state.urls[url]
+        if state.log_entries >= config.READ_LOG_COMPACT_ENTRIES:
+            _compact(state)
+        return changed
+
 
 def mark_read(url):
-    urls = _load_read()
-    if url in urls:
-        return False
-    urls.append(url)
-    return _save_read(urls)
+    return bool(_record("+", [url]))
+
 
 def mark_unread(url):
-    urls = _load_read()
-    if url not in urls:
-        return False
-    urls.remove(url)
-    return _save_read(urls)
+    return bool(_record("-", [url]))
+
+
+def mark_read_many(urls: list[str]) -> list[str] | None:
+    """Mark several URLs read at once. Returns those not already read, or None on failure."""
+    return _record("+", urls)
+
+
+def mark_unread_many(urls: list[str]) -> list[str] | None:
+    """Mark several URLs unread at once. Returns those that were read, or None on failure."""
+    return _record("-", urls)
+
+
+def compact():
+    """Fold the journal into read.json now and prune expired URLs."""
+    with _lock, storage.locked(_get_read_path()):
+        return _compact(_sync())
+
+
+def read_urls() -> frozenset:
+    """Return the current read set. Shared between callers; cheap when unchanged."""
+    with _lock, storage.locked(_get_read_path()):
+        state = _sync()
+        if state.frozen is None:
+            state.frozen = frozenset(state.urls)
+        return state.frozen
+
 
 def list_read():
-    return _load_read()
+    with _lock, storage.locked(_get_read_path()):
+        return list(_sync().urls)
+
 
 def is_read(url):
-    return url in _load_read()
+    with _lock, storage.locked(_get_read_path()):
+        return url in _sync().urls
+
+
+def clear():
+    """Forget the in-memory state; the next access reloads from disk."""
+    global _state
+    with _lock:
+        _state = None
@@ -1,16 +1,152 @@
-from fastapi import APIRouter
+from datetime import datetime, timezone
 
-from app import bookmarks, fetcher, read_tracker
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app import article_store, bookmarks, http_cache, poller, read_tracker, sync
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+ARTICLE_FIELDS = (
+    "id", "title", "source", "source_url", "date", "published", "summary", "url", "bookmarked", "read",
+)
+
+
+def _parse_fields(fields):
+    if fields is None:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in ARTICLE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Must be among: {', '.join(ARTICLE_FIELDS)}",
+        )
+    return selected
+
+
+def _annotate(articles, read_urls, bookmarked_urls, fields=None):
+    """Return copies of articles with bookmarked/read flags, keeping only fields if given.
+
+    The snapshot is shared between requests, so it is never mutated.
+    """
+    annotated = []
+    for a in articles:
+        article = {
+            **a,
+            "bookmarked": a.get("url", "") in bookmarked_urls,
+            "read": a.get("url", "") in read_urls,
+        }
+        if fields is not None:
+            article = {f: article.get(f) for f in fields}
+        annotated.append(article)
+    return annotated
+
+
+def _freshness(snapshot) -> dict:
+    return {"fetched_at": snapshot.fetched_at, "age_seconds": round(snapshot.age(), 3)}
+
 
 @router.get("/articles")
-def get_articles():
-    articles = fetcher.fetch_articles()
+def get_articles(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
+    since: datetime | None = None,
+    source: str | None = None,
+    fields: str | None = None,
+    sync_token: str | None = None,
+):
+    """Return articles newest-first.
+
+    Without query parameters this is the full in-memory snapshot. Any of
+    limit, cursor, since or source switch to a paged query against the
+    article store; pass next_cursor back as cursor for the following page.
+    fields is a comma-separated list restricting the keys of each article.
+
+    Snapshot responses include a sync_token. Passing it back as sync_token
+    returns only added/edited articles, removed ids and read/bookmark flag
+    changes since then, or the full list with reset=true if the token has
+    expired.
+    """
+    paged = limit is not None or cursor is not None or since is not None or source is not None
+    if sync_token is not None and paged:
+        raise HTTPException(status_code=422, detail="sync_token cannot be combined with paging parameters")
+    selected = _parse_fields(fields)
+    if cursor is not None:
+        try:
+            article_store.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    snapshot = poller.get_snapshot()
     bookmarked_urls = set(bookmarks.list_bookmarks())
-    read_urls = set(read_tracker.list_read())
-    for a in articles:
-        a["bookmarked"] = a.get("url", "") in bookmarked_urls
-        a["read"] = a.get("url", "") in read_urls
-    return {"articles": articles, "count": len(articles)}
+    read_urls = read_tracker.read_urls()
+
+    if not paged:
+        # The new token names the snapshot version and read/bookmark state,
+        # so together with the request it identifies the response body.
+        token = sync.issue_token(snapshot, read_urls, bookmarked_urls)
+
+        def build():
+            response = {
+                "count": len(snapshot.articles),
+                "sync_token": token,
+            }
+            delta = sync.compute_delta(sync_token, snapshot, read_urls, bookmarked_urls) if sync_token else None
+            if delta is not None:
+                delta["added"] = _annotate(delta["added"], read_urls, bookmarked_urls, selected)
+                return http_cache.encode({**response, **delta, "reset": False})
+            if sync_token is not None:
+                response["reset"] = True
+            if selected is not None:
+                response["articles"] = _annotate(snapshot.articles, read_urls, bookmarked_urls, selected)
+                return http_cache.encode(response)
+            # Splice the pre-serialized snapshot in rather than encoding every article again.
+            head = http_cache.encode(response)[:-1]
+            articles = snapshot.encoded().body(read_urls, bookmarked_urls)
+            return head + b',"articles":' + articles + b"}"
+
+        # fetched_at and age_seconds move with every refresh cycle while the
+        # body doesn't, so they are added per request rather than cached.
+        return http_cache.cached_response(
+            request, http_cache.make_etag(token, sync_token, selected), build, extra=_freshness(snapshot),
+        )
+
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    page, next_cursor = article_store.query_articles(
+        limit or DEFAULT_PAGE_SIZE,
+        cursor=cursor,
+        since=since.timestamp() if since is not None else None,
+        source_url=source,
+    )
+    articles = _annotate(page, read_urls, bookmarked_urls, selected)
+    return http_cache.json_response(request, {
+        "articles": articles,
+        "count": len(articles),
+        "next_cursor": next_cursor,
+    }, extra=_freshness(snapshot))
+
+
+@router.get("/search")
+def search_articles(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    source: str | None = None,
+    fields: str | None = None,
+):
+    """Full-text search over the stored article history.
+
+    Every word in q must match (as a prefix) the title or summary. Results
+    are ranked by relevance; page through them with limit and offset.
+    """
+    selected = _parse_fields(fields)
+    page, total = article_store.search_articles(q, limit, offset, source_url=source)
+    articles = _annotate(
+        page, read_tracker.read_urls(), set(bookmarks.list_bookmarks()), selected,
+    )
+    return http_cache.json_response(
+        request, {"articles": articles, "count": len(articles), "total": total, "offset": offset},
+    )
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from app import bookmarks
+from app import bookmarks, http_cache
+from app.routers.read import batch_results, resolve_batch_urls
 
 router = APIRouter()
 
@@ -10,9 +14,16 @@ class BookmarkRequest(BaseModel):
     url: str
 
 
+class BookmarkBatchRequest(BaseModel):
+    action: Literal["add", "remove"]
+    urls: list[str] | None = None
+    source_url: str | None = None
+    older_than: datetime | None = None
+
+
 @router.get("/bookmarks")
-def get_bookmarks():
-    return {"bookmarks": bookmarks.list_bookmarks()}
+def get_bookmarks(request: Request):
+    return http_cache.json_response(request, {"bookmarks": bookmarks.list_bookmarks()})
 
 
 @router.post("/bookmarks")
@@ -29,3 +40,20 @@ def remove_bookmark(req: BookmarkRequest):
     if not removed:
         raise HTTPException(status_code=404, detail="Bookmark not found")
     return {"ok": True}
+
+
+@router.post("/bookmarks/batch")
+def bookmark_batch(req: BookmarkBatchRequest):
+    """Add or remove many bookmarks in one write.
+
+    Targets either an explicit list of urls or every stored article matching
+    source_url and/or older_than (published before that time).
+    """
+    urls = resolve_batch_urls(req.urls, req.source_url, req.older_than)
+    if req.action == "add":
+        changed = bookmarks.add_bookmarks(urls)
+    else:
+        changed = bookmarks.remove_bookmarks(urls)
+    if changed is None:
+        raise HTTPException(status_code=500, detail="Could not save bookmarks")
+    return batch_results(urls, changed)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app import events
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+
+
+@router.get("/events")
+async def stream_events(request: Request):
+    """Server-Sent Events stream of "articles" and "health" events.
+
+    A comment line is sent every HEARTBEAT_SECONDS so proxies keep the
+    connection open and disconnected clients are noticed.
+    """
+    subscription = events.subscribe()
+
+    async def stream():
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            while not await request.is_disconnected():
+                item = await subscription.get(HEARTBEAT_SECONDS)
+                if item is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield events.format_event(*item)
+        finally:
+            events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app import feeds, discovery, opml, feed_health
+from app import config, feeds, discovery, http_cache, metrics, opml, opml_import, feed_health, feed_meta, poller, scheduler
 
 router = APIRouter()
 
@@ -14,11 +16,12 @@ class DiscoverRequest(BaseModel):
 
 class OpmlImportRequest(BaseModel):
     content: str
+    validate_feeds: bool = False
 
 
 @router.get("/feeds")
-def get_feeds():
-    return {"feeds": feeds.list_feeds()}
+def get_feeds(request: Request):
+    return http_cache.json_response(request, {"feeds": feeds.list_feeds(), "meta": feed_meta.get_meta()})
 
 
 @router.post("/feeds")
@@ -26,6 +29,7 @@ def add_feed(req: FeedRequest):
     added = feeds.add_feed(req.url)
     if not added:
         raise HTTPException(status_code=409, detail="Feed already exists")
+    poller.request_refresh()
     return {"ok": True}
 
 
@@ -34,31 +38,94 @@ def remove_feed(req: FeedRequest):
     removed = feeds.remove_feed(req.url)
     if not removed:
         raise HTTPException(status_code=404, detail="Feed not found")
+    scheduler.forget(req.url)
+    feed_meta.remove_meta(req.url)
+    metrics.remove_feed(req.url)
+    poller.request_refresh()
     return {"ok": True}
 
 
 @router.post("/feeds/discover")
-def discover_feeds_endpoint(req: DiscoverRequest):
-    found = discovery.discover_feeds(req.url)
+async def discover_feeds_endpoint(req: DiscoverRequest):
+    found = await discovery.discover_feeds(req.url)
     return {"feeds": found}
 
 
 @router.get("/feeds/health")
-def get_feed_health():
-    return {"health": feed_health.get_health()}
+def get_feed_health(request: Request):
+    return http_cache.json_response(
+        request, {"health": feed_health.get_health(), "schedule": scheduler.get_schedule()},
+    )
+
+
+def _import_outlines(entries, validate_feeds):
+    if validate_feeds:
+        return JSONResponse(status_code=202, content=opml_import.start_validated_import(entries))
+    result = opml_import.import_entries(entries)
+    return {**result, "feeds": feeds.list_feeds()}
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"OPML larger than {config.OPML_MAX_BYTES} bytes")
 
 
 @router.post("/feeds/opml/import")
 def import_opml_endpoint(req: OpmlImportRequest):
-    urls = opml.import_opml(req.content)
-    imported = 0
-    for url in urls:
-        if feeds.add_feed(url):
-            imported += 1
-    return {"imported": imported, "feeds": feeds.list_feeds()}
+    """Subscribe to every new feed in an OPML document, keeping titles and categories.
+
+    With validate_feeds the new feeds are fetched first and only live ones
+    are added; that runs in the background and returns 202 with a job whose
+    progress is at /feeds/opml/import/{job_id}.
+    """
+    if len(req.content) > config.OPML_MAX_BYTES:
+        raise _too_large()
+    return _import_outlines(opml.parse_outlines(req.content), req.validate_feeds)
+
+
+@router.post("/feeds/opml")
+async def upload_opml_endpoint(request: Request, validate_feeds: bool = False):
+    """Import an OPML file sent as the raw request body, parsed as it streams in.
+
+    Same result as /feeds/opml/import, but the document is never held in
+    memory whole. Returns 413 past OPML_MAX_BYTES and 422 for malformed
+    OPML or a document with a DTD.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > config.OPML_MAX_BYTES:
+        raise _too_large()
+    parser = opml.OpmlStreamParser()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > config.OPML_MAX_BYTES:
+                raise _too_large()
+            parser.feed(chunk)
+        entries = parser.close()
+    except opml.OpmlError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return await run_in_threadpool(_import_outlines, entries, validate_feeds)
+
+
+@router.get("/feeds/opml/import/{job_id}")
+def import_opml_status(job_id: str):
+    job = opml_import.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
 
 
 @router.get("/feeds/opml/export")
 def export_opml_endpoint():
-    xml_content = opml.export_opml(feeds.list_feeds())
+    xml_content = opml.export_opml(feeds.list_feeds(), feed_meta.get_meta())
     return {"opml": xml_content}
+
+
+@router.get("/feeds/opml")
+def download_opml_endpoint():
+    """Stream the subscription list as an OPML file, with titles, site URLs and categories."""
+    return StreamingResponse(
+        opml.iter_export_opml(feeds.list_feeds(), feed_meta.get_meta()),
+        media_type="application/xml",
+        headers={"Content-Disposition": 'attachment; filename="teletext-feeds.opml"'},
+    )
@@ -1,16 +1,49 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from app import read_tracker
+from app import article_store, http_cache, read_tracker
 
 router = APIRouter()
 
+MAX_BATCH_URLS = 5000
+
 class ReadRequest(BaseModel):
     url: str
 
+class ReadBatchRequest(BaseModel):
+    action: Literal["read", "unread"]
+    urls: list[str] | None = None
+    source_url: str | None = None
+    older_than: datetime | None = None
+
+def resolve_batch_urls(urls, source_url, older_than):
+    """Return the URLs a batch request targets: urls as given, or stored articles matching the filter."""
+    has_filter = source_url is not None or older_than is not None
+    if (urls is None) == (not has_filter):
+        raise HTTPException(status_code=422, detail="Give either urls or a filter (source_url and/or older_than), not both")
+    if urls is not None:
+        if len(urls) > MAX_BATCH_URLS:
+            raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_URLS} urls per batch")
+        return urls
+    if older_than is not None and older_than.tzinfo is None:
+        older_than = older_than.replace(tzinfo=timezone.utc)
+    return article_store.find_urls(
+        source_url=source_url,
+        before=older_than.timestamp() if older_than is not None else None,
+    )
+
+def batch_results(urls, changed):
+    """Per-URL outcome of a batch, in request order, with repeats reported once."""
+    changed = set(changed)
+    results = [{"url": url, "changed": url in changed} for url in dict.fromkeys(urls)]
+    return {"changed": len(changed), "unchanged": len(results) - len(changed), "results": results}
+
 @router.get("/read")
-def get_read():
-    return {"read": read_tracker.list_read()}
+def get_read(request: Request):
+    return http_cache.json_response(request, {"read": read_tracker.list_read()})
 
 @router.post("/read")
 def mark_read(req: ReadRequest):
@@ -25,3 +58,19 @@ def mark_unread(req: ReadRequest):
     if not unmarked:
         raise HTTPException(status_code=404, detail="Not in read list")
     return {"ok": True}
+
+@router.post("/read/batch")
+def mark_read_batch(req: ReadBatchRequest):
+    """Mark many articles read or unread in one write.
+
+    Targets either an explicit list of urls or every stored article matching
+    source_url and/or older_than (published before that time).
+    """
+    urls = resolve_batch_urls(req.urls, req.source_url, req.older_than)
+    if req.action == "read":
+        changed = read_tracker.mark_read_many(urls)
+    else:
+        changed = read_tracker.mark_unread_many(urls)
+    if changed is None:
+        raise HTTPException(status_code=500, detail="Could not save read state")
+    return batch_results(urls, changed)
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from app import settings
+from app import http_cache, settings
 
 router = APIRouter()
 
@@ -15,8 +15,8 @@ class SettingsUpdate(BaseModel):
 
 
 @router.get("/settings")
-def get_settings():
-    return settings.get_settings()
+def get_settings(request: Request):
+    return http_cache.json_response(request, settings.get_settings())
 
 
 @router.put("/settings")
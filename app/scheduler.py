@@ -0,0 +1,144 @@
+"""
+scheduler.py -- Adaptive per-feed polling intervals.
+
+Each feed's next poll is worked out from three signals:
+
+* publish cadence: half the median gap between its recent entries, so a
+  feed posting hourly is checked every ~30 minutes;
+* publisher hints: Cache-Control max-age / Expires and RSS <ttl> act as a
+  floor, so we never poll faster than the publisher asked;
+* health: consecutive errors back off exponentially from the base interval.
+
+Intervals are clamped to [POLL_MIN_SECONDS, POLL_MAX_SECONDS] and jittered
+by a stable per-feed amount so feeds added together drift apart.
+"""
+
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from statistics import median
+
+from app import config
+
+MAX_BACKOFF_EXPONENT = 10
+CADENCE_SAMPLE = 20
+JITTER_FRACTION = 0.1
+
+_schedule: dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def _base_interval() -> float:
+    return config.POLL_INTERVAL_SECONDS or 300
+
+
+def _median_gap(articles: list[dict]) -> float | None:
+    """Median seconds between consecutive entries, newest CADENCE_SAMPLE only."""
+    stamps = []
+    for article in articles:
+        dt = article.get("_sort_dt")
+        if dt is None:
+            continue
+        try:
+            stamps.append(dt.timestamp())
+        except (OverflowError, OSError, ValueError):
+            continue
+    stamps = sorted(stamps, reverse=True)[:CADENCE_SAMPLE]
+    gaps = [a - b for a, b in zip(stamps, stamps[1:]) if a > b]
+    if not gaps:
+        return None
+    return median(gaps)
+
+
+def _jitter(url: str) -> float:
+    """A stable multiplier in [1 - JITTER_FRACTION, 1 + JITTER_FRACTION]."""
+    unit = (zlib.crc32(url.encode("utf-8")) % 1000) / 999
+    return 1 + JITTER_FRACTION * (2 * unit - 1)
+
+
+def compute_interval(url: str, articles: list[dict], ttl_seconds: float | None = None,
+                     error_count: int = 0) -> tuple[float, str]:
+    """Return (seconds until next poll, reason) for one feed."""
+    base = _base_interval()
+    if error_count > 0:
+        interval = base * 2 ** min(error_count, MAX_BACKOFF_EXPONENT)
+        reason = "backoff"
+    else:
+        gap = _median_gap(articles)
+        if gap is not None:
+            interval = gap / 2
+            reason = "cadence"
+        else:
+            interval = base
+            reason = "default"
+        if ttl_seconds and ttl_seconds > interval:
+            interval = ttl_seconds
+            reason = "ttl"
+    interval *= _jitter(url)
+    interval = min(max(interval, config.POLL_MIN_SECONDS), config.POLL_MAX_SECONDS)
+    return interval, reason
+
+
+def record_poll(url: str, articles: list[dict], ttl_seconds: float | None = None,
+                error_count: int = 0, now: float | None = None):
+    """Schedule the next poll of url after a fetch attempt."""
+    now = time.time() if now is None else now
+    interval, reason = compute_interval(url, articles, ttl_seconds, error_count)
+    with _lock:
+        _schedule[url] = {
+            "interval": interval,
+            "next_poll": now + interval,
+            "last_poll": now,
+            "reason": reason,
+        }
+
+
+def due_feeds(urls: list[str], now: float | None = None) -> set[str]:
+    """Return the subset of urls whose next poll time has passed.
+
+    Feeds that have never been polled are always due.
+    """
+    now = time.time() if now is None else now
+    with _lock:
+        return {url for url in urls if url not in _schedule or _schedule[url]["next_poll"] <= now}
+
+
+def seconds_until_next(urls: list[str], now: float | None = None) -> float | None:
+    """Seconds until the earliest scheduled poll among urls, or None if none are scheduled."""
+    now = time.time() if now is None else now
+    with _lock:
+        times = [_schedule[url]["next_poll"] for url in urls if url in _schedule]
+    if len(times) < len(urls):
+        return 0.0
+    if not times:
+        return None
+    return max(0.0, min(times) - now)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def get_schedule() -> dict:
+    """Return {url: {interval_seconds, next_poll, last_poll, reason}} for display."""
+    with _lock:
+        return {
+            url: {
+                "interval_seconds": round(entry["interval"]),
+                "next_poll": _iso(entry["next_poll"]),
+                "last_poll": _iso(entry["last_poll"]),
+                "reason": entry["reason"],
+            }
+            for url, entry in _schedule.items()
+        }
+
+
+def forget(url: str):
+    with _lock:
+        _schedule.pop(url, None)
+
+
+def clear():
+    with _lock:
+        _schedule.clear()
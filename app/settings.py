@@ -2,7 +2,7 @@ import json
 import os
 import re
 
-from app import config
+from app import config, storage
 
 VALID_THEMES = ["dark", "light", "system", "amber", "green", "blue", "white"]
 VALID_FONTS = ["default", "vt323", "ibm-plex", "fira-code", "space-mono", "jetbrains", "press-start", "share-tech"]
@@ -19,15 +19,17 @@ def _load_settings():
     """Load settings from settings.json. If the file doesn't exist, save and return defaults."""
     path = _get_settings_path()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                return data
-            return config.DEFAULT_SETTINGS.copy()
+        data = storage.read_json(path)
+        if isinstance(data, dict):
+            return data
+        return config.DEFAULT_SETTINGS.copy()
     except FileNotFoundError:
         _save_settings(config.DEFAULT_SETTINGS.copy())
         return config.DEFAULT_SETTINGS.copy()
-    except (json.JSONDecodeError, IOError, OSError):
+    except json.JSONDecodeError:
+        storage.quarantine(path)
+        return config.DEFAULT_SETTINGS.copy()
+    except (IOError, OSError):
         return config.DEFAULT_SETTINGS.copy()
 
 
@@ -35,9 +37,7 @@ def _save_settings(settings):
     """Save settings dict to settings.json."""
     path = _get_settings_path()
     try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(settings, f, indent=2)
+        storage.write_json(path, settings)
         return True
     except (IOError, OSError):
         return False
@@ -53,6 +53,11 @@ def update_settings(updates: dict) -> dict:
 
     Raises ValueError with a descriptive message for invalid values.
     """
+    with storage.locked(_get_settings_path()):
+        return _update_settings_locked(updates)
+
+
+def _update_settings_locked(updates: dict) -> dict:
     current = _load_settings()
 
     if "theme" in updates:
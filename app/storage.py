@@ -0,0 +1,185 @@
+"""
+storage.py -- Shared access to the JSON state files in DATA_DIR.
+
+Parsed file contents are cached in memory keyed by path and reused until
+the file's inode, mtime or size changes, so hot paths like /api/articles don't
+re-read and re-parse feeds.json, bookmarks.json and read.json on every
+call. Writes are atomic (temp file + rename) and refresh the cache
+directly; edits by anything else (another worker, a text editor) are
+picked up by the stat check on the next read.
+
+Callers always get their own copy of the data and may mutate it freely.
+
+Read-modify-write sequences must run inside locked(path), which holds a
+per-path in-process lock plus an exclusive flock on a sidecar .lock file,
+so concurrent requests and multiple uvicorn workers don't lose updates.
+A file that fails to parse is moved aside by quarantine() rather than
+being silently overwritten by the next save.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+_cache: dict[str, tuple[tuple[int, int, int], object]] = {}
+_lock = threading.Lock()
+_path_locks: dict[str, threading.RLock] = {}
+_lock_depth: dict[str, int] = {}
+_lock_files: dict[str, object] = {}
+
+
+def _path_lock(path) -> threading.RLock:
+    with _lock:
+        lock = _path_locks.get(path)
+        if lock is None:
+            lock = _path_locks[path] = threading.RLock()
+        return lock
+
+
+@contextmanager
+def locked(path):
+    """Hold path's in-process and cross-process locks for a read-modify-write.
+
+    Re-entrant within a thread; the file lock is taken only by the
+    outermost holder.
+    """
+    with _path_lock(path):
+        depth = _lock_depth.get(path, 0)
+        if depth == 0 and fcntl is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lock_file = open(path + ".lock", "a")
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                lock_file.close()
+                raise
+            _lock_files[path] = lock_file
+        _lock_depth[path] = depth + 1
+        try:
+            yield
+        finally:
+            _lock_depth[path] -= 1
+            if _lock_depth[path] == 0:
+                del _lock_depth[path]
+                lock_file = _lock_files.pop(path, None)
+                if lock_file is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    lock_file.close()
+
+
+def _copy(value):
+    """Copy a JSON-shaped value; strings and numbers are immutable and shared."""
+    if isinstance(value, list):
+        return [v if isinstance(v, str) else _copy(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+def _stat_key(stat_result) -> tuple[int, int, int]:
+    # The inode changes on every atomic replace, so a same-size write within
+    # the filesystem's mtime granularity is still noticed.
+    return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+def read_json(path):
+    """Return the parsed JSON in path, served from cache while the file is unchanged.
+
+    Raises FileNotFoundError, OSError or json.JSONDecodeError just as
+    opening and json.load-ing the file would.
+    """
+    with metrics.state_load_seconds.time(file=os.path.basename(path)):
+        key = _stat_key(os.stat(path))
+        with _lock:
+            cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            return _copy(cached[1])
+
+        with open(path, "r", encoding="utf-8") as f:
+            # Key the cache on the handle we actually read, not the earlier stat.
+            key = _stat_key(os.fstat(f.fileno()))
+            data = json.load(f)
+        with _lock:
+            _cache[path] = (key, data)
+        return _copy(data)
+
+
+def write_json(path, data, indent=2):
+    """Atomically replace path with data serialized as JSON, and cache it.
+
+    The JSON is written to a temporary file in the same directory, fsynced
+    and renamed over path, so readers see either the old or the new
+    content and never a half-written file.
+    Raises OSError (including IOError) if the file can't be written.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with locked(path), metrics.state_save_seconds.time(file=os.path.basename(path)):
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            os.fchmod(fd, mode)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=indent)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        key = _stat_key(os.stat(path))
+        with _lock:
+            _cache[path] = (key, _copy(data))
+
+
+def quarantine(path):
+    """Move an unparseable state file aside so the next save can't destroy it.
+
+    The file is renamed to <name>.corrupt-<unix time> and an error logged.
+    Nothing happens if, by the time the lock is held, the file parses (a
+    concurrent writer replaced it) or is gone.
+    """
+    target = f"{path}.corrupt-{int(time.time())}"
+    with locked(path):
+        try:
+            read_json(path)
+            return
+        except FileNotFoundError:
+            return
+        except (ValueError, OSError):
+            pass
+        try:
+            os.replace(path, target)
+        except OSError:
+            logger.exception("Could not move corrupt state file %s aside", path)
+            return
+        invalidate(path)
+    logger.error("State file %s was corrupt; moved it to %s and started fresh", path, target)
+
+
+def invalidate(path=None):
+    """Forget the cached content of path, or of every file if path is None."""
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(path, None)
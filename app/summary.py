@@ -0,0 +1,102 @@
+"""
+summary.py -- Turn an entry's HTML summary into short plain text.
+
+extract() walks the markup once with a single compiled pattern: tags and
+comments are dropped, <script>/<style> bodies are skipped whole, entities
+are unescaped only in text runs that contain them, and scanning stops as
+soon as the character budget is filled, so a multi-KB article body costs
+about as much as its first paragraph.
+
+Feeds mostly re-serve the same entries, so summary_for() memoizes results
+by entry id and content hash across refreshes.
+"""
+
+import html
+import re
+import threading
+from collections import OrderedDict
+
+from app import config
+
+CACHE_SIZE = 20_000
+ELLIPSIS = "…"
+
+# One alternation, tried left to right at each position: skipped elements,
+# comments, any other tag, a run of text up to the next "<", or a "<" that
+# doesn't start a tag (kept as text).
+_TOKEN_RE = re.compile(
+    r"<(script|style)\b[^>]*>.*?(?:</\1\s*>|\Z)"
+    r"|<!--.*?(?:-->|\Z)"
+    r"|<[^>]+>"
+    r"|[^<]+"
+    r"|<",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_BLOCK_TAG_RE = re.compile(r"</?(?:p|br|div|li|ul|ol|h[1-6]|tr|td|th|blockquote|hr)\b", re.IGNORECASE)
+
+_cache: OrderedDict[tuple, str] = OrderedDict()
+_lock = threading.Lock()
+
+
+def extract(text: str, max_chars: int | None = None) -> str:
+    """Return the visible text of an HTML fragment, whitespace collapsed.
+
+    Stops after max_chars characters (config.SUMMARY_MAX_CHARS by default;
+    0 means no limit) and cuts back to a word boundary with an ellipsis.
+    """
+    if not text:
+        return ""
+    if max_chars is None:
+        max_chars = config.SUMMARY_MAX_CHARS
+    parts = []
+    length = 0
+    # Collapsing whitespace can shrink the text, so read a little past the
+    # budget before deciding we have enough.
+    target = max_chars + max_chars // 4 + 16 if max_chars > 0 else 0
+    truncated = False
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        if token[0] == "<" and len(token) > 1:
+            # Block-level tags separate words ("<p>a</p><p>b</p>" reads "a b").
+            if _BLOCK_TAG_RE.match(token):
+                parts.append(" ")
+            continue
+        if "&" in token:
+            token = html.unescape(token)
+        parts.append(token)
+        length += len(token)
+        if target and length >= target:
+            truncated = match.end() < len(text)
+            break
+    cleaned = " ".join("".join(parts).split())
+    if max_chars > 0 and (len(cleaned) > max_chars or truncated):
+        if len(cleaned) > max_chars:
+            cut = cleaned[:max_chars]
+            space = cut.rfind(" ")
+            cleaned = cut[:space] if space > max_chars // 2 else cut
+        cleaned = cleaned.rstrip(" ,.;:") + ELLIPSIS
+    return cleaned
+
+
+def summary_for(entry_id: str, text: str) -> str:
+    """extract(text), memoized by entry id and a hash of the content."""
+    if not text:
+        return ""
+    key = (entry_id, hash(text), config.SUMMARY_MAX_CHARS)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    result = extract(text)
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear():
+    with _lock:
+        _cache.clear()
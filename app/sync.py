@@ -0,0 +1,116 @@
+"""
+sync.py -- Delta sync tokens for /api/articles.
+
+Every article response carries a sync_token naming the snapshot version the
+client saw and the read/bookmark flags it was given. Sending the token back
+returns only what changed since then: articles added or edited, ids that
+left the snapshot, and articles whose read/bookmarked flags flipped.
+
+Only per-article content hashes and flag sets are remembered, for the last
+SYNC_HISTORY tokens. Tokens from before a restart, or too old to be
+remembered, get a full response with reset set instead.
+"""
+
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+SYNC_HISTORY = 32
+
+# Distinguishes tokens issued by this process from those of a previous run,
+# whose snapshot versions would otherwise collide.
+_EPOCH = secrets.token_hex(4)
+
+_versions: OrderedDict[int, dict[int, int]] = OrderedDict()
+_states: OrderedDict[str, tuple[frozenset, frozenset]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _content_hash(article: dict) -> int:
+    return hash((
+        article.get("title"), article.get("summary"), article.get("published"),
+        article.get("date"), article.get("url"), article.get("source"),
+    ))
+
+
+def _remember(memo: OrderedDict, key, build):
+    """Fetch key from a bounded LRU memo, building and inserting it if missing."""
+    with _lock:
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+    value = build()
+    with _lock:
+        memo[key] = value
+        memo.move_to_end(key)
+        while len(memo) > SYNC_HISTORY:
+            memo.popitem(last=False)
+    return value
+
+
+def _flag_sets(snapshot, read_urls: set, bookmarked_urls: set) -> tuple[frozenset, frozenset]:
+    encoded = snapshot.encoded()
+    return encoded.ids_for(read_urls), encoded.ids_for(bookmarked_urls)
+
+
+def issue_token(snapshot, read_urls: set, bookmarked_urls: set) -> str:
+    """Return the sync token describing snapshot with the given read/bookmark state."""
+    _remember(_versions, snapshot.version,
+              lambda: {a["id"]: _content_hash(a) for a in snapshot.articles})
+    read_ids, bookmarked_ids = _flag_sets(snapshot, read_urls, bookmarked_urls)
+    digest = hashlib.sha1(
+        repr((sorted(read_ids), sorted(bookmarked_ids))).encode("ascii")
+    ).hexdigest()[:16]
+    _remember(_states, digest, lambda: (read_ids, bookmarked_ids))
+    return f"{_EPOCH}.{snapshot.version}.{digest}"
+
+
+def _parse_token(token: str) -> tuple[int, str] | None:
+    try:
+        epoch, version, digest = token.split(".")
+        return (int(version), digest) if epoch == _EPOCH else None
+    except ValueError:
+        return None
+
+
+def compute_delta(token: str, snapshot, read_urls: set, bookmarked_urls: set) -> dict | None:
+    """Return what changed in snapshot since token, or None if token is unknown.
+
+    The result has keys added (article dicts, without flags), removed
+    (article ids) and state ({id, read, bookmarked} for articles whose flags
+    changed and that are not already in added).
+    """
+    parsed = _parse_token(token)
+    if parsed is None:
+        return None
+    version, digest = parsed
+    with _lock:
+        old_hashes = _versions.get(version)
+        old_state = _states.get(digest)
+    if old_hashes is None or old_state is None:
+        return None
+
+    old_read, old_bookmarked = old_state
+    read_ids, bookmarked_ids = _flag_sets(snapshot, read_urls, bookmarked_urls)
+    added, state, current_ids = [], [], set()
+    for article in snapshot.articles:
+        article_id = article["id"]
+        current_ids.add(article_id)
+        if old_hashes.get(article_id) != _content_hash(article):
+            added.append(article)
+        elif (article_id in read_ids) != (article_id in old_read) or \
+                (article_id in bookmarked_ids) != (article_id in old_bookmarked):
+            state.append({
+                "id": article_id,
+                "read": article_id in read_ids,
+                "bookmarked": article_id in bookmarked_ids,
+            })
+    removed = [article_id for article_id in old_hashes if article_id not in current_ids]
+    return {"added": added, "removed": removed, "state": state}
+
+
+def clear():
+    with _lock:
+        _versions.clear()
+        _states.clear()
@@ -0,0 +1,99 @@
+"""
+bench_articles.py -- /api/articles body building: per-request encoding vs the pre-serialized snapshot.
+
+For snapshots of several sizes (synthetic articles shaped like
+article_store rows), with a fraction of them read or bookmarked, times
+building the full-list body the way the router used to (copy each article
+with its flags, jsonable_encoder, stdlib json, as FastAPI's JSONResponse
+does) against EncodedArticles.body, which splices flags into bytes
+serialized once per snapshot. Also reports the one-off cost of building
+EncodedArticles, which the poller pays once per refresh.
+
+    python -m benchmarks.bench_articles [--sizes 500,2000,8000] [--flagged 0.05] [--repeat N] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app import article_json
+from app.routers.articles import _annotate
+
+
+def make_articles(count: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "title": f"Officials confirm plan for district {i} after a lengthy review",
+            "source": f"Feed {i % 40}",
+            "source_url": f"https://feed{i % 40}.example.test/rss",
+            "date": "Sat, 17 Oct 2026 12:00",
+            "published": "2026-10-17T12:00:00+00:00",
+            "summary": "Officials said the measure would take effect next month, although critics "
+                       "warned of delays and rising costs for the councils involved. " * 3,
+            "url": f"https://feed{i % 40}.example.test/story/{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_body(articles, read_urls, bookmarked_urls) -> bytes:
+    """The router before pre-serialization, plus FastAPI's default JSON rendering."""
+    content = jsonable_encoder({"articles": _annotate(articles, read_urls, bookmarked_urls)})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(sizes: list[int], flagged: float, repeat: int = 10) -> dict:
+    results = {"encoder": "orjson" if article_json.orjson is not None else "json", "flagged": flagged, "sizes": {}}
+    for size in sizes:
+        articles = make_articles(size)
+        step = max(1, round(1 / flagged)) if flagged > 0 else size + 1
+        read_urls = frozenset(a["url"] for a in articles[::step])
+        bookmarked_urls = {a["url"] for a in articles[1::step * 4]}
+        built = _best(lambda: article_json.EncodedArticles(articles), repeat)
+        encoded = article_json.EncodedArticles(articles)
+        legacy = _best(lambda: legacy_body(articles, read_urls, bookmarked_urls), repeat)
+        spliced = _best(lambda: encoded.body(read_urls, bookmarked_urls), repeat)
+        results["sizes"][size] = {
+            "bytes": len(encoded.body(read_urls, bookmarked_urls)),
+            "legacy_ms": round(legacy * 1000, 3),
+            "spliced_ms": round(spliced * 1000, 3),
+            "speedup": round(legacy / spliced, 1),
+            "build_once_ms": round(built * 1000, 3),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default="500,2000,8000", help="comma-separated snapshot sizes")
+    parser.add_argument("--flagged", type=float, default=0.05, help="fraction of articles marked read")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args(argv)
+    results = run([int(s) for s in args.sizes.split(",")], args.flagged, args.repeat)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    print(f"encoder {results['encoder']}, {args.flagged:.0%} of articles read, best of {args.repeat}")
+    for size, r in results["sizes"].items():
+        print(f"\n{size:,} articles, {r['bytes']:,} bytes")
+        print(f"  per request: legacy {r['legacy_ms']:>9.3f} ms   spliced {r['spliced_ms']:>8.3f} ms   x{r['speedup']}")
+        print(f"  once per refresh: EncodedArticles {r['build_once_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+bench_parser.py -- Feed parsing: feedparser vs the fastparse fast path.
+
+Parses each sample feed in benchmarks/fixtures (plus a large feed made by
+repeating the full-text sample's items) with fetcher._parse_feed, once with
+FAST_PARSER off and once on, and reports time per parse and peak memory
+allocated during a parse.
+
+With --pool N, also parses N feeds (cycling through the samples) from
+FETCH_CONCURRENCY threads, in-process and then through parse_pool with
+one worker per core, and reports the wall time of each.
+
+    python -m benchmarks.bench_parser [--repeat N] [--pool N] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from app import config, fetcher, parse_pool, summary
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LARGE_FEED_COPIES = 10
+
+
+def load_samples() -> dict[str, bytes]:
+    samples = {}
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.endswith(".xml"):
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                samples[name] = f.read()
+    full_text = samples.get("full_text_rss.xml")
+    if full_text:
+        head, _, rest = full_text.partition(b"<item>")
+        items, _, tail = ("<item>" + rest.decode("utf-8")).rpartition("</item>")
+        items += "</item>"
+        copies = []
+        for copy in range(LARGE_FEED_COPIES):
+            # Distinct links and guids so nothing is deduplicated or memoized.
+            copies.append(re.sub(r"(</?(?:link|guid)[^>]*>[^<]*?)(</)", rf"\g<1>-{copy}\2", items))
+        samples[f"full_text_rss.xml x{LARGE_FEED_COPIES}"] = head + "".join(copies).encode("utf-8") + tail.encode("utf-8")
+    return samples
+
+
+def _measure(body: bytes, repeat: int) -> tuple[float, int, str]:
+    """Best-of-repeat seconds per parse, peak traced bytes and the parser used."""
+    best = float("inf")
+    for _ in range(repeat):
+        summary.clear()
+        started = time.perf_counter()
+        _, info = fetcher._parse_feed("https://example.com/feed.xml", body)
+        best = min(best, time.perf_counter() - started)
+    summary.clear()
+    tracemalloc.start()
+    fetcher._parse_feed("https://example.com/feed.xml", body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, info["parser"]
+
+
+def run(repeat: int = 5) -> dict:
+    results = {"fixtures": {}}
+    original = config.FAST_PARSER
+    try:
+        for name, body in load_samples().items():
+            row = {"bytes": len(body)}
+            for label, enabled in (("feedparser", False), ("fast", True)):
+                config.FAST_PARSER = enabled
+                seconds, peak, used = _measure(body, repeat)
+                row[label] = {"ms": round(seconds * 1000, 2), "peak_kib": round(peak / 1024), "parser_used": used}
+            row["speedup"] = round(row["feedparser"]["ms"] / row["fast"]["ms"], 1)
+            row["memory_ratio"] = round(row["feedparser"]["peak_kib"] / max(1, row["fast"]["peak_kib"]), 1)
+            results["fixtures"][name] = row
+    finally:
+        config.FAST_PARSER = original
+    return results
+
+
+def run_pool(feed_count: int) -> dict:
+    """Wall time to parse feed_count feeds concurrently, in-process vs worker pool."""
+    bodies = list(load_samples().values())
+    jobs = [(f"https://example.com/{i}.xml", bodies[i % len(bodies)]) for i in range(feed_count)]
+    workers = os.cpu_count() or 1
+    results = {"feeds": feed_count, "threads": config.FETCH_CONCURRENCY, "workers": workers}
+    original = config.PARSE_WORKERS
+    try:
+        for label, count in (("in_process", 0), ("pool", workers)):
+            config.PARSE_WORKERS = count
+            # Warm the pool up so process start-up isn't timed.
+            parse_pool.parse(*jobs[0])
+            summary.clear()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=config.FETCH_CONCURRENCY) as executor:
+                list(executor.map(lambda job: parse_pool.parse(*job), jobs))
+            results[f"{label}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    finally:
+        config.PARSE_WORKERS = original
+        parse_pool.shutdown()
+    results["speedup"] = round(results["in_process_ms"] / results["pool_ms"], 1)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pool", type=int, default=0, metavar="N",
+                        help="also time N concurrent parses in-process vs the worker pool")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args(argv)
+    results = run(args.repeat)
+    if args.pool:
+        results["pool"] = run_pool(args.pool)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    for name, r in results["fixtures"].items():
+        print(f"\n{name}: {r['bytes']:,} bytes")
+        for label in ("feedparser", "fast"):
+            m = r[label]
+            print(f"  {label:<11} {m['ms']:>9.2f} ms  peak {m['peak_kib']:>7,} KiB  (used: {m['parser_used']})")
+        print(f"  speedup x{r['speedup']}, peak memory /{r['memory_ratio']}")
+    if "pool" in results:
+        p = results["pool"]
+        print(f"\n{p['feeds']} feeds on {p['threads']} threads: in-process {p['in_process_ms']:,} ms, "
+              f"{p['workers']} workers {p['pool_ms']:,} ms (x{p['speedup']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+bench_refresh.py -- Refresh, API and state-file benchmarks against a local feed server.
+
+Starts benchmarks.feed_server on 127.0.0.1 (see its options for feed count,
+entry count, payload size, latency, error/timeout injection and 304
+behaviour), points a throwaway DATA_DIR at it and measures:
+
+  fetch    fetcher.fetch_articles cold (empty feed_cache) and warm
+           (conditional requests), a full poller.refresh, and feed_cache
+           load/save at that size
+  api      /api/articles under concurrent clients, served from the poller
+           snapshot: the full list, one page, and a sync_token delta. The
+           app is driven in-process over httpx's ASGI transport, so
+           timings are the app's own, without socket or server overhead
+  state    per-call cost of the JSON state modules (feeds, bookmarks,
+           read_tracker, settings, feed_health) at the configured size
+
+Every stand-in feed is served from the same host, so FETCH_PER_HOST_LIMIT
+is raised to FETCH_CONCURRENCY (as if each feed had its own host) unless
+--per-host-limit says otherwise.
+
+Results, along with the commit, options and config they were taken with,
+are written as JSON to benchmarks/results/ (or --output). --compare OLD.json
+prints the change in every timing against an earlier run.
+
+    python -m benchmarks.bench_refresh [--feeds N] [--clients N] [--compare OLD.json] ...
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import httpx
+
+from app import (
+    article_store, bookmarks, config, feed_cache, feed_health, feeds, fetcher, poller,
+    read_tracker, scheduler, settings, storage, summary, sync,
+)
+from benchmarks import feed_server
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+TIMING_SUFFIXES = ("_ms", "_us")
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _summarize(samples: list[float]) -> dict:
+    """min / median / max of a list of durations in seconds, as milliseconds."""
+    return {
+        "runs": len(samples),
+        "min_ms": _ms(min(samples)),
+        "median_ms": _ms(statistics.median(samples)),
+        "max_ms": _ms(max(samples)),
+    }
+
+
+def _percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+
+    def pick(q):
+        return _ms(ordered[min(len(ordered) - 1, int(q * len(ordered)))])
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": _ms(ordered[-1])}
+
+
+@contextmanager
+def isolated_data_dir():
+    """Point the app at an empty DATA_DIR and reset in-memory state around it."""
+    original = config.DATA_DIR
+    with tempfile.TemporaryDirectory(prefix="teletext-bench-") as data_dir:
+        config.DATA_DIR = data_dir
+        _reset_state()
+        try:
+            yield data_dir
+        finally:
+            poller.stop()
+            _reset_state()
+            article_store.close()
+            config.DATA_DIR = original
+
+
+def _reset_state():
+    poller.clear()
+    scheduler.clear()
+    sync.clear()
+    summary.clear()
+    read_tracker.clear()
+    storage.invalidate()
+
+
+def bench_fetch(server: feed_server.FeedServer, cycles: int) -> dict:
+    results = {}
+    with isolated_data_dir():
+        feeds.add_feeds(server.urls)
+
+        server.reset_counts()
+        articles, elapsed = _timed(fetcher.fetch_articles)
+        results["cold"] = {"elapsed_ms": _ms(elapsed), "articles": len(articles), "server": dict(server.counts)}
+
+        server.reset_counts()
+        samples = [_timed(fetcher.fetch_articles)[1] for _ in range(cycles)]
+        results["warm"] = {**_summarize(samples), "server": dict(server.counts)}
+
+        server.reset_counts()
+        samples = [_timed(poller.refresh)[1] for _ in range(cycles)]
+        results["refresh"] = {**_summarize(samples), "server": dict(server.counts)}
+
+        entries, elapsed = _timed(feed_cache.load_entries)
+        _, saved = _timed(feed_cache.save_entries, entries)
+        results["feed_cache"] = {
+            "feeds": len(entries),
+            "bytes": os.path.getsize(os.path.join(config.DATA_DIR, "feed_cache.json")),
+            "load_ms": _ms(elapsed),
+            "save_ms": _ms(saved),
+        }
+    return results
+
+
+async def _load(app, path: str, clients: int, requests: int) -> dict:
+    """Send requests GETs for path from clients concurrent connections."""
+    latencies: list[float] = []
+    sizes: list[int] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(count):
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+                sizes.append(len(response.content))
+
+        per_client = [requests // clients + (i < requests % clients) for i in range(clients)]
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in per_client))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "response_bytes": round(statistics.mean(sizes)),
+        **_percentiles(latencies),
+    }
+
+
+def bench_api(server: feed_server.FeedServer, clients: int, requests: int) -> dict:
+    from app.main import app
+
+    results = {"clients": clients}
+    with isolated_data_dir():
+        feeds.add_feeds(server.urls)
+        # A running poller makes /api/articles serve its snapshot instead of fetching.
+        poller.start(interval=3600)
+        deadline = time.monotonic() + 120
+        while poller.current_snapshot() is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        snapshot = poller.current_snapshot()
+        if snapshot is None:
+            raise RuntimeError("the poller did not publish a snapshot within 120s")
+        results["snapshot_articles"] = len(snapshot.articles)
+
+        token = asyncio.run(_first_token(app))
+        for label, path in (
+            ("full", "/api/articles"),
+            ("page", "/api/articles?limit=50"),
+            ("delta", f"/api/articles?sync_token={token}"),
+        ):
+            results[label] = asyncio.run(_load(app, path, clients, requests))
+        poller.stop()
+    return results
+
+
+async def _first_token(app) -> str:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.get("/api/articles")
+        response.raise_for_status()
+        return response.json()["sync_token"]
+
+
+def _per_call(fn, args_list) -> dict:
+    started = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    elapsed = time.perf_counter() - started
+    return {"calls": len(args_list), "per_call_us": round(elapsed / len(args_list) * 1e6, 1)}
+
+
+def bench_state(size: int, calls: int) -> dict:
+    """Per-call cost of the JSON state modules holding size entries each."""
+    urls = [f"https://state.example.test/story/{i}" for i in range(size)]
+    feed_urls = [f"https://feed{i}.example.test/rss" for i in range(size)]
+    probe = [(urls[i * size // calls],) for i in range(calls)]
+    results = {"size": size}
+    with isolated_data_dir():
+        feeds.add_feeds(feed_urls)
+        bookmarks.add_bookmarks(urls)
+        read_tracker.mark_read_many(urls)
+
+        results["feeds.list_feeds"] = _per_call(feeds.list_feeds, [()] * calls)
+        results["feeds.add_feed+remove_feed"] = _per_call(
+            lambda i: (feeds.add_feed(f"https://new{i}.example.test/rss"),
+                       feeds.remove_feed(f"https://new{i}.example.test/rss")),
+            [(i,) for i in range(calls)],
+        )
+        results["bookmarks.is_bookmarked"] = _per_call(bookmarks.is_bookmarked, probe)
+        results["bookmarks.add_bookmark"] = _per_call(
+            bookmarks.add_bookmark, [(f"https://new.example.test/b/{i}",) for i in range(calls)],
+        )
+        results["read_tracker.is_read"] = _per_call(read_tracker.is_read, probe)
+        results["read_tracker.mark_read"] = _per_call(
+            read_tracker.mark_read, [(f"https://new.example.test/r/{i}",) for i in range(calls)],
+        )
+        results["read_tracker.read_urls"] = _per_call(read_tracker.read_urls, [()] * calls)
+        results["settings.get_settings"] = _per_call(settings.get_settings, [()] * calls)
+        results["settings.update_settings"] = _per_call(
+            settings.update_settings, [({"articles_per_page": 4 + i % 16},) for i in range(calls)],
+        )
+
+        def health_cycle():
+            batch = feed_health.HealthBatch()
+            for url in feed_urls:
+                batch.record_success(url, 10, {"bytes": 1000, "total_ms": 12.0})
+            batch.commit()
+
+        results["feed_health.HealthBatch.commit"] = _per_call(health_cycle, [()] * max(1, calls // 10))
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return sha + ("-dirty" if dirty else "")
+
+
+def _flatten(data, prefix=""):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f"{prefix}{key}.")
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix[:-1], data
+
+
+def compare(old: dict, new: dict) -> list[tuple[str, float, float, float]]:
+    """(metric, old, new, % change) for every timing present in both runs."""
+    before = dict(_flatten({k: old.get(k) for k in ("fetch", "api", "state")}))
+    rows = []
+    for key, value in _flatten({k: new.get(k) for k in ("fetch", "api", "state")}):
+        if key in before and key.endswith(TIMING_SUFFIXES) and before[key]:
+            rows.append((key, before[key], value, round((value - before[key]) / before[key] * 100, 1)))
+    return rows
+
+
+def run(options: dict, cycles: int, clients: int, requests: int, state_calls: int,
+        per_host_limit: int | None, request_timeout: float, only=("fetch", "api", "state")) -> dict:
+    original = (config.FETCH_PER_HOST_LIMIT, fetcher.REQUEST_TIMEOUT)
+    config.FETCH_PER_HOST_LIMIT = per_host_limit or config.FETCH_CONCURRENCY
+    fetcher.REQUEST_TIMEOUT = request_timeout
+    results = {
+        "meta": {
+            "revision": _git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "server": options,
+            "config": {
+                "FETCH_CONCURRENCY": config.FETCH_CONCURRENCY,
+                "FETCH_PER_HOST_LIMIT": config.FETCH_PER_HOST_LIMIT,
+                "FETCH_DEADLINE_SECONDS": config.FETCH_DEADLINE_SECONDS,
+                "REQUEST_TIMEOUT": request_timeout,
+                "FAST_PARSER": config.FAST_PARSER,
+                "PARSE_WORKERS": config.PARSE_WORKERS,
+                "SUMMARY_MAX_CHARS": config.SUMMARY_MAX_CHARS,
+                "ARTICLE_SNAPSHOT_LIMIT": config.ARTICLE_SNAPSHOT_LIMIT,
+            },
+            "cycles": cycles, "clients": clients, "requests": requests,
+        },
+    }
+    try:
+        with feed_server.FeedServer(**options) as server:
+            if "fetch" in only:
+                results["fetch"] = bench_fetch(server, cycles)
+            if "api" in only:
+                results["api"] = bench_api(server, clients, requests)
+        if "state" in only:
+            results["state"] = bench_state(options["feeds"] * options["entries"], state_calls)
+    finally:
+        config.FETCH_PER_HOST_LIMIT, fetcher.REQUEST_TIMEOUT = original
+    return results
+
+
+def _print(results: dict):
+    meta = results["meta"]
+    server = meta["server"]
+    print(f"revision {meta['revision']}, {server['feeds']} feeds x {server['entries']} entries "
+          f"({server['format']}), latency {server['latency_ms']} ms")
+    if "fetch" in results:
+        f = results["fetch"]
+        print(f"\nfetch_articles cold  {f['cold']['elapsed_ms']:>9.1f} ms  ({f['cold']['articles']} articles, "
+              f"server {f['cold']['server']})")
+        for label in ("warm", "refresh"):
+            r = f[label]
+            print(f"{label:<20} {r['median_ms']:>9.1f} ms median of {r['runs']}  (server {r['server']})")
+        c = f["feed_cache"]
+        print(f"feed_cache           load {c['load_ms']} ms, save {c['save_ms']} ms, {c['bytes']:,} bytes")
+    if "api" in results:
+        a = results["api"]
+        print(f"\n/api/articles, {a['clients']} clients, {a['snapshot_articles']} articles in snapshot")
+        for label in ("full", "page", "delta"):
+            r = a[label]
+            print(f"  {label:<6} {r['requests_per_second']:>8.1f} req/s  p50 {r['p50_ms']:>7.2f} ms  "
+                  f"p95 {r['p95_ms']:>7.2f} ms  p99 {r['p99_ms']:>7.2f} ms  {r['response_bytes']:,} bytes")
+    if "state" in results:
+        s = results["state"]
+        print(f"\nstate modules at {s['size']:,} entries")
+        for name, r in s.items():
+            if isinstance(r, dict):
+                print(f"  {name:<32} {r['per_call_us']:>10.1f} us/call")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    feed_server.add_arguments(parser)
+    parser.add_argument("--cycles", type=int, default=5, help="warm fetch / refresh cycles")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent /api/articles clients")
+    parser.add_argument("--requests", type=int, default=400, help="requests per /api/articles scenario")
+    parser.add_argument("--state-calls", type=int, default=200, help="calls per state-module operation")
+    parser.add_argument("--per-host-limit", type=int, default=None,
+                        help="FETCH_PER_HOST_LIMIT for the run (default: FETCH_CONCURRENCY)")
+    parser.add_argument("--request-timeout", type=float, default=2.0,
+                        help="per-request fetch timeout, so injected stalls don't dominate")
+    parser.add_argument("--only", action="append", choices=("fetch", "api", "state"),
+                        help="run only these sections (repeatable)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/refresh-<revision>-<time>.json)")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="print timing changes against an earlier results file")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(
+        feed_server.options_from_args(args), args.cycles, args.clients, args.requests, args.state_calls,
+        args.per_host_limit, args.request_timeout, tuple(args.only or ("fetch", "api", "state")),
+    )
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"refresh-{results['meta']['revision'] or 'unknown'}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        _print(results)
+        print(f"\nresults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"\nchange vs {old['meta'].get('revision')} ({args.compare}):")
+        for key, before, after, change in compare(old, results):
+            print(f"  {key:<48} {before:>10} -> {after:>10}  {change:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+bench_summary.py -- Summary extraction: old three-pass strip vs app.summary.
+
+Runs every entry summary from the sample feeds in benchmarks/fixtures
+through the previous fetcher._strip_html (tag regex, html.unescape, an
+uncompiled whitespace re.sub, no length limit), through summary.extract
+with the configured budget, and through summary.summary_for as a repeat
+refresh sees it (memo warm).
+
+    python -m benchmarks.bench_summary [--repeat N] [--json]
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+
+import feedparser
+
+from app import config, summary
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def legacy_strip_html(text: str) -> str:
+    """fetcher._strip_html before app.summary replaced it."""
+    if not text:
+        return ""
+    cleaned = _HTML_TAG_RE.sub("", text)
+    cleaned = html.unescape(cleaned)
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    return cleaned
+
+
+def load_samples() -> dict[str, list[tuple[str, str]]]:
+    """Return {fixture name: [(entry id, raw summary), ...]}."""
+    samples = {}
+    for name in sorted(os.listdir(FIXTURES)):
+        if not name.endswith(".xml"):
+            continue
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            parsed = feedparser.parse(f.read())
+        samples[name] = [
+            (entry.get("id") or entry.get("link", ""), entry.get("summary", ""))
+            for entry in parsed.entries
+        ]
+    return samples
+
+
+def _time(fn, entries, repeat: int) -> float:
+    """Best-of-repeat seconds to run fn over every entry once."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for entry_id, raw in entries:
+            fn(entry_id, raw)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(repeat: int = 20) -> dict:
+    results = {"summary_max_chars": config.SUMMARY_MAX_CHARS, "fixtures": {}}
+    for name, entries in load_samples().items():
+        summary.clear()
+        summary_for = summary.summary_for
+        for entry_id, raw in entries:
+            summary_for(entry_id, raw)
+        timings = {
+            "legacy_strip_html": _time(lambda _id, raw: legacy_strip_html(raw), entries, repeat),
+            "extract": _time(lambda _id, raw: summary.extract(raw), entries, repeat),
+            "summary_for_warm": _time(summary_for, entries, repeat),
+        }
+        legacy_chars = sum(len(legacy_strip_html(raw)) for _, raw in entries)
+        new_chars = sum(len(summary.extract(raw)) for _, raw in entries)
+        results["fixtures"][name] = {
+            "entries": len(entries),
+            "input_chars": sum(len(raw) for _, raw in entries),
+            "output_chars": {"legacy": legacy_chars, "extract": new_chars},
+            "ms_per_pass": {k: round(v * 1000, 3) for k, v in timings.items()},
+            "speedup_vs_legacy": {
+                k: round(timings["legacy_strip_html"] / v, 1) for k, v in timings.items() if v > 0
+            },
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args(argv)
+    results = run(args.repeat)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    print(f"SUMMARY_MAX_CHARS={results['summary_max_chars']}, best of {args.repeat}")
+    for name, r in results["fixtures"].items():
+        print(f"\n{name}: {r['entries']} entries, {r['input_chars']:,} chars in")
+        print(f"  output chars: legacy {r['output_chars']['legacy']:,}, extract {r['output_chars']['extract']:,}")
+        for key, ms in r["ms_per_pass"].items():
+            print(f"  {key:<20} {ms:>9.3f} ms   x{r['speedup_vs_legacy'][key]}")
+
+
+if __name__ == "__main__":
+    main()
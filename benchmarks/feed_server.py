@@ -0,0 +1,302 @@
+"""
+feed_server.py -- Local stand-in for the feed hosts, for repeatable refresh benchmarks.
+
+Serves `feeds` RSS 2.0 / Atom documents at http://127.0.0.1:PORT/feed/N.xml
+from a background thread. Each feed is either synthetic (entries_per_feed
+items whose summaries are padded to summary_bytes of HTML) or one of the
+hand-written sample feeds in benchmarks/fixtures with its links made unique per
+feed, so nothing collapses in article_store's URL dedup.
+
+Per request the server can inject latency, answer 500 (error_rate) or
+stall past the client timeout (timeout_rate). Validators are an ETag and
+Last-Modified per feed; conditional requests get 304 unless not_modified
+is off. With change_rate > 0 a feed publishes a new entry (and gets a new
+ETag) on that fraction of requests. All random choices come from one seeded
+generator, so a run with the same options makes the same decisions.
+
+    python -m benchmarks.feed_server [--feeds N] [--port P] ...   # serve until Ctrl-C
+"""
+
+import argparse
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+FORMATS = ("rss", "atom", "mixed", "samples")
+
+_FEED_PATH_RE = re.compile(r"^/feed/(\d+)\.xml$")
+_BASE_DATE = datetime(2026, 10, 1, tzinfo=timezone.utc)
+_FILLER = (
+    "<p>Officials said the <b>measure</b> would take effect next month, "
+    "although critics warned of <a href=\"https://example.org/more\">delays</a>.</p>"
+)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the fixture options to an argparse parser (shared with bench_refresh)."""
+    group = parser.add_argument_group("feed server")
+    group.add_argument("--feeds", type=int, default=50, help="number of feeds served")
+    group.add_argument("--entries", type=int, default=30, help="entries per synthetic feed")
+    group.add_argument("--summary-bytes", type=int, default=600, help="approximate HTML bytes per entry summary")
+    group.add_argument("--format", choices=FORMATS, default="mixed",
+                       help="synthetic rss/atom, mixed (alternating), or the sample feeds in benchmarks/fixtures")
+    group.add_argument("--latency-ms", type=float, default=20.0, help="delay before every response")
+    group.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    group.add_argument("--timeout-rate", type=float, default=0.0,
+                       help="fraction of requests that stall for --stall-seconds")
+    group.add_argument("--stall-seconds", type=float, default=5.0)
+    group.add_argument("--no-304", dest="not_modified", action="store_false",
+                       help="ignore If-None-Match / If-Modified-Since and always send 200")
+    group.add_argument("--change-rate", type=float, default=0.0,
+                       help="fraction of requests on which a feed publishes a new entry")
+    group.add_argument("--seed", type=int, default=1)
+
+
+def options_from_args(args: argparse.Namespace) -> dict:
+    return {
+        "feeds": args.feeds, "entries": args.entries, "summary_bytes": args.summary_bytes,
+        "format": args.format, "latency_ms": args.latency_ms, "error_rate": args.error_rate,
+        "timeout_rate": args.timeout_rate, "stall_seconds": args.stall_seconds,
+        "not_modified": args.not_modified, "change_rate": args.change_rate, "seed": args.seed,
+    }
+
+
+def _load_samples() -> list[str]:
+    samples = []
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.endswith(".xml"):
+            with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+                samples.append(f.read())
+    return samples
+
+
+def _summary(index: int, size: int) -> str:
+    text = f"<p>Entry {index}.</p>"
+    while len(text) < size:
+        text += _FILLER
+    return text
+
+
+class FeedServer:
+    """A threaded HTTP server for synthetic and sample feeds.
+
+    Use as a context manager, or call start() and stop(). urls lists the
+    feed URLs; counts tallies responses by outcome.
+    """
+
+    def __init__(self, feeds=50, entries=30, summary_bytes=600, format="mixed", latency_ms=20.0,
+                 error_rate=0.0, timeout_rate=0.0, stall_seconds=5.0, not_modified=True,
+                 change_rate=0.0, seed=1, port=0):
+        self.options = {
+            "feeds": feeds, "entries": entries, "summary_bytes": summary_bytes, "format": format,
+            "latency_ms": latency_ms, "error_rate": error_rate, "timeout_rate": timeout_rate,
+            "stall_seconds": stall_seconds, "not_modified": not_modified, "change_rate": change_rate,
+            "seed": seed,
+        }
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._generation = [0] * feeds
+        self._bodies: dict[tuple[int, int], bytes] = {}
+        self._samples = _load_samples() if format == "samples" else []
+        self._summary = _summary(0, summary_bytes)
+        self.counts = {"requests": 0, "200": 0, "304": 0, "500": 0, "stalled": 0, "bytes": 0}
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def urls(self) -> list[str]:
+        return [f"http://127.0.0.1:{self.port}/feed/{i}.xml" for i in range(self.options["feeds"])]
+
+    def start(self) -> "FeedServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="feed-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            for key in self.counts:
+                self.counts[key] = 0
+
+    # -- documents ---------------------------------------------------------
+
+    def _etag(self, feed: int, generation: int) -> str:
+        return f'"{feed}-{generation}"'
+
+    def _last_modified(self, generation: int) -> datetime:
+        return _BASE_DATE + timedelta(hours=generation)
+
+    def body(self, feed: int, generation: int) -> bytes:
+        key = (feed, generation)
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = self._render(feed, generation).encode("utf-8")
+            self._bodies.pop((feed, generation - 1), None)
+        return body
+
+    def _render(self, feed: int, generation: int) -> str:
+        fmt = self.options["format"]
+        if fmt == "samples":
+            return self._render_sample(feed, generation)
+        if fmt == "mixed":
+            fmt = ("rss", "atom")[feed % 2]
+        # Newest first: each generation adds one entry at the top.
+        count = self.options["entries"]
+        indexes = range(generation + count - 1, generation - 1, -1)
+        if fmt == "atom":
+            return self._render_atom(feed, generation, indexes)
+        return self._render_rss(feed, generation, indexes)
+
+    def _entry_date(self, index: int) -> datetime:
+        return _BASE_DATE + timedelta(minutes=30 * index)
+
+    def _render_rss(self, feed, generation, indexes) -> str:
+        items = "".join(
+            f"<item><title>Feed {feed} story {i}</title>"
+            f"<link>https://feed{feed}.example.test/story/{i}</link>"
+            f"<guid>https://feed{feed}.example.test/story/{i}</guid>"
+            f"<pubDate>{format_datetime(self._entry_date(i))}</pubDate>"
+            f"<description>{escape(self._summary)}</description></item>"
+            for i in indexes
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Benchmark feed {feed}</title><link>https://feed{feed}.example.test/</link>"
+            f"<ttl>5</ttl>{items}</channel></rss>"
+        )
+
+    def _render_atom(self, feed, generation, indexes) -> str:
+        entries = "".join(
+            f"<entry><title>Feed {feed} story {i}</title>"
+            f'<link href="https://feed{feed}.example.test/story/{i}"/>'
+            f"<id>tag:feed{feed}.example.test,2026:{i}</id>"
+            f"<updated>{self._entry_date(i).isoformat()}</updated>"
+            f'<summary type="html">{escape(self._summary)}</summary></entry>'
+            for i in indexes
+        )
+        updated = self._last_modified(generation).isoformat()
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>Benchmark feed {feed}</title><id>tag:feed{feed}.example.test,2026:feed</id>"
+            f"<updated>{updated}</updated>{entries}</feed>"
+        )
+
+    def _render_sample(self, feed, generation) -> str:
+        text = self._samples[feed % len(self._samples)]
+        # Distinct links per feed and generation, as bench_parser does for its large sample.
+        return re.sub(r"(</?(?:link|guid)[^>]*>[^<]*?)(</)", rf"\g<1>-{feed}-{generation}\2", text)
+
+    # -- request handling --------------------------------------------------
+
+    def _decide(self, feed: int) -> tuple[str, int]:
+        """Pick this request's outcome and the feed generation it sees."""
+        opts = self.options
+        with self._lock:
+            self.counts["requests"] += 1
+            roll = self._rng.random()
+            if roll < opts["timeout_rate"]:
+                return "stall", self._generation[feed]
+            if roll < opts["timeout_rate"] + opts["error_rate"]:
+                return "error", self._generation[feed]
+            if opts["change_rate"] and self._rng.random() < opts["change_rate"]:
+                self._generation[feed] += 1
+            return "ok", self._generation[feed]
+
+    def _count(self, key: str, size: int = 0):
+        with self._lock:
+            self.counts[key] += 1
+            self.counts["bytes"] += size
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                match = _FEED_PATH_RE.match(self.path)
+                if not match or int(match.group(1)) >= server.options["feeds"]:
+                    self._send(404)
+                    return
+                feed = int(match.group(1))
+                outcome, generation = server._decide(feed)
+                if server.options["latency_ms"]:
+                    time.sleep(server.options["latency_ms"] / 1000)
+                if outcome == "stall":
+                    server._count("stalled")
+                    time.sleep(server.options["stall_seconds"])
+                    self.close_connection = True
+                    return
+                if outcome == "error":
+                    server._count("500")
+                    self._send(500, b"injected error")
+                    return
+
+                etag = server._etag(feed, generation)
+                last_modified = format_datetime(server._last_modified(generation), usegmt=True)
+                validators = {"ETag": etag, "Last-Modified": last_modified}
+                if server.options["not_modified"] and (
+                    self.headers.get("If-None-Match") == etag
+                    or (self.headers.get("If-None-Match") is None
+                        and self.headers.get("If-Modified-Since") == last_modified)
+                ):
+                    server._count("304")
+                    self._send(304, headers=validators)
+                    return
+                body = server.body(feed, generation)
+                server._count("200", len(body))
+                self._send(200, body, {"Content-Type": "application/xml; charset=utf-8", **validators})
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    server = FeedServer(port=args.port, **options_from_args(args))
+    with server:
+        print(f"Serving {args.feeds} feeds at http://127.0.0.1:{server.port}/feed/0.xml ... (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
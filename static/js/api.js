@@ -9,8 +9,9 @@ async function request(path, options = {}) {
     return r.json();
 }
 
-export function fetchArticles() {
-    return request('/api/articles');
+export function fetchArticles(syncToken) {
+    const query = syncToken ? `?sync_token=${encodeURIComponent(syncToken)}` : '';
+    return request(`/api/articles${query}`);
 }
 
 export function getFeeds() {
@@ -65,10 +66,6 @@ export function getFeedHealth() {
     return request('/api/feeds/health');
 }
 
-export function importOpml(content) {
-    return request('/api/feeds/opml/import', { method: 'POST', headers: JSON_HEADERS, body: JSON.stringify({ content }) });
-}
-
-export function exportOpml() {
-    return request('/api/feeds/opml/export');
+export function uploadOpml(file) {
+    return request('/api/feeds/opml', { method: 'POST', headers: { 'Content-Type': 'application/xml' }, body: file });
 }
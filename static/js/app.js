@@ -7,6 +7,8 @@ import * as notifications from './notifications.js';
 import * as storage from './storage.js';
 
 let refreshInterval = null;
+let eventSource = null;
+let liveUpdates = false;  // true while the /api/events stream is connected
 
 const handlers = {
     nextPage, prevPage, refresh, selectArticle, toggleBookmark,
@@ -18,7 +20,7 @@ const handlers = {
     openFilter, closeFilter, setFilter,
     toggleFeed: doToggleFeed,
     discoverFeeds: doDiscoverFeeds,
-    importOpml: doImportOpml, importOpmlContent: doImportOpmlContent,
+    importOpml: doImportOpml, importOpmlFile: doImportOpmlFile,
     exportOpml: doExportOpml,
 };
 
@@ -40,17 +42,43 @@ function getVisibleArticles(articles) {
     return articles.filter(a => !disabled.has(a.source_url || ''));
 }
 
+function compareArticles(a, b) {
+    // Newest first, undated last, ties by id -- the server's snapshot order
+    const pa = a.published || '';
+    const pb = b.published || '';
+    if (pa !== pb) return pa < pb ? 1 : -1;
+    return (b.id || 0) - (a.id || 0);
+}
+
+function mergeDelta(current, delta) {
+    const removed = new Set(delta.removed);
+    const byId = new Map();
+    for (const a of current) {
+        if (!removed.has(a.id)) byId.set(a.id, a);
+    }
+    for (const a of delta.added) byId.set(a.id, a);
+    // delta.state is not applied: read/bookmarked come from localStorage
+    return [...byId.values()].sort(compareArticles);
+}
+
 async function refresh() {
     const s = getState();
     const prevUrls = s.articles.map(a => a.url);
     setState({ loading: true });
     try {
-        const data = await api.fetchArticles();
-        storage.enrichArticles(data.articles);
-        const visible = getVisibleArticles(data.articles);
+        const data = await api.fetchArticles(s.syncToken);
+        const isDelta = !data.articles;
+        if (isDelta && data.added.length === 0 && data.removed.length === 0) {
+            setState({ loading: false, syncToken: data.sync_token });
+            return;
+        }
+        const articles = isDelta ? mergeDelta(getState().allArticles, data) : data.articles;
+        storage.enrichArticles(articles);
+        const visible = getVisibleArticles(articles);
         const perPage = getState().settings.articles_per_page || 8;
         setState({
-            allArticles: data.articles,
+            allArticles: articles,
+            syncToken: data.sync_token,
             articles: visible,
             totalPages: Math.max(1, Math.ceil(visible.length / perPage)),
             page: 1,
@@ -350,9 +378,9 @@ function doImportOpml() {
     if (fileInput) fileInput.click();
 }
 
-async function doImportOpmlContent(content) {
+async function doImportOpmlFile(file) {
     try {
-        const data = await api.importOpml(content);
+        const data = await api.uploadOpml(file);
         setState({ feeds: data.feeds });
         renderFeedManager(getState(), handlers);
         showToast(`IMPORTED ${data.imported} FEED(S)`);
@@ -361,27 +389,40 @@ async function doImportOpmlContent(content) {
     }
 }
 
-async function doExportOpml() {
-    try {
-        const data = await api.exportOpml();
-        const blob = new Blob([data.opml], { type: 'application/xml' });
-        const url = URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = 'teletext-feeds.opml';
-        a.click();
-        URL.revokeObjectURL(url);
-        showToast('OPML EXPORTED');
-    } catch (e) {
-        showToast('EXPORT FAILED');
-    }
+function doExportOpml() {
+    // Served as a streamed download, so large lists never sit in a JS string.
+    const a = document.createElement('a');
+    a.href = '/api/feeds/opml';
+    a.download = 'teletext-feeds.opml';
+    a.click();
+    showToast('OPML EXPORT STARTED');
+}
+
+function setupEventStream(enabled) {
+    if (eventSource) eventSource.close();
+    eventSource = null;
+    liveUpdates = false;
+    if (!enabled || !('EventSource' in window)) return;
+    eventSource = new EventSource('/api/events');
+    eventSource.onopen = () => { liveUpdates = true; };
+    // The browser reconnects by itself; interval polling covers the gap
+    eventSource.onerror = () => { liveUpdates = false; };
+    eventSource.addEventListener('articles', () => refresh());
+    eventSource.addEventListener('health', (e) => {
+        const data = JSON.parse(e.data);
+        setState({ feedHealth: { ...getState().feedHealth, ...data.health } });
+    });
 }
 
 function setupAutoRefresh(seconds) {
     if (refreshInterval) clearInterval(refreshInterval);
     refreshInterval = null;
+    setupEventStream(seconds > 0);
     if (seconds > 0) {
-        refreshInterval = setInterval(refresh, seconds * 1000);
+        // Pushed events replace polling while the stream is connected
+        refreshInterval = setInterval(() => {
+            if (!liveUpdates) refresh();
+        }, seconds * 1000);
     }
 }
 
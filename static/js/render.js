@@ -559,11 +559,7 @@ export function renderFeedManager(state, handlers) {
     const fileInput = el('input', { type: 'file', id: 'opml-file-input', accept: '.opml,.xml', className: 'hidden' });
     fileInput.addEventListener('change', (e) => {
         const file = e.target.files[0];
-        if (file) {
-            const reader = new FileReader();
-            reader.onload = (ev) => handlers.importOpmlContent(ev.target.result);
-            reader.readAsText(file);
-        }
+        if (file) handlers.importOpmlFile(file);
     });
     modal.appendChild(fileInput);
 
@@ -17,6 +17,7 @@ const state = {
     filterText: '',         // current filter string
     filterMode: false,      // whether filter input is active
     previousArticleUrls: [], // for detecting new articles (notifications)
+    syncToken: null,        // token from the last /api/articles response (delta sync)
 };
 
 const listeners = new Set();
@@ -7,7 +7,17 @@ def tmp_data_dir(tmp_path, monkeypatch):
     monkeypatch.setenv("TELETEXT_DATA_DIR", str(tmp_path))
     import app.config as config
     monkeypatch.setattr(config, "DATA_DIR", str(tmp_path))
-    return tmp_path
+    yield tmp_path
+    from app import feed_cache, http_cache, metrics, opml_import, poller, scheduler, summary, sync
+    poller.stop()
+    poller.clear()
+    scheduler.clear()
+    sync.clear()
+    opml_import.clear()
+    summary.clear()
+    metrics.clear()
+    http_cache.clear()
+    feed_cache.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,33 @@
+import json
+
+from app import article_json
+from app.routers.articles import _annotate
+
+ARTICLES = [
+    {"id": i, "title": f"Story {i} – «ünïcode»", "url": f"https://example.com/{i % 4}", "summary": 'a "quoted" \\ line',
+     "published": None, "date": "21 Feb 2026"}
+    for i in range(8)
+]
+
+
+def test_body_matches_annotated_articles():
+    encoded = article_json.EncodedArticles(ARTICLES)
+    read = frozenset({"https://example.com/1", "https://example.com/2", "https://elsewhere.com/"})
+    bookmarked = {"https://example.com/2", "https://example.com/3"}
+    body = encoded.body(read, bookmarked)
+    assert json.loads(body) == _annotate(ARTICLES, read, bookmarked)
+    assert json.loads(encoded.body(frozenset(), set())) == _annotate(ARTICLES, set(), set())
+
+
+def test_ids_for_covers_duplicate_urls():
+    encoded = article_json.EncodedArticles(ARTICLES)
+    assert encoded.ids_for({"https://example.com/1", "https://nowhere.com/"}) == {1, 5}
+    assert encoded.ids_for(set()) == frozenset()
+
+
+def test_stdlib_fallback_is_equivalent(monkeypatch):
+    fast = article_json.EncodedArticles(ARTICLES).body({"https://example.com/0"}, set())
+    monkeypatch.setattr(article_json, "orjson", None)
+    slow = article_json.EncodedArticles(ARTICLES).body({"https://example.com/0"}, set())
+    assert json.loads(slow) == json.loads(fast)
+    assert article_json.dumps({"a": [1, 2.5, None]}) == b'{"a":[1,2.5,null]}'
@@ -0,0 +1,102 @@
+import time
+
+from app import article_store
+
+
+def _article(url, source_url="https://a.example.com/rss", title="T", published="2026-02-21T00:00:00+00:00"):
+    return {
+        "title": title, "source": "A", "source_url": source_url, "date": "Sat, 21 Feb 2026 00:00",
+        "published": published, "summary": "S", "url": url,
+    }
+
+
+def test_normalize_url_strips_tracking_and_case():
+    assert article_store.normalize_url("HTTPS://WWW.Example.com/story/?utm_source=x&id=1#top") == \
+        "https://example.com/story?id=1"
+
+
+def test_malformed_urls_do_not_abort_upsert():
+    assert article_store.normalize_url("https://Example.com:80a/x/") == "https://example.com:80a/x"
+    assert article_store.normalize_url("http://[::1/x") == "http://[::1/x"
+    article_store.upsert_articles([
+        _article("https://example.com:80a/x"), _article("http://[::1/x"), _article("https://news.example.com/1"),
+    ])
+    assert len(article_store.recent_articles()) == 3
+    assert article_store.known_urls(["https://example.com:80a/x", "https://gone.example.com/"]) == {
+        "https://example.com:80a/x",
+    }
+
+
+def test_syndicated_duplicates_collapse():
+    article_store.upsert_articles([_article("https://news.example.com/1")])
+    article_store.upsert_articles([
+        _article("https://news.example.com/1/?utm_medium=rss", source_url="https://b.example.com/rss", title="Copy"),
+    ])
+    articles = article_store.recent_articles()
+    assert len(articles) == 1
+    assert articles[0]["source_url"] == "https://a.example.com/rss"
+    assert articles[0]["title"] == "T"
+
+
+def test_upsert_reports_rows_written():
+    assert article_store.upsert_articles([_article("https://news.example.com/1")]) == 1
+    assert article_store.upsert_articles([_article("https://news.example.com/1", title="Edited")]) == 1
+    duplicate = _article("https://news.example.com/1", source_url="https://b.example.com/rss")
+    assert article_store.upsert_articles([duplicate, _article("https://news.example.com/2")]) == 1
+
+
+def test_recent_articles_newest_first():
+    article_store.upsert_articles([
+        _article("https://news.example.com/old", published="2026-02-20T00:00:00+00:00"),
+        _article("https://news.example.com/new", published="2026-02-22T00:00:00+00:00"),
+        _article("https://news.example.com/undated", published=None),
+    ])
+    urls = [a["url"] for a in article_store.recent_articles()]
+    assert urls == ["https://news.example.com/new", "https://news.example.com/old", "https://news.example.com/undated"]
+
+
+def test_prune_caps_rows_per_feed():
+    article_store.upsert_articles([
+        _article(f"https://news.example.com/{i}", published=f"2026-02-{10 + i}T00:00:00+00:00") for i in range(5)
+    ])
+    assert article_store.prune(max_per_feed=2) == 3
+    assert [a["url"] for a in article_store.recent_articles()] == [
+        "https://news.example.com/4", "https://news.example.com/3",
+    ]
+
+
+def test_prune_by_age_and_unsubscribed_feeds(monkeypatch):
+    article_store.upsert_articles([_article("https://news.example.com/1")])
+    article_store.upsert_articles([_article("https://other.example.com/1", source_url="https://gone.example.com/rss")])
+    # Still listed by its feed, so not old enough to prune.
+    assert article_store.prune(max_age_days=1) == 0
+    assert article_store.prune(keep_sources=["https://a.example.com/rss"]) == 1
+    monkeypatch.setattr(time, "time", lambda: 4_000_000_000.0)
+    assert article_store.prune(max_age_days=1) == 1
+    assert article_store.count() == 0
+
+
+def test_search_prefix_ranking_and_paging():
+    article_store.upsert_articles([
+        _article("https://news.example.com/1", title="Budget vote delayed", published="2026-02-22T00:00:00+00:00"),
+        {**_article("https://news.example.com/2", title="Markets", published="2026-02-23T00:00:00+00:00"),
+         "summary": "Traders await the budget"},
+        _article("https://news.example.com/3", title="Weather"),
+    ])
+    results, total = article_store.search_articles("budg", limit=10)
+    assert total == 2
+    # Title hits outrank summary hits even when older.
+    assert [a["url"] for a in results] == ["https://news.example.com/1", "https://news.example.com/2"]
+    page, total = article_store.search_articles("budget", limit=1, offset=1)
+    assert total == 2 and [a["url"] for a in page] == ["https://news.example.com/2"]
+    assert article_store.search_articles("budget weather", limit=10) == ([], 0)
+    assert article_store.search_articles('"); DROP', limit=10)[1] == 0
+
+
+def test_search_index_follows_edits_and_prunes():
+    article_store.upsert_articles([_article("https://news.example.com/1", title="Old headline")])
+    article_store.upsert_articles([_article("https://news.example.com/1", title="New headline")])
+    assert article_store.search_articles("old", limit=10)[1] == 0
+    assert article_store.search_articles("new", limit=10)[1] == 1
+    article_store.prune(keep_sources=[])
+    assert article_store.search_articles("headline", limit=10)[1] == 0
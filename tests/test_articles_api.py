@@ -1,6 +1,10 @@
+import time
 from types import SimpleNamespace
 from unittest.mock import patch
 
+import httpx
+import pytest
+
 
 def _make_feed_result(entries):
     feed_entries = []
@@ -14,9 +18,10 @@ def _make_feed_result(entries):
     return SimpleNamespace(bozo=0, feed=SimpleNamespace(title="Test Feed"), entries=feed_entries)
 
 
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
 @patch("app.fetcher.feedparser.parse")
 @patch("app.fetcher.feeds.list_feeds")
-def test_get_articles_returns_list(mock_list, mock_parse, client):
+def test_get_articles_returns_list(mock_list, mock_parse, mock_download, client):
     mock_list.return_value = ["https://example.com/rss"]
     mock_parse.return_value = _make_feed_result([
         {"title": "Test Article", "link": "https://example.com/1", "summary": "Test"},
@@ -29,9 +34,10 @@ def test_get_articles_returns_list(mock_list, mock_parse, client):
     assert data["count"] >= 1
 
 
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
 @patch("app.fetcher.feedparser.parse")
 @patch("app.fetcher.feeds.list_feeds")
-def test_articles_have_correct_keys(mock_list, mock_parse, client):
+def test_articles_have_correct_keys(mock_list, mock_parse, mock_download, client):
     mock_list.return_value = ["https://example.com/rss"]
     mock_parse.return_value = _make_feed_result([
         {"title": "Headline", "link": "https://example.com/1", "summary": "Summary"},
@@ -42,9 +48,10 @@ def test_articles_have_correct_keys(mock_list, mock_parse, client):
         assert key in article
 
 
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
 @patch("app.fetcher.feedparser.parse")
 @patch("app.fetcher.feeds.list_feeds")
-def test_articles_bookmarked_field(mock_list, mock_parse, client):
+def test_articles_bookmarked_field(mock_list, mock_parse, mock_download, client):
     mock_list.return_value = ["https://example.com/rss"]
     mock_parse.return_value = _make_feed_result([
         {"title": "Art1", "link": "https://example.com/1", "summary": "S1"},
@@ -54,3 +61,321 @@ def test_articles_bookmarked_field(mock_list, mock_parse, client):
     r = client.get("/api/articles")
     article = r.json()["articles"][0]
     assert article["bookmarked"] is True
+
+
+@patch("app.fetcher.config.FETCH_DEADLINE_SECONDS", 0.5)
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_skip_feeds_past_deadline(mock_list, mock_parse, client):
+    mock_list.return_value = ["https://fast.example.com/rss", "https://slow.example.com/rss"]
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Fast", "link": "https://fast.example.com/1", "summary": "S"},
+    ])
+
+    def fake_download(url, timeout=15, headers=None, timings=None):
+        if "slow" in url:
+            time.sleep(2)
+        return httpx.Response(200, content=b"")
+
+    with patch("app.fetcher._download", side_effect=fake_download):
+        start = time.monotonic()
+        r = client.get("/api/articles")
+        elapsed = time.monotonic() - start
+    assert r.status_code == 200
+    assert elapsed < 1.5
+    assert [a["source_url"] for a in r.json()["articles"]] == ["https://fast.example.com/rss"]
+    health = client.get("/api/feeds/health").json()["health"]
+    assert health["https://slow.example.com/rss"]["error_count"] == 1
+
+
+def test_host_queue_wait_counts_against_deadline():
+    import threading
+    from app import config, fetcher
+    url = "https://busy.example.com/rss"
+    sem = fetcher._host_semaphore(url)
+    timeouts = []
+
+    def hold_host(seconds):
+        while sem.acquire(blocking=False):
+            threading.Timer(seconds, sem.release).start()
+
+    def fake_download(url, timeout=15, headers=None, timings=None):
+        timeouts.append(timeout)
+        return httpx.Response(304)
+
+    with patch("app.fetcher._download", side_effect=fake_download):
+        # Every slot for the host stays taken past the deadline.
+        hold_host(1.0)
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            fetcher._fetch_with_deadline(url, time.monotonic() + 0.3)
+        assert time.monotonic() - started < 0.8
+        assert timeouts == []
+
+        # A slot frees up partway: the request gets only what is left.
+        slots = max(1, config.FETCH_PER_HOST_LIMIT)
+        for _ in range(slots):
+            sem.acquire()
+        for _ in range(slots):
+            sem.release()
+        hold_host(0.3)
+        fetcher._fetch_with_deadline(url, time.monotonic() + 1.0, {"articles": []})
+    assert len(timeouts) == 1 and timeouts[0] <= 0.75
+
+
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_failed_feed_recorded_as_error(mock_list, mock_parse, client):
+    mock_list.return_value = ["https://ok.example.com/rss", "https://down.example.com/rss"]
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Ok", "link": "https://ok.example.com/1", "summary": "S"},
+    ])
+
+    def fake_download(url, timeout=15, headers=None, timings=None):
+        if "down" in url:
+            raise OSError("connection refused")
+        return httpx.Response(200, content=b"")
+
+    with patch("app.fetcher._download", side_effect=fake_download):
+        r = client.get("/api/articles")
+    assert r.json()["count"] == 1
+    health = client.get("/api/feeds/health").json()["health"]
+    assert health["https://ok.example.com/rss"]["error_count"] == 0
+    assert "connection refused" in health["https://down.example.com/rss"]["error_message"]
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_served_from_poller_snapshot(mock_list, mock_parse, mock_download, client):
+    from app import poller
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Cached", "link": "https://example.com/1", "summary": "S"},
+    ])
+    poller.start(interval=3600)
+    for _ in range(10):
+        r = client.get("/api/articles")
+        assert r.json()["articles"][0]["title"] == "Cached"
+        assert r.json()["age_seconds"] >= 0
+    assert mock_download.call_count == 1
+
+
+def _slow_fetch(calls, delay=0.2, error=None):
+    def fetch_articles(due=None):
+        calls.append(due)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return []
+    return fetch_articles
+
+
+def test_concurrent_refreshes_share_one_cycle(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app import poller
+    calls = []
+    monkeypatch.setattr("app.poller.fetcher.fetch_articles", _slow_fetch(calls))
+    monkeypatch.setattr("app.poller.feeds.list_feeds", lambda: [])
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        snapshots = list(executor.map(lambda _: poller.get_snapshot(), range(5)))
+    assert len(calls) == 1
+    assert len({id(s) for s in snapshots}) == 1
+
+
+def test_refresh_error_shared_then_retried(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from app import poller
+    calls = []
+    monkeypatch.setattr("app.poller.fetcher.fetch_articles", _slow_fetch(calls, error=RuntimeError("down")))
+    monkeypatch.setattr("app.poller.feeds.list_feeds", lambda: [])
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(poller.refresh) for _ in range(3)]
+    assert all(isinstance(f.exception(), RuntimeError) for f in futures)
+    assert len(calls) == 1
+    with pytest.raises(RuntimeError):
+        poller.refresh()
+    assert len(calls) == 2
+
+
+def test_snapshot_reused_within_freshness_window(monkeypatch):
+    from app import poller
+    calls = []
+    monkeypatch.setattr("app.poller.fetcher.fetch_articles", _slow_fetch(calls, delay=0))
+    monkeypatch.setattr("app.poller.feeds.list_feeds", lambda: [])
+    first = poller.get_snapshot()
+    assert poller.get_snapshot() is first
+    assert len(calls) == 1
+
+    monkeypatch.setattr("app.config.REFRESH_FRESHNESS_SECONDS", 0)
+    assert poller.get_snapshot() is not first
+    assert len(calls) == 2
+
+
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_revalidated_with_conditional_get(mock_list, mock_parse, client, monkeypatch):
+    # Every request refreshes.
+    monkeypatch.setattr("app.config.REFRESH_FRESHNESS_SECONDS", 0)
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Unchanged", "link": "https://example.com/1", "summary": "S"},
+    ])
+    sent_headers = []
+
+    def fake_download(url, timeout=15, headers=None, timings=None):
+        sent_headers.append(headers or {})
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"", headers={
+            "ETag": '"v1"', "Last-Modified": "Sat, 21 Feb 2026 00:00:00 GMT",
+        })
+
+    with patch("app.fetcher._download", side_effect=fake_download):
+        first = client.get("/api/articles").json()
+        second = client.get("/api/articles").json()
+
+    assert mock_parse.call_count == 1
+    assert sent_headers[1] == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Sat, 21 Feb 2026 00:00:00 GMT",
+    }
+    assert second["articles"] == first["articles"]
+
+
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_unchanged_feed_cache_not_rewritten(mock_list, mock_parse, client):
+    from app import fetcher, storage
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Unchanged", "link": "https://example.com/1", "summary": "S"},
+    ])
+
+    def fake_download(url, timeout=15, headers=None, timings=None):
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, content=b"", headers={"ETag": '"v1"'})
+
+    with patch("app.fetcher._download", side_effect=fake_download), \
+            patch("app.storage.read_json", wraps=storage.read_json) as mock_read, \
+            patch("app.storage.write_json", wraps=storage.write_json) as mock_write:
+        cycles = [fetcher.fetch_articles() for _ in range(3)]
+    cache_writes = [c for c in mock_write.call_args_list if c.args[0].endswith("feed_cache.json")]
+    cache_reads = [c for c in mock_read.call_args_list if c.args[0].endswith("feed_cache.json")]
+    assert len(cache_writes) == 1
+    # Only the first cycle looks for the file; later ones reuse what was saved.
+    assert len(cache_reads) == 1
+    assert cycles[2] == cycles[0]
+
+
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_feeds_not_due_served_from_cache(mock_list, mock_parse, client):
+    from app import fetcher
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Kept", "link": "https://example.com/1", "summary": "S"},
+    ])
+    with patch("app.fetcher._download", return_value=httpx.Response(200, content=b"")) as mock_download:
+        fetcher.fetch_articles()
+        articles = fetcher.fetch_articles(due=set())
+    assert mock_download.call_count == 1
+    assert [a["title"] for a in articles] == ["Kept"]
+
+
+def _feed_of(n):
+    return _make_feed_result([
+        {"title": f"Story {i}", "link": f"https://example.com/{i}",
+         "published": f"Sat, {10 + i} Feb 2026 00:00:00 GMT"}
+        for i in range(n)
+    ])
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_cursor_pagination(mock_list, mock_parse, mock_download, client):
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _feed_of(5)
+
+    first = client.get("/api/articles", params={"limit": 2}).json()
+    assert [a["title"] for a in first["articles"]] == ["Story 4", "Story 3"]
+    second = client.get("/api/articles", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [a["title"] for a in second["articles"]] == ["Story 2", "Story 1"]
+    last = client.get("/api/articles", params={"limit": 2, "cursor": second["next_cursor"]}).json()
+    assert [a["title"] for a in last["articles"]] == ["Story 0"]
+    assert last["next_cursor"] is None
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_since_source_and_fields(mock_list, mock_parse, mock_download, client):
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _feed_of(5)
+
+    r = client.get("/api/articles", params={
+        "since": "2026-02-12T00:00:00Z", "source": "https://example.com/rss", "fields": "title,read",
+    })
+    assert r.status_code == 200
+    assert r.json()["articles"] == [
+        {"title": "Story 4", "read": False}, {"title": "Story 3", "read": False},
+    ]
+    assert client.get("/api/articles", params={"source": "https://other.example.com/rss"}).json()["count"] == 0
+
+
+def test_articles_rejects_bad_params(client):
+    assert client.get("/api/articles", params={"fields": "title,secret"}).status_code == 422
+    assert client.get("/api/articles", params={"limit": 0}).status_code == 422
+    assert client.get("/api/articles", params={"limit": 5, "cursor": "!!"}).status_code == 422
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse")
+@patch("app.fetcher.feeds.list_feeds")
+def test_articles_delta_sync(mock_list, mock_parse, mock_download, client, monkeypatch):
+    # Every request refreshes.
+    monkeypatch.setattr("app.config.REFRESH_FRESHNESS_SECONDS", 0)
+    mock_list.return_value = ["https://example.com/rss"]
+    mock_parse.return_value = _feed_of(3)
+    full = client.get("/api/articles").json()
+    ids = {a["title"]: a["id"] for a in full["articles"]}
+
+    unchanged = client.get("/api/articles", params={"sync_token": full["sync_token"]}).json()
+    assert unchanged["reset"] is False
+    assert unchanged["added"] == [] and unchanged["removed"] == [] and unchanged["state"] == []
+    assert "articles" not in unchanged
+
+    mock_parse.return_value = _make_feed_result([
+        {"title": "Story 1", "link": "https://example.com/1", "published": "Sat, 11 Feb 2026 00:00:00 GMT"},
+        {"title": "Story 2", "link": "https://example.com/2", "published": "Sat, 12 Feb 2026 00:00:00 GMT"},
+        {"title": "Fresh", "link": "https://example.com/fresh", "published": "Sat, 20 Feb 2026 00:00:00 GMT"},
+    ])
+    client.post("/api/read", json={"url": "https://example.com/2"})
+    with patch("app.config.ARTICLE_MAX_PER_FEED", 3):
+        delta = client.get("/api/articles", params={"sync_token": full["sync_token"]}).json()
+    assert [a["title"] for a in delta["added"]] == ["Fresh"]
+    assert delta["removed"] == [ids["Story 0"]]
+    assert delta["state"] == [{"id": ids["Story 2"], "read": True, "bookmarked": False}]
+    assert delta["count"] == 3
+
+
+def test_articles_unknown_sync_token_resets(client):
+    with patch("app.fetcher.feeds.list_feeds", return_value=[]):
+        r = client.get("/api/articles", params={"sync_token": "stale.1.abc"}).json()
+    assert r["reset"] is True
+    assert r["articles"] == []
+
+
+def test_search_endpoint(client):
+    from app import article_store
+    article_store.upsert_articles([{
+        "title": "Election results", "source": "A", "source_url": "https://example.com/rss",
+        "date": "", "published": "2026-02-21T00:00:00+00:00", "summary": "", "url": "https://example.com/e",
+    }])
+    client.post("/api/bookmarks", json={"url": "https://example.com/e"})
+    r = client.get("/api/search", params={"q": "elect", "fields": "title,bookmarked"})
+    assert r.status_code == 200
+    assert r.json()["articles"] == [{"title": "Election results", "bookmarked": True}]
+    assert r.json()["total"] == 1
+    assert client.get("/api/search", params={"q": ""}).status_code == 422
@@ -29,3 +29,19 @@ def test_remove_bookmark(client):
 def test_remove_bookmark_not_found(client):
     r = client.post("/api/bookmarks/delete", json={"url": "https://nonexistent.com"})
     assert r.status_code == 404
+
+
+def test_bookmark_batch_single_write(client):
+    from unittest.mock import patch
+    from app import storage
+    client.post("/api/bookmarks", json={"url": "https://example.com/a"})
+    urls = [f"https://example.com/{c}" for c in "abcd"]
+    with patch("app.bookmarks.storage.write_json", wraps=storage.write_json) as mock_write:
+        r = client.post("/api/bookmarks/batch", json={"action": "add", "urls": urls})
+    assert mock_write.call_count == 1
+    assert r.json()["changed"] == 3
+    assert r.json()["results"][0] == {"url": "https://example.com/a", "changed": False}
+
+    r = client.post("/api/bookmarks/batch", json={"action": "remove", "urls": urls[:2] + ["https://x.com"]})
+    assert r.json()["changed"] == 2
+    assert client.get("/api/bookmarks").json()["bookmarks"] == urls[2:]
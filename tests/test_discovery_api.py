@@ -1,44 +1,94 @@
 from unittest.mock import patch
 
+import httpx
+import pytest
 
-@patch("app.discovery.urllib.request.urlopen")
-def test_discover_feeds_none_found(mock_urlopen, client):
+from app import discovery
+
+
+@pytest.fixture(autouse=True)
+def clear_discovery_cache():
+    discovery.clear()
+    yield
+    discovery.clear()
+
+
+def _mock_site(pages, calls=None):
+    """Patch discovery's HTTP client to serve pages {url: (status, body, content_type)}."""
+    def handler(request):
+        url = str(request.url)
+        if calls is not None:
+            calls.append(url)
+        status, body, content_type = pages.get(url, (404, b"not found", "text/plain"))
+        return httpx.Response(status, content=body, headers={"Content-Type": content_type})
+
+    def make_client(timeout):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+
+    return patch("app.discovery._make_client", make_client)
+
+
+def test_discover_feeds_none_found(client):
     """When page has no RSS links, return empty list."""
-    from io import BytesIO
-
-    class FakeResp:
-        def read(self, n):
-            return b"<html><head><title>Test</title></head><body></body></html>"
-        def __enter__(self):
-            return self
-        def __exit__(self, *args):
-            pass
-
-    mock_urlopen.return_value = FakeResp()
-    r = client.post("/api/feeds/discover", json={"url": "https://example.com"})
+    pages = {"https://example.com": (200, b"<html><head><title>Test</title></head><body></body></html>", "text/html")}
+    with _mock_site(pages):
+        r = client.post("/api/feeds/discover", json={"url": "https://example.com"})
     assert r.status_code == 200
     assert r.json()["feeds"] == []
 
 
-@patch("app.discovery.urllib.request.urlopen")
-def test_discover_feeds_found(mock_urlopen, client):
+def test_discover_feeds_found(client):
     """When page has RSS link tags, return them."""
     html = b'''<html><head>
         <link rel="alternate" type="application/rss+xml" title="My Feed" href="/feed.xml">
     </head><body></body></html>'''
-
-    class FakeResp:
-        def read(self, n):
-            return html
-        def __enter__(self):
-            return self
-        def __exit__(self, *args):
-            pass
-
-    mock_urlopen.return_value = FakeResp()
-    r = client.post("/api/feeds/discover", json={"url": "https://example.com"})
+    with _mock_site({"https://example.com": (200, html, "text/html")}):
+        r = client.post("/api/feeds/discover", json={"url": "https://example.com"})
     assert r.status_code == 200
     feeds = r.json()["feeds"]
     assert len(feeds) == 1
     assert feeds[0]["title"] == "My Feed"
-    assert "feed.xml" in feeds[0]["url"]
+    assert feeds[0]["url"] == "https://example.com/feed.xml"
+
+
+def test_discover_ignores_links_after_head(client):
+    html = b'''<html><head><title>T</title></head><body>
+        <link rel="alternate" type="application/rss+xml" href="/late.xml">
+    </body></html>'''
+    with _mock_site({"https://example.com/": (200, html, "text/html")}):
+        r = client.post("/api/feeds/discover", json={"url": "https://example.com/"})
+    assert r.json()["feeds"] == []
+
+
+def test_discover_probes_common_paths(client):
+    rss = b'<?xml version="1.0"?><rss version="2.0"><channel><title>Probed</title></channel></rss>'
+    pages = {
+        "https://example.com/blog": (200, b"<html><head></head><body></body></html>", "text/html"),
+        "https://example.com/rss.xml": (200, rss, "application/rss+xml"),
+        "https://example.com/feed": (200, b"<html><head></head></html>", "text/html"),
+    }
+    with _mock_site(pages):
+        r = client.post("/api/feeds/discover", json={"url": "https://example.com/blog"})
+    assert r.json()["feeds"] == [{"url": "https://example.com/rss.xml", "title": "Probed"}]
+
+
+def test_discover_results_are_cached(client):
+    html = b'<html><head><link rel="alternate" type="application/atom+xml" href="/atom"></head></html>'
+    calls = []
+    with _mock_site({"https://example.com": (200, html, "text/html")}, calls):
+        first = client.post("/api/feeds/discover", json={"url": "https://example.com"}).json()
+        count = len(calls)
+        second = client.post("/api/feeds/discover", json={"url": "https://example.com"}).json()
+    assert first == second
+    assert len(calls) == count
+
+
+def test_discover_unreachable_site_not_cached(client):
+    def make_client(timeout):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    with patch("app.discovery._make_client", make_client):
+        assert client.post("/api/feeds/discover", json={"url": "https://down.example"}).json()["feeds"] == []
+    assert discovery._cache == {}
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+from app import events, poller
+
+
+def _feed(titles):
+    return SimpleNamespace(bozo=0, feed=SimpleNamespace(title="Test Feed"), entries=[
+        SimpleNamespace(title=t, link=f"https://example.com/{t}", published="Sat, 21 Feb 2026 00:00:00 GMT", summary="")
+        for t in titles
+    ])
+
+
+def test_format_event():
+    assert events.format_event("health", {"a": 1}) == 'event: health\ndata: {"a":1}\n\n'
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def scenario():
+        subscription = events.subscribe()
+        try:
+            for i in range(events.QUEUE_SIZE + 5):
+                events.publish("tick", {"i": i})
+            await asyncio.sleep(0)
+            first = await subscription.get(1)
+            return first, subscription.queue.qsize()
+        finally:
+            events.unsubscribe(subscription)
+
+    first, remaining = asyncio.run(scenario())
+    assert first == ("tick", {"i": 5})
+    assert remaining == events.QUEUE_SIZE - 1
+    assert not events.has_subscribers()
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse")
+@patch("app.poller.feeds.list_feeds", return_value=["https://example.com/rss"])
+@patch("app.fetcher.feeds.list_feeds", return_value=["https://example.com/rss"])
+def test_refresh_publishes_new_articles_and_health(mock_list, mock_poller_list, mock_parse, mock_download):
+    async def scenario():
+        subscription = events.subscribe()
+        try:
+            mock_parse.return_value = _feed(["one"])
+            await asyncio.to_thread(poller.refresh)
+            mock_parse.return_value = _feed(["one", "two"])
+            await asyncio.to_thread(poller.refresh)
+            received = []
+            while (item := await subscription.get(0.1)) is not None:
+                received.append(item)
+            return received
+        finally:
+            events.unsubscribe(subscription)
+
+    received = asyncio.run(scenario())
+    names = [name for name, _ in received]
+    assert names == ["health", "articles", "health"]
+    assert [a["title"] for a in received[1][1]["articles"]] == ["two"]
+    assert received[0][1]["health"]["https://example.com/rss"]["error_count"] == 0
@@ -0,0 +1,132 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app import config, fastparse, fetcher
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel>
+    <title>Example &amp; Co</title>
+    <ttl>30</ttl>
+    <item>
+      <title><![CDATA[Markets rally & bonds slip]]></title>
+      <link>https://example.com/markets</link>
+      <guid isPermaLink="false">id-1</guid>
+      <description>&lt;p&gt;Stocks &lt;b&gt;rose&lt;/b&gt; sharply.&lt;/p&gt;</description>
+      <pubDate>Sat, 17 Oct 2026 09:30:00 +0200</pubDate>
+    </item>
+    <item>
+      <title>Relative link</title>
+      <link>/news/2</link>
+      <dc:date>2026-10-16T12:00:00Z</dc:date>
+    </item>
+    <item>
+      <title>Guid only</title>
+      <guid>https://example.com/guid-link</guid>
+    </item>
+    <item><description>No title, skipped</description></item>
+  </channel>
+</rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Atom Example</title>
+  <entry>
+    <title>First entry</title>
+    <link rel="self" href="https://example.org/self/1"/>
+    <link rel="alternate" href="https://example.org/1"/>
+    <id>urn:uuid:1</id>
+    <updated>2026-10-15T08:00:00Z</updated>
+    <content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Hello <em>there</em></p></div></content>
+  </entry>
+  <entry>
+    <title>Second entry</title>
+    <link href="https://example.org/2"/>
+    <id>urn:uuid:2</id>
+    <published>2026-10-14T08:00:00+01:00</published>
+    <summary>Plain summary</summary>
+  </entry>
+</feed>"""
+
+CONTENT_RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+  <channel>
+    <title>Full text</title>
+    <item>
+      <title>Body only</title>
+      <link>https://example.com/body-only</link>
+      <content:encoded><![CDATA[<p>The <b>full</b> article text.</p>]]></content:encoded>
+    </item>
+    <item>
+      <title>Description first</title>
+      <link>https://example.com/description-first</link>
+      <description>Short teaser</description>
+      <content:encoded><![CDATA[<p>Long body</p>]]></content:encoded>
+    </item>
+    <item>
+      <title>Body first</title>
+      <link>https://example.com/body-first</link>
+      <content:encoded><![CDATA[<p>Long body</p>]]></content:encoded>
+      <description>Short teaser</description>
+    </item>
+  </channel>
+</rss>"""
+
+
+def _parse(body, fast, monkeypatch):
+    monkeypatch.setattr(config, "FAST_PARSER", fast)
+    return fetcher._parse_feed("https://example.com/feed.xml", body)
+
+
+@pytest.mark.parametrize("body", [RSS, ATOM, CONTENT_RSS], ids=["rss", "atom", "rss-content-encoded"])
+def test_fast_path_matches_feedparser(body, monkeypatch):
+    fast_articles, fast_info = _parse(body, True, monkeypatch)
+    slow_articles, slow_info = _parse(body, False, monkeypatch)
+    assert fast_info["parser"] == "fast"
+    assert slow_info["parser"] == "feedparser"
+    assert fast_articles == slow_articles
+    assert fast_info["ttl_seconds"] == slow_info["ttl_seconds"]
+
+
+def test_fast_path_fields():
+    parsed = fastparse.parse("https://example.com/feed.xml", RSS)
+    assert parsed["title"] == "Example & Co"
+    assert parsed["ttl"] == "30"
+    first, second, third = parsed["entries"][:3]
+    assert first["title"] == "Markets rally & bonds slip"
+    assert first["published"].isoformat() == "2026-10-17T07:30:00+00:00"
+    assert second["link"] == "https://example.com/news/2"
+    assert third["link"] == "https://example.com/guid-link"
+
+
+def test_rss_content_encoded_used_without_description(monkeypatch):
+    articles, info = _parse(CONTENT_RSS, True, monkeypatch)
+    assert info["parser"] == "fast"
+    summaries = {a["url"]: a["summary"] for a in articles}
+    assert summaries["https://example.com/body-only"] == "The full article text."
+    assert summaries["https://example.com/description-first"] == "Short teaser"
+    assert summaries["https://example.com/body-first"] == "Short teaser"
+
+
+@pytest.mark.parametrize("body", [
+    b"<rss version='2.0'><channel><item><title>A&nbsp;B</title></item></channel></rss>",
+    b"<?xml version='1.0'?><!DOCTYPE rss [<!ENTITY x 'y'>]><rss version='2.0'><channel/></rss>",
+    b"<rdf:RDF xmlns:rdf='http://www.w3.org/1999/02/22-rdf-syntax-ns#'/>",
+    b"<rss version='2.0'><channel><item><title>unclosed",
+], ids=["undeclared-entity", "dtd", "rdf", "truncated"])
+def test_unsupported_input_falls_back(body, monkeypatch):
+    assert fastparse.parse("https://example.com/feed.xml", body) is None
+    _, info = _parse(body, True, monkeypatch)
+    assert info["parser"] == "feedparser"
+
+
+@patch("app.fetcher.feeds.list_feeds")
+def test_health_reports_parser(mock_list, client):
+    mock_list.return_value = ["https://example.com/feed.xml"]
+    with patch("app.fetcher._download", return_value=httpx.Response(200, content=RSS)):
+        client.get("/api/articles")
+    health = client.get("/api/feeds/health").json()["health"]["https://example.com/feed.xml"]
+    assert health["parser"] == "fast"
+    assert health["last_fetch"]["parser"] == "fast"
@@ -4,7 +4,118 @@ def test_healthcheck(client):
     assert r.json()["status"] == "ok"
 
 
+def test_healthcheck_waits_for_first_snapshot(client, monkeypatch):
+    from app import poller
+    monkeypatch.setattr(poller, "is_running", lambda: True)
+    r = client.get("/health")
+    assert r.status_code == 503
+    assert r.json()["status"] == "starting"
+
+
+def test_healthcheck_ignores_snapshot_age_while_poller_checks(client, monkeypatch):
+    import time
+    from app import config, poller
+    monkeypatch.setattr(poller, "is_running", lambda: True)
+    monkeypatch.setattr(poller, "_snapshot", poller.Snapshot([{"id": 1}], time.time() - 60))
+    monkeypatch.setattr(poller, "_last_check", time.time())
+    monkeypatch.setattr(config, "HEALTH_MAX_CHECK_AGE_SECONDS", 30)
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.json()["snapshot_age_seconds"] == 60.0
+    assert r.json()["snapshot_articles"] == 1
+
+
+def test_healthcheck_reports_stalled_poller(client, monkeypatch):
+    import time
+    from app import config, poller
+    monkeypatch.setattr(poller, "is_running", lambda: True)
+    monkeypatch.setattr(poller, "_snapshot", poller.Snapshot([{"id": 1}], time.time()))
+    monkeypatch.setattr(poller, "_last_check", time.time() - 60)
+    monkeypatch.setattr(config, "HEALTH_MAX_CHECK_AGE_SECONDS", 30)
+    r = client.get("/health")
+    assert r.status_code == 503
+    assert r.json()["status"] == "stale"
+    assert r.json()["last_check_seconds"] == 60.0
+
+
+def test_healthcheck_ok_when_every_feed_is_scheduled_beyond_threshold(client, monkeypatch):
+    import time
+    from app import config, poller, scheduler
+    url = "https://example.com/rss"
+    monkeypatch.setattr("app.poller.feeds.list_feeds", lambda: [url])
+    monkeypatch.setattr("app.poller.fetcher.fetch_articles", lambda due=None: [])
+    monkeypatch.setattr(config, "HEALTH_MAX_CHECK_AGE_SECONDS", 30)
+    scheduler.record_poll(url, [], ttl_seconds=7200)
+    poller.start(interval=1)
+    for _ in range(50):
+        if poller.current_snapshot() is not None:
+            break
+        time.sleep(0.05)
+    # The scheduler leaves the only feed alone for two hours, so the
+    # snapshot ages well past the threshold while the poller keeps cycling.
+    monkeypatch.setattr(poller, "_snapshot", poller.Snapshot([], time.time() - 3600))
+    time.sleep(1.5)
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.json()["status"] == "ok"
+    assert r.json()["snapshot_age_seconds"] >= 3600
+    assert r.json()["last_check_seconds"] < 30
+
+
 def test_feed_health_empty(client):
     r = client.get("/api/feeds/health")
     assert r.status_code == 200
     assert r.json()["health"] == {}
+
+
+def test_feed_health_includes_schedule(client):
+    from app import scheduler
+    scheduler.record_poll("https://example.com/rss", [], ttl_seconds=3600)
+    r = client.get("/api/feeds/health")
+    entry = r.json()["schedule"]["https://example.com/rss"]
+    assert entry["reason"] == "ttl"
+    assert 3200 <= entry["interval_seconds"] <= 4000
+
+
+def test_schedule_backs_off_failing_feeds():
+    from app import scheduler
+    one, _ = scheduler.compute_interval("https://example.com/rss", [], error_count=1)
+    three, reason = scheduler.compute_interval("https://example.com/rss", [], error_count=3)
+    assert reason == "backoff"
+    assert three == 4 * one
+
+
+def test_schedule_follows_publish_cadence():
+    from datetime import datetime, timedelta
+    from app import scheduler
+    now = datetime(2026, 2, 21, 12, 0)
+    hourly = [{"_sort_dt": now - timedelta(hours=i)} for i in range(10)]
+    interval, reason = scheduler.compute_interval("https://example.com/rss", hourly)
+    assert reason == "cadence"
+    assert 1600 <= interval <= 2000
+    assert scheduler.due_feeds(["https://example.com/rss"]) == {"https://example.com/rss"}
+
+
+def test_refresh_writes_health_once_with_fetch_stats(client):
+    from unittest.mock import patch
+
+    import httpx
+
+    from app import fetcher, storage
+    from tests.test_articles_api import _make_feed_result
+
+    urls = [f"https://feed{i}.example.com/rss" for i in range(5)]
+    with patch("app.fetcher.feeds.list_feeds", return_value=urls), \
+            patch("app.fetcher._download", return_value=httpx.Response(200, content=b"<rss>xx</rss>")), \
+            patch("app.fetcher.feedparser.parse", return_value=_make_feed_result([
+                {"title": "A", "link": "https://example.com/a"},
+            ])), \
+            patch("app.storage.write_json", wraps=storage.write_json) as mock_write:
+        fetcher.fetch_articles()
+    health_writes = [c for c in mock_write.call_args_list if c.args[0].endswith("feed_health.json")]
+    assert len(health_writes) == 1
+
+    stats = client.get("/api/feeds/health").json()["health"][urls[0]]["last_fetch"]
+    assert stats["bytes"] == len(b"<rss>xx</rss>")
+    assert stats["not_modified"] is False
+    assert stats["parse_ms"] >= 0 and stats["total_ms"] >= stats["parse_ms"]
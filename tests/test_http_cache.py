@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+import httpx
+
+from tests.test_articles_api import _feed_of
+
+
+def _articles(client, **headers):
+    return client.get("/api/articles", headers=headers)
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse", return_value=_feed_of(30))
+@patch("app.fetcher.feeds.list_feeds", return_value=["https://example.com/rss"])
+def test_articles_not_modified_until_state_changes(mock_list, mock_parse, mock_download, client):
+    first = _articles(client)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = _articles(client, **{"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    client.post("/api/read", json={"url": "https://example.com/3"})
+    changed = _articles(client, **{"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [a["read"] for a in changed.json()["articles"] if a["url"] == "https://example.com/3"] == [True]
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse", return_value=_feed_of(30))
+@patch("app.fetcher.feeds.list_feeds", return_value=["https://example.com/rss"])
+def test_articles_compressed_once_per_version(mock_list, mock_parse, mock_download, client):
+    from app import http_cache
+    with patch("app.http_cache._compress", wraps=http_cache._compress) as mock_compress:
+        bodies = [
+            client.get("/api/articles", headers={"Accept-Encoding": "gzip"}) for _ in range(3)
+        ]
+    assert mock_compress.call_count == 1
+    for r in bodies:
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert r.json()["count"] == 30
+
+    plain = client.get("/api/articles", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert {**plain.json(), "age_seconds": 0} == {**bodies[0].json(), "age_seconds": 0}
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse", return_value=_feed_of(30))
+@patch("app.fetcher.feeds.list_feeds", return_value=["https://example.com/rss"])
+def test_cached_articles_body_reports_current_age(mock_list, mock_parse, mock_download, client, monkeypatch):
+    import time
+    from app import config
+    monkeypatch.setattr(config, "REFRESH_FRESHNESS_SECONDS", 60)
+    for encoding in ("identity", "gzip"):
+        first = client.get("/api/articles", headers={"Accept-Encoding": encoding})
+        time.sleep(1.1)
+        second = client.get("/api/articles", headers={"Accept-Encoding": encoding})
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers.get("content-encoding") == first.headers.get("content-encoding")
+        assert second.json()["age_seconds"] >= first.json()["age_seconds"] + 1
+        assert second.json()["articles"] == first.json()["articles"]
+    assert mock_download.call_count == 1
+
+
+def test_small_bodies_sent_uncompressed(client):
+    r = client.get("/api/settings", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"]
+
+
+def test_json_endpoints_honour_if_none_match(client):
+    first = client.get("/api/settings")
+    assert first.status_code == 200
+    assert client.get("/api/settings", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    client.put("/api/settings", json={"theme": "amber"})
+    assert client.get("/api/settings", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+    feeds = client.get("/api/feeds")
+    assert client.get("/api/feeds", headers={"If-None-Match": f'"x", {feeds.headers["etag"]}'}).status_code == 304
+
+
+@patch("app.fetcher._download", return_value=httpx.Response(200, content=b""))
+@patch("app.fetcher.feedparser.parse", return_value=_feed_of(30))
+@patch("app.fetcher.feeds.list_feeds", return_value=["https://example.com/rss"])
+def test_unchanged_refresh_keeps_etag(mock_list, mock_parse, mock_download, client, monkeypatch):
+    from app import poller
+    monkeypatch.setattr("app.config.REFRESH_FRESHNESS_SECONDS", 0)
+    first = _articles(client)
+    version = poller.current_snapshot().version
+
+    again = _articles(client, **{"If-None-Match": first.headers["etag"]})
+    assert mock_download.call_count == 2
+    assert again.status_code == 304
+    assert poller.current_snapshot().version == version
+    assert _articles(client).json()["fetched_at"] > first.json()["fetched_at"]
+
+    mock_parse.return_value = _feed_of(31)
+    changed = _articles(client, **{"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert poller.current_snapshot().version == version + 1
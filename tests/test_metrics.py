@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+import httpx
+
+from tests.test_articles_api import _make_feed_result
+
+
+def _sample(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_metrics_after_refresh(client):
+    url = "https://example.com/rss"
+    with patch("app.fetcher.feeds.list_feeds", return_value=[url]), \
+            patch("app.fetcher._download", return_value=httpx.Response(200, content=b"")), \
+            patch("app.fetcher.feedparser.parse", return_value=_make_feed_result([
+                {"title": "A", "link": "https://example.com/a"},
+                {"title": "B", "link": "https://example.com/b"},
+            ])):
+        assert client.get("/api/articles").status_code == 200
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert f'teletext_feed_fetch_responses_total{{feed="{url}",status="200"}} 1' in text
+    assert _sample(text, f'teletext_feed_fetch_seconds_count{{feed="{url}"}} 1')
+    assert f'teletext_feed_parse_entries{{feed="{url}"}} 2' in text
+    assert _sample(text, f'teletext_feed_parse_seconds_count{{feed="{url}",parser="feedparser"}} 1')
+    assert _sample(text, 'teletext_state_save_seconds_count{file="feed_health.json"}')
+    assert _sample(text, 'teletext_http_request_seconds_count{method="GET",route="/api/articles",status="200"} 1')
+    assert "teletext_article_store_rows 2" in text
+
+
+def test_request_metrics_use_route_templates(client):
+    client.get("/api/feeds/opml/import/nosuchjob")
+    # A path parameter whose value also appears earlier in the path.
+    client.get("/api/feeds/opml/import/feeds")
+    client.get("/index.html")
+    text = client.get("/metrics").text
+    assert _sample(text, 'teletext_http_request_seconds_count{method="GET",route="/api/feeds/opml/import/{job_id}",status="404"} 2')
+    assert _sample(text, 'teletext_http_request_seconds_count{method="GET",route="unmatched",status="200"}')
+    assert 'route="/api/{job_id}' not in text
+
+
+def test_metrics_label_fetch_failures(client):
+    from app import fetcher
+    url = "https://down.example.com/rss"
+    request = httpx.Request("GET", url)
+    with patch("app.fetcher.feeds.list_feeds", return_value=[url]), \
+            patch("app.fetcher._download", side_effect=httpx.ConnectTimeout("slow", request=request)):
+        fetcher.fetch_articles()
+    assert f'teletext_feed_fetch_responses_total{{feed="{url}",status="timeout"}} 1' in client.get("/metrics").text
+
+
+def test_fetch_abandoned_at_deadline_counted_once(client, monkeypatch):
+    import time
+    from app import config, fetcher
+    url = "https://slow.example.com/rss"
+    monkeypatch.setattr(config, "FETCH_DEADLINE_SECONDS", 0.2)
+
+    def slow_download(url, timeout=15, headers=None, timings=None):
+        time.sleep(0.5)
+        return httpx.Response(200, content=b"<rss/>")
+
+    with patch("app.fetcher.feeds.list_feeds", return_value=[url]), \
+            patch("app.fetcher._download", side_effect=slow_download), \
+            patch("app.fetcher.feedparser.parse", return_value=_make_feed_result([])):
+        fetcher.fetch_articles()
+        # Let the abandoned worker finish its download and parse.
+        time.sleep(0.6)
+    text = client.get("/metrics").text
+    assert f'teletext_feed_fetch_responses_total{{feed="{url}",status="timeout"}} 1' in text
+    assert f'teletext_feed_fetch_responses_total{{feed="{url}",status="200"}}' not in text
+
+
+def test_removed_feed_drops_its_series(client):
+    url = "https://example.com/rss"
+    other = "https://other.example.com/rss"
+    client.post("/api/feeds", json={"url": url})
+    with patch("app.fetcher.feeds.list_feeds", return_value=[url, other]), \
+            patch("app.fetcher._download", return_value=httpx.Response(200, content=b"")), \
+            patch("app.fetcher.feedparser.parse", return_value=_make_feed_result([
+                {"title": "A", "link": "https://example.com/a"},
+            ])):
+        client.get("/api/articles")
+    assert f'feed="{url}"' in client.get("/metrics").text
+
+    assert client.post("/api/feeds/delete", json={"url": url}).status_code == 200
+    text = client.get("/metrics").text
+    assert f'feed="{url}"' not in text
+    assert f'teletext_feed_fetch_responses_total{{feed="{other}",status="200"}} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    from app import metrics
+    h = metrics.Histogram("test_seconds", "Test.", ("op",), buckets=(0.1, 1.0))
+    try:
+        for value in (0.05, 0.5, 5.0):
+            h.observe(value, op="x")
+        lines = h.render()
+    finally:
+        metrics._registry.remove(h)
+    assert 'test_seconds_bucket{op="x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{op="x",le="1"} 2' in lines
+    assert 'test_seconds_bucket{op="x",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{op="x"} 3' in lines
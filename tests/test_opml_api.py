@@ -1,3 +1,9 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+
 def test_export_opml(client):
     r = client.get("/api/feeds/opml/export")
     assert r.status_code == 200
@@ -32,3 +38,143 @@ def test_import_opml_duplicate(client):
     r = client.post("/api/feeds/opml/import", json={"content": opml_content})
     assert r.status_code == 200
     assert r.json()["imported"] == 0
+
+
+CATEGORIZED_OPML = '''<?xml version="1.0" encoding="UTF-8"?>
+<opml version="2.0">
+  <body>
+    <outline text="Tech">
+      <outline type="rss" text="Example Tech" xmlUrl="https://example.com/tech.xml" htmlUrl="https://example.com/tech"/>
+      <outline type="rss" text="Down" xmlUrl="https://down.example.com/rss"/>
+    </outline>
+    <outline type="rss" text="Loose" xmlUrl="https://example.com/loose.xml" category="/World"/>
+    <outline type="rss" text="Again" xmlUrl="https://example.com/tech.xml"/>
+  </body>
+</opml>'''
+
+
+def test_import_opml_keeps_categories(client):
+    r = client.post("/api/feeds/opml/import", json={"content": CATEGORIZED_OPML})
+    assert r.json()["imported"] == 3
+    assert r.json()["skipped"] == 1
+    meta = client.get("/api/feeds").json()["meta"]
+    assert meta["https://example.com/tech.xml"] == {
+        "title": "Example Tech", "html_url": "https://example.com/tech", "category": "Tech",
+    }
+    assert meta["https://example.com/loose.xml"]["category"] == "World"
+
+    client.post("/api/feeds/delete", json={"url": "https://example.com/loose.xml"})
+    assert "https://example.com/loose.xml" not in client.get("/api/feeds").json()["meta"]
+
+
+def _wait(job_id, timeout=5):
+    """Block until an import job's thread finishes."""
+    from app import opml_import
+    with opml_import._lock:
+        job = opml_import._jobs[job_id]
+    job["_thread"].join(timeout)
+
+
+def test_import_opml_with_validation(client):
+    from app import feed_cache, opml_import
+
+    def fake_fetch(url, timeout=15, cached=None):
+        if "down" in url:
+            raise httpx.ConnectError("refused")
+        return {
+            "articles": [{"title": "A", "url": url + "#1", "source": "S", "source_url": url,
+                          "date": "", "summary": "", "_sort_dt": None}],
+            "etag": '"v1"', "last_modified": None, "ttl_seconds": None, "not_modified": False, "status": 200,
+            "stats": {"parse_ms": 0.5, "total_ms": 1.0, "bytes": 10, "not_modified": False, "parser": "fast"},
+        }
+
+    with patch("app.opml_import.fetcher._fetch_single_feed", side_effect=fake_fetch):
+        r = client.post("/api/feeds/opml/import", json={"content": CATEGORIZED_OPML, "validate_feeds": True})
+        assert r.status_code == 202
+        job_id = r.json()["id"]
+        _wait(job_id)
+
+    job = client.get(f"/api/feeds/opml/import/{job_id}").json()
+    assert job["status"] == "done"
+    assert (job["total"], job["checked"], job["accepted"], job["imported"]) == (3, 3, 2, 2)
+    assert job["rejected"] == [{"url": "https://down.example.com/rss", "error": "refused"}]
+    feed_list = client.get("/api/feeds").json()["feeds"]
+    assert "https://example.com/tech.xml" in feed_list
+    assert "https://down.example.com/rss" not in feed_list
+    assert feed_cache.load_entries()["https://example.com/tech.xml"]["etag"] == '"v1"'
+
+
+def test_import_commit_survives_concurrent_fetch_cycle(client):
+    from app import feed_cache, fetcher, opml_import
+    client.post("/api/feeds", json={"url": "https://example.com/old.xml"})
+    imported = "https://example.com/imported.xml"
+    result = {
+        "articles": [{"title": "A", "url": imported + "#1", "source": "S", "source_url": imported,
+                      "date": "", "summary": "", "_sort_dt": None}],
+        "etag": '"v1"', "last_modified": None, "ttl_seconds": None,
+        "not_modified": False, "stats": {"total_ms": 1.0, "bytes": 10, "not_modified": False},
+    }
+
+    def download_while_importing(url, timeout=15, headers=None, timings=None):
+        # The import commits after this cycle has read the feed list and cache.
+        opml_import._commit([{"url": imported, "title": "I", "html_url": "", "category": ""}], {imported: result})
+        return httpx.Response(200, content=b"")
+
+    with patch("app.fetcher._download", side_effect=download_while_importing), \
+            patch("app.fetcher.feedparser.parse", return_value=SimpleNamespace(entries=[], feed={})):
+        fetcher.fetch_articles()
+    entries = feed_cache.load_entries()
+    assert entries[imported]["etag"] == '"v1"'
+    assert "https://example.com/old.xml" in entries
+
+
+def test_import_job_not_found(client):
+    assert client.get("/api/feeds/opml/import/nope").status_code == 404
+
+
+def test_upload_opml_raw_body(client):
+    r = client.post(
+        "/api/feeds/opml", content=CATEGORIZED_OPML.encode("utf-8"),
+        headers={"Content-Type": "application/xml"},
+    )
+    assert r.status_code == 200
+    assert r.json()["imported"] == 3
+    assert client.get("/api/feeds").json()["meta"]["https://example.com/tech.xml"]["category"] == "Tech"
+
+
+def test_upload_opml_rejects_entity_expansion(client):
+    bomb = b'''<?xml version="1.0"?>
+<!DOCTYPE opml [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;&a;&a;&a;&a;&a;">]>
+<opml version="2.0"><body><outline xmlUrl="https://example.com/&b;"/></body></opml>'''
+    r = client.post("/api/feeds/opml", content=bomb, headers={"Content-Type": "application/xml"})
+    assert r.status_code == 422
+    assert "DTD" in r.json()["detail"]
+
+
+def test_upload_opml_malformed(client):
+    r = client.post("/api/feeds/opml", content=b"<opml><body><outline", headers={"Content-Type": "application/xml"})
+    assert r.status_code == 422
+
+
+def test_upload_opml_size_limit(client, monkeypatch):
+    from app import config
+    monkeypatch.setattr(config, "OPML_MAX_BYTES", 100)
+    r = client.post("/api/feeds/opml", content=CATEGORIZED_OPML.encode("utf-8"),
+                    headers={"Content-Type": "application/xml"})
+    assert r.status_code == 413
+    assert "https://example.com/tech.xml" not in client.get("/api/feeds").json()["feeds"]
+
+
+def test_download_opml_round_trips_metadata(client):
+    client.post("/api/feeds/opml/import", json={"content": CATEGORIZED_OPML})
+    r = client.get("/api/feeds/opml")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/xml")
+    assert 'htmlUrl="https://example.com/tech"' in r.text
+
+    from app import opml
+    entries = {e["url"]: e for e in opml.parse_outlines(r.text)}
+    assert entries["https://example.com/tech.xml"]["title"] == "Example Tech"
+    assert entries["https://example.com/tech.xml"]["category"] == "Tech"
+    assert entries["https://example.com/loose.xml"]["category"] == "World"
+    assert set(entries) == set(client.get("/api/feeds").json()["feeds"])
@@ -0,0 +1,47 @@
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from app import config, fetcher, parse_pool
+from tests.test_fastparse import ATOM, RSS
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    monkeypatch.setattr(config, "PARSE_WORKERS", 2)
+    yield
+    parse_pool.shutdown()
+
+
+def test_worker_parse_matches_in_process(workers):
+    for body in (RSS, ATOM):
+        expected = fetcher._parse_feed("https://example.com/feed.xml", body)
+        assert parse_pool.parse("https://example.com/feed.xml", body) == expected
+
+
+def test_broken_pool_falls_back_in_process(workers):
+    pool = MagicMock()
+    pool.submit.side_effect = BrokenProcessPool("worker died")
+    with patch("app.parse_pool._get_pool", return_value=pool):
+        articles, info = parse_pool.parse("https://example.com/feed.xml", RSS)
+    assert info["parser"] == "fast"
+    assert [a["title"] for a in articles][0] == "Markets rally & bonds slip"
+
+
+def test_disabled_pool_parses_in_process(monkeypatch):
+    monkeypatch.setattr(config, "PARSE_WORKERS", 0)
+    with patch("app.parse_pool.ProcessPoolExecutor") as mock_pool:
+        parse_pool.parse("https://example.com/feed.xml", RSS)
+    mock_pool.assert_not_called()
+
+
+@patch("app.fetcher.feeds.list_feeds")
+def test_fetch_articles_through_worker_pool(mock_list, workers, client):
+    mock_list.return_value = ["https://example.com/feed.xml"]
+    with patch("app.fetcher._download", return_value=httpx.Response(200, content=RSS)):
+        articles = client.get("/api/articles").json()["articles"]
+    assert [a["url"] for a in articles] == [
+        "https://example.com/markets", "https://example.com/news/2", "https://example.com/guid-link",
+    ]
@@ -1,3 +1,11 @@
+import json
+import os
+import time
+from unittest.mock import patch
+
+from app import article_store, config, read_tracker
+
+
 def test_list_read_empty(client):
     r = client.get("/api/read")
     assert r.status_code == 200
@@ -29,3 +37,95 @@ def test_mark_unread(client):
 def test_mark_unread_not_found(client):
     r = client.post("/api/read/delete", json={"url": "https://nonexistent.com"})
     assert r.status_code == 404
+
+
+def test_mark_read_appends_to_journal(client, tmp_data_dir):
+    from app import storage
+    client.get("/api/read")
+    with patch("app.read_tracker.storage.write_json", wraps=storage.write_json) as mock_write:
+        for i in range(5):
+            client.post("/api/read", json={"url": f"https://example.com/{i}"})
+        client.post("/api/read/delete", json={"url": "https://example.com/2"})
+    assert mock_write.call_count == 0
+    with open(os.path.join(tmp_data_dir, "read.log")) as f:
+        assert len(f.readlines()) == 6
+    read_tracker.clear()
+    assert read_tracker.list_read() == [f"https://example.com/{i}" for i in (0, 1, 3, 4)]
+
+
+def test_journal_compacts_into_read_json(client, tmp_data_dir, monkeypatch):
+    monkeypatch.setattr(config, "READ_LOG_COMPACT_ENTRIES", 3)
+    for i in range(4):
+        client.post("/api/read", json={"url": f"https://example.com/{i}"})
+    with open(os.path.join(tmp_data_dir, "read.json")) as f:
+        assert sorted(json.load(f)) == [f"https://example.com/{i}" for i in range(3)]
+    with open(os.path.join(tmp_data_dir, "read.log")) as f:
+        assert len(f.readlines()) == 1
+    read_tracker.clear()
+    assert len(client.get("/api/read").json()["read"]) == 4
+
+
+def test_legacy_list_format_is_loaded(client, tmp_data_dir):
+    with open(os.path.join(tmp_data_dir, "read.json"), "w") as f:
+        json.dump(["https://example.com/a", "https://example.com/b"], f)
+    assert client.get("/api/read").json()["read"] == ["https://example.com/a", "https://example.com/b"]
+    assert client.post("/api/read", json={"url": "https://example.com/a"}).status_code == 409
+
+
+def test_compact_prunes_expired_urls_without_articles(client, tmp_data_dir):
+    old = time.time() - (config.ARTICLE_RETENTION_DAYS + 1) * 86400
+    with open(os.path.join(tmp_data_dir, "read.json"), "w") as f:
+        json.dump({
+            "https://example.com/gone": old,
+            "https://example.com/stored": old,
+            "https://example.com/recent": time.time(),
+        }, f)
+    article_store.upsert_articles([{
+        "title": "Still here", "url": "https://example.com/stored",
+        "source": "Example", "source_url": "https://example.com/feed",
+    }])
+    assert read_tracker.compact()
+    assert sorted(read_tracker.list_read()) == ["https://example.com/recent", "https://example.com/stored"]
+
+
+def test_batch_mark_read_reports_per_url(client):
+    client.post("/api/read", json={"url": "https://example.com/a"})
+    r = client.post("/api/read/batch", json={
+        "action": "read",
+        "urls": ["https://example.com/a", "https://example.com/b", "https://example.com/b"],
+    })
+    assert r.status_code == 200
+    body = r.json()
+    assert body["changed"] == 1
+    assert body["results"] == [
+        {"url": "https://example.com/a", "changed": False},
+        {"url": "https://example.com/b", "changed": True},
+    ]
+    r = client.post("/api/read/batch", json={"action": "unread", "urls": ["https://example.com/a"]})
+    assert r.json()["changed"] == 1
+    assert client.get("/api/read").json()["read"] == ["https://example.com/b"]
+
+
+def test_batch_mark_read_by_filter(client):
+    article_store.upsert_articles([
+        {"title": "Old", "url": "https://example.com/old", "source_url": "https://example.com/feed",
+         "published": "2026-01-01T00:00:00+00:00"},
+        {"title": "New", "url": "https://example.com/new", "source_url": "https://example.com/feed",
+         "published": "2026-03-01T00:00:00+00:00"},
+        {"title": "Other", "url": "https://other.com/old", "source_url": "https://other.com/feed",
+         "published": "2026-01-01T00:00:00+00:00"},
+    ])
+    r = client.post("/api/read/batch", json={
+        "action": "read", "source_url": "https://example.com/feed", "older_than": "2026-02-01T00:00:00Z",
+    })
+    assert r.json()["changed"] == 1
+    assert client.get("/api/read").json()["read"] == ["https://example.com/old"]
+
+
+def test_batch_requires_urls_or_filter(client):
+    assert client.post("/api/read/batch", json={"action": "read"}).status_code == 422
+    r = client.post("/api/read/batch", json={
+        "action": "read", "urls": ["https://example.com/a"], "source_url": "https://example.com/feed",
+    })
+    assert r.status_code == 422
+    assert client.post("/api/read/batch", json={"action": "skim", "urls": []}).status_code == 422
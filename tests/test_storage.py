@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+
+from app import read_tracker, storage
+
+
+def test_read_json_cached_until_file_changes(tmp_data_dir):
+    path = os.path.join(tmp_data_dir, "state.json")
+    storage.write_json(path, ["a"])
+    with patch("app.storage.json.load", wraps=json.load) as mock_load:
+        assert storage.read_json(path) == ["a"]
+        assert storage.read_json(path) == ["a"]
+        assert mock_load.call_count == 0
+
+        # An external edit changes size/mtime and is picked up.
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(["a", "b"], f)
+        assert storage.read_json(path) == ["a", "b"]
+        assert storage.read_json(path) == ["a", "b"]
+        assert mock_load.call_count == 1
+
+
+def test_read_json_notices_same_size_replace(tmp_data_dir):
+    path = os.path.join(tmp_data_dir, "state.json")
+    storage.write_json(path, ["a"])
+    assert storage.read_json(path) == ["a"]
+    before = os.stat(path)
+
+    # Another writer atomically replaces it with a same-size body within one mtime tick.
+    other = path + ".other"
+    with open(other, "w", encoding="utf-8") as f:
+        f.write(json.dumps(["b"], indent=2))
+    os.utime(other, ns=(before.st_atime_ns, before.st_mtime_ns))
+    os.replace(other, path)
+    assert os.stat(path).st_size == before.st_size
+    assert storage.read_json(path) == ["b"]
+
+
+def test_read_json_returns_private_copies(tmp_data_dir):
+    path = os.path.join(tmp_data_dir, "state.json")
+    storage.write_json(path, {"keyword_alerts": ["x"]})
+    data = storage.read_json(path)
+    data["keyword_alerts"].append("y")
+    assert storage.read_json(path) == {"keyword_alerts": ["x"]}
+
+
+def test_api_requests_reuse_parsed_state(client):
+    client.post("/api/bookmarks", json={"url": "https://example.com/a"})
+    with patch("app.storage.json.load", wraps=json.load) as mock_load:
+        for _ in range(5):
+            assert client.get("/api/bookmarks").json()["bookmarks"] == ["https://example.com/a"]
+        assert mock_load.call_count == 0
+
+
+def test_write_json_is_atomic(tmp_data_dir):
+    path = os.path.join(tmp_data_dir, "state.json")
+    storage.write_json(path, ["old"])
+    with patch("app.storage.json.dump", side_effect=OSError("disk full")):
+        try:
+            storage.write_json(path, ["new"])
+        except OSError:
+            pass
+    storage.invalidate()
+    assert storage.read_json(path) == ["old"]
+    assert [f for f in os.listdir(tmp_data_dir) if not f.endswith(".lock")] == ["state.json"]
+
+
+def test_concurrent_mark_read_loses_no_updates(tmp_data_dir):
+    urls = [f"https://example.com/{i}" for i in range(40)]
+    threads = [threading.Thread(target=read_tracker.mark_read, args=(url,)) for url in urls]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(read_tracker.list_read()) == sorted(urls)
+
+
+def test_corrupt_state_file_is_quarantined(tmp_data_dir, client):
+    path = os.path.join(tmp_data_dir, "read.json")
+    with open(path, "w") as f:
+        f.write('["https://example.com/a", "https://exa')
+    assert client.get("/api/read").json()["read"] == []
+    moved = [f for f in os.listdir(tmp_data_dir) if f.startswith("read.json.corrupt-")]
+    assert len(moved) == 1
+    with open(os.path.join(tmp_data_dir, moved[0])) as f:
+        assert f.read().startswith('["https://example.com/a"')
+
+    assert client.post("/api/read", json={"url": "https://example.com/b"}).status_code == 200
+    assert read_tracker.list_read() == ["https://example.com/b"]
+
+
+def test_opml_import_writes_feeds_once(client, tmp_data_dir):
+    opml_content = """<?xml version="1.0"?>
+<opml version="2.0"><body>
+  <outline type="rss" xmlUrl="https://example.com/1.xml"/>
+  <outline type="rss" xmlUrl="https://example.com/2.xml"/>
+  <outline type="rss" xmlUrl="https://example.com/1.xml"/>
+</body></opml>"""
+    client.get("/api/feeds")
+    with patch("app.feeds.storage.write_json", wraps=storage.write_json) as mock_write:
+        resp = client.post("/api/feeds/opml/import", json={"content": opml_content})
+    assert resp.json()["imported"] == 2
+    feeds_path = os.path.join(str(tmp_data_dir), "feeds.json")
+    assert [c.args[0] for c in mock_write.call_args_list].count(feeds_path) == 1
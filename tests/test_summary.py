@@ -0,0 +1,38 @@
+from app import config, summary
+
+
+def test_extract_strips_markup_and_skips_scripts():
+    html = (
+        "<p>Markets &amp; <b>stocks</b> rallied.</p><script>track('x < y')</script>"
+        "<style>p { color: red }</style><!-- ad --><p>Second\n\n  paragraph</p>"
+    )
+    assert summary.extract(html, 0) == "Markets & stocks rallied. Second paragraph"
+
+
+def test_extract_stops_at_budget_on_word_boundary():
+    text = "<p>" + "alpha beta gamma " * 500 + "</p>"
+    result = summary.extract(text, 40)
+    assert result.endswith(summary.ELLIPSIS)
+    assert len(result) <= 41
+    assert "gam…" not in result
+
+
+def test_extract_short_text_untouched():
+    assert summary.extract("Just a line.", 100) == "Just a line."
+
+
+def test_summary_for_memoizes_by_id_and_content(monkeypatch):
+    summary.clear()
+    calls = []
+    real_extract = summary.extract
+    monkeypatch.setattr(summary, "extract", lambda text: calls.append(text) or real_extract(text))
+    assert summary.summary_for("guid-1", "<p>One</p>") == "One"
+    assert summary.summary_for("guid-1", "<p>One</p>") == "One"
+    assert summary.summary_for("guid-1", "<p>One, edited</p>") == "One, edited"
+    assert len(calls) == 2
+
+
+def test_summary_budget_is_configurable(monkeypatch):
+    summary.clear()
+    monkeypatch.setattr(config, "SUMMARY_MAX_CHARS", 10)
+    assert summary.summary_for("g", "<p>a much longer sentence</p>") == "a much…"